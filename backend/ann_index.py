@@ -0,0 +1,172 @@
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from similarity import normalize_rows, top_indices
+
+
+def spherical_kmeans(vectors: np.ndarray, clusters: int, iterations: int = 8, seed: int = 0) -> np.ndarray:
+    """Unit-norm centroids for unit vectors, clustered by cosine similarity"""
+    rng = np.random.default_rng(seed)
+    centroids = np.array(vectors[rng.choice(len(vectors), size=clusters, replace=False)], dtype=np.float32)
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        empty = ~sums.any(axis=1)
+        if empty.any():
+            # Re-seed empty clusters from random points
+            sums[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()))]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+class PostingList:
+    """Codes of one cluster and their vectors, stored contiguously in the same order"""
+
+    __slots__ = ("codes", "vectors")
+
+    def __init__(self, codes: List[str], vectors: np.ndarray):
+        self.codes = codes
+        self.vectors = vectors
+
+
+class IVFIndex:
+    """Inverted-file approximate nearest-neighbour index over unit vectors.
+
+    Vectors are clustered with spherical k-means into `nlist` lists; a query
+    scores only the vectors in its `nprobe` closest lists, so raising nprobe
+    trades latency for recall (nprobe = nlist is an exact search).
+    Each list holds a contiguous copy of its vectors (`dtype` float32, or
+    float16 at half the memory), so a query reads nprobe blocks in order
+    instead of gathering rows scattered over the whole matrix.
+
+    An index is never modified after it is built: `with_changes` returns a
+    new one that shares the untouched lists, so searches need no lock and a
+    catalog reload swaps the new index in together with the catalog.
+    """
+
+    def __init__(self, codes: List[str], matrix: np.ndarray, nlist: Optional[int] = None,
+                 nprobe: int = 8, train_sample: int = 64, iterations: int = 8, dtype=np.float32):
+        self.nprobe = nprobe
+        self.train_sample = train_sample
+        self.iterations = iterations
+        self.dtype = np.dtype(dtype)
+        self._build(list(codes), matrix, nlist)
+
+    def __len__(self) -> int:
+        return len(self._cluster_of)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._cluster_of
+
+    @property
+    def nlist(self) -> int:
+        return len(self.lists)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(posting.vectors.nbytes for posting in self.lists) + self.centroids.nbytes
+
+    def _build(self, codes: List[str], matrix: np.ndarray, nlist: Optional[int] = None):
+        dims = matrix.shape[1] if matrix.ndim == 2 else 0
+        self.lists: List[PostingList] = []
+        self._cluster_of: Dict[str, int] = {}
+        self.trained_size = len(codes)
+        if not codes:
+            self.centroids = np.zeros((0, dims), dtype=np.float32)
+            return
+        if nlist is None:
+            nlist = int(math.sqrt(len(codes)))
+        nlist = max(1, min(nlist, len(codes)))
+
+        rng = np.random.default_rng(0)
+        sample_size = min(len(codes), nlist * self.train_sample)
+        sample = np.sort(rng.choice(len(codes), size=sample_size, replace=False))
+        self.centroids = spherical_kmeans(np.asarray(matrix[sample], dtype=np.float32), nlist, self.iterations)
+
+        assignment = np.empty(len(codes), dtype=np.int64)
+        for start in range(0, len(codes), 8192):
+            block = np.asarray(matrix[start:start + 8192], dtype=np.float32)
+            assignment[start:start + 8192] = np.argmax(block @ self.centroids.T, axis=1)
+        order = np.argsort(assignment, kind="stable")
+        bounds = np.searchsorted(assignment[order], np.arange(nlist + 1))
+        for cluster in range(nlist):
+            members = order[bounds[cluster]:bounds[cluster + 1]]
+            # One gather per list at build time; the matrix may be a memory map
+            self.lists.append(PostingList(
+                [codes[row] for row in members.tolist()], np.asarray(matrix[members], dtype=self.dtype)
+            ))
+            for row in members.tolist():
+                self._cluster_of[codes[row]] = cluster
+
+    def with_changes(self, vectors: Dict[str, Iterable[float]], removed: Iterable[str] = ()) -> "IVFIndex":
+        """New index with `vectors` added or replaced and `removed` codes dropped.
+
+        Only the lists that gain or lose a vector are copied. Once the index
+        has doubled since k-means last ran, it is clustered again from scratch.
+        """
+        gone = {code for code in removed if code in self._cluster_of}
+        gone.update(code for code in vectors if code in self._cluster_of)
+        added_codes = list(vectors)
+        added = np.zeros((len(added_codes), self.centroids.shape[1]), dtype=np.float32)
+        if added_codes:
+            added = normalize_rows(np.array([list(vector) for vector in vectors.values()], dtype=np.float32))
+
+        index = IVFIndex.__new__(IVFIndex)
+        index.nprobe = self.nprobe
+        index.train_sample = self.train_sample
+        index.iterations = self.iterations
+        index.dtype = self.dtype
+        if not len(self.centroids) or len(self) - len(gone) + len(added_codes) > 2 * max(self.trained_size, 1):
+            codes, matrix = self._kept(gone)
+            index._build(codes + added_codes, np.concatenate([matrix, added]) if len(matrix) else added)
+            return index
+
+        index.centroids = self.centroids
+        index.trained_size = self.trained_size
+        index.lists = list(self.lists)
+        index._cluster_of = dict(self._cluster_of)
+        touched: Dict[int, List[int]] = {index._cluster_of.pop(code): [] for code in gone}
+        for i, cluster in enumerate(np.argmax(added @ self.centroids.T, axis=1).tolist() if added_codes else []):
+            touched.setdefault(cluster, []).append(i)
+            index._cluster_of[added_codes[i]] = cluster
+        for cluster, new_rows in touched.items():
+            posting = self.lists[cluster]
+            keep = [i for i, code in enumerate(posting.codes) if code not in gone]
+            index.lists[cluster] = PostingList(
+                [posting.codes[i] for i in keep] + [added_codes[i] for i in new_rows],
+                np.concatenate([posting.vectors[keep], added[new_rows].astype(self.dtype)]),
+            )
+        return index
+
+    def _kept(self, gone: set) -> Tuple[List[str], np.ndarray]:
+        codes, blocks = [], []
+        for posting in self.lists:
+            keep = [i for i, code in enumerate(posting.codes) if code not in gone]
+            codes.extend(posting.codes[i] for i in keep)
+            blocks.append(np.asarray(posting.vectors[keep], dtype=np.float32))
+        if not blocks:
+            return codes, np.zeros((0, self.centroids.shape[1]), dtype=np.float32)
+        return codes, np.concatenate(blocks)
+
+    def search(self, query: np.ndarray, k: int, nprobe: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Return up to k (code, score) pairs for a unit query vector, best first"""
+        if not len(self.centroids) or k <= 0:
+            return []
+        probed = top_indices(self.centroids @ query, min(nprobe or self.nprobe, len(self.lists)))
+        postings = [self.lists[cluster] for cluster in probed.tolist()]
+        scores = np.concatenate([
+            (posting.vectors if self.dtype == np.float32 else posting.vectors.astype(np.float32)) @ query
+            for posting in postings
+        ])
+        if not len(scores):
+            return []
+        offsets = np.cumsum([len(posting.codes) for posting in postings])
+        found = []
+        for i in top_indices(scores, k).tolist():
+            which = int(np.searchsorted(offsets, i, side="right"))
+            start = int(offsets[which - 1]) if which else 0
+            found.append((postings[which].codes[i - start], float(scores[i])))
+        return found
@@ -0,0 +1,89 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SYSTEM_PROMPT_TEMPLATE = """You are an intelligent course advisor for a Computer Science Department. You help students find courses, understand requirements, and plan their academic journey.
+
+{catalog_heading}:
+{courses_context}
+
+Instructions:
+- Answer questions about courses, faculty, prerequisites, and academic planning
+- Be helpful, friendly, and informative
+- When recommending courses, mention course codes, names, credits, and faculty
+- If asked about specific topics, suggest relevant courses from the database
+- For general questions, provide helpful academic guidance
+- Use markdown formatting for better readability (** for bold)
+- Keep responses concise but comprehensive
+- If you cannot find specific information in the course database, provide general academic advice"""
+
+
+def format_course(course) -> str:
+    """Render one catalog Course as a block of the assistant's course database"""
+    return (
+        f"- {course.code}: {course.name} ({course.credits} credits)\n"
+        f"  Description: {course.description}\n"
+        f"  Faculty: {course.faculty.name} ({course.faculty.email})\n"
+        f"  Office Hours: {course.faculty.office_hours}\n\n"
+    )
+
+
+class CatalogPrompt:
+    """Assistant system prompt compiled once per catalog version.
+
+    The full-catalog prompt and the per-course text blocks are cached and only
+    rebuilt when `compile` sees a new catalog version. `for_courses` builds a
+    smaller prompt from a subset of courses for retrieval mode.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = None
+        # Full prompt, course blocks and their majors are swapped together as one tuple
+        self._compiled: Tuple[str, Dict[str, str], Dict[str, str]] = ("", {}, {})
+
+    @property
+    def full_prompt(self) -> str:
+        return self._compiled[0]
+
+    def compile(self, catalog):
+        """Rebuild the cached prompt if the catalog version changed"""
+        if catalog.version == self.version:
+            return
+        with self._lock:
+            if catalog.version == self.version:
+                return
+            course_blocks = {}
+            course_majors = {}
+            parts = []
+            for major_id, major in enumerate(catalog.majors):
+                parts.append(f"\n**{major} Department:**\n")
+                for course in catalog.courses_by_major[major_id]:
+                    block = format_course(course)
+                    course_blocks[course.code] = block
+                    course_majors[course.code] = major
+                    parts.append(block)
+            full_prompt = SYSTEM_PROMPT_TEMPLATE.format(
+                catalog_heading="Available Courses Database",
+                courses_context="".join(parts),
+            )
+            self._compiled = (full_prompt, course_blocks, course_majors)
+            self.version = catalog.version
+
+    def for_courses(self, codes: Iterable[str]) -> Optional[str]:
+        """Prompt containing only the given courses, grouped by major"""
+        _, course_blocks, course_majors = self._compiled
+        by_major: Dict[str, List[str]] = {}
+        for code in codes:
+            block = course_blocks.get(code)
+            if block is not None:
+                by_major.setdefault(course_majors[code], []).append(block)
+        if not by_major:
+            return None
+        parts = []
+        for major, blocks in by_major.items():
+            parts.append(f"\n**{major} Department:**\n")
+            parts.extend(blocks)
+        return SYSTEM_PROMPT_TEMPLATE.format(
+            catalog_heading="Most Relevant Courses From The Database",
+            courses_context="".join(parts),
+        )
@@ -0,0 +1,293 @@
+"""Throughput, latency and recall benchmarks for the backend's hot paths.
+
+    python bench/bench.py similarity          # recall and memory of the quantized course indexes
+    python bench/bench.py ann [vectors.npy]   # IVF /search recall and latency per nprobe
+    python bench/bench.py credentials         # scrypt logins per second through the worker pool
+    python bench/bench.py metrics             # cost of instrumenting a request
+    python bench/bench.py registration        # concurrent submissions against limited seats
+
+Run from backend/. These measure speed; the correctness invariants
+(no oversold seats, idempotency, journal replay, token checks) are pytest
+tests in tests/.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# The backend modules are imported flat, the way uvicorn runs them from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ann_index import IVFIndex
+from credentials import CredentialService, hash_password
+from metrics import MetricsRegistry
+from registration_engine import RegistrationEngine
+from similarity import EmbeddingIndex, QuantizedIndex, normalize_rows, top_indices, unit_vector
+
+
+def similarity_benchmark(courses: int = 20000, dimensions: int = 1536, queries: int = 50, k: int = 10) -> List[Dict]:
+    """Recall@k and memory of each index variant against exact cosine similarity.
+
+    Ground truth is the exact float64 dot(a, b) / (|a| * |b|) ranking, on
+    synthetic clustered embeddings.
+    """
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(max(courses // 100, 1), dimensions))
+    raw = centers[rng.integers(len(centers), size=courses)] + rng.normal(scale=0.8, size=(courses, dimensions))
+    query_rows = rng.choice(courses, size=queries, replace=False)
+    query_vectors = raw[query_rows] + rng.normal(scale=0.5, size=(queries, dimensions))
+
+    norms = np.linalg.norm(raw, axis=1)
+    truth = []
+    for query in query_vectors:
+        exact = raw @ query / (norms * np.linalg.norm(query))
+        truth.append(set(np.argsort(-exact)[:k].tolist()))
+
+    codes = [str(i) for i in range(courses)]
+    base = EmbeddingIndex.build(codes, raw)
+    variants = [("float32", base)]
+    for mode in QuantizedIndex.MODES:
+        variants.append((f"{mode}", QuantizedIndex.from_index(base, mode, rerank=0)))
+        variants.append((f"{mode}+rerank", QuantizedIndex.from_index(base, mode, rerank=4)))
+
+    report = []
+    for name, index in variants:
+        hits = 0
+        started = time.perf_counter()
+        for query, expected in zip(query_vectors, truth):
+            found = index.top_k(unit_vector(query), k)
+            hits += len(expected & {int(code) for code, _ in found})
+        elapsed = time.perf_counter() - started
+        report.append({
+            "index": name,
+            "megabytes": round(index.nbytes / 2 ** 20, 1),
+            "recall": round(hits / (k * queries), 4),
+            "ms_per_query": round(elapsed / queries * 1000, 2),
+        })
+    return report
+
+
+def clustered_vectors(count: int, dimensions: int, rng: np.random.Generator, topics: int = 500,
+                      spread: float = 0.05) -> np.ndarray:
+    """Unit vectors scattered around `topics` random directions, like embeddings of related texts"""
+    centers = normalize_rows(rng.normal(size=(topics, dimensions)).astype(np.float32))
+    noise = rng.normal(scale=spread, size=(count, dimensions)).astype(np.float32)
+    return normalize_rows(centers[rng.integers(topics, size=count)] + noise)
+
+
+def ann_benchmark(courses: int = 100000, dimensions: int = 1536, queries: int = 200, k: int = 10,
+                  nprobe: int = 8, vectors: Optional[np.ndarray] = None, data: str = "isotropic",
+                  dtype: str = "float32") -> List[dict]:
+    """Latency and recall@k of IVF search at several nprobe values, against exact search.
+
+    Without `vectors` the data is either "isotropic" (uniform on the unit
+    sphere, with no cluster structure for the index to exploit, so its recall
+    is a lower bound) or "clustered" (points around topic directions, the
+    shape real embeddings have). Given `vectors` (e.g. a published course
+    index .npy), `queries` random rows are held out as queries and the rest
+    are indexed. The row marked "chosen" is the `nprobe` being evaluated.
+    """
+    rng = np.random.default_rng(0)
+    if vectors is None and data == "clustered":
+        vectors = clustered_vectors(courses + queries, dimensions, rng)
+    if vectors is None:
+        matrix = normalize_rows(rng.normal(size=(courses, dimensions)).astype(np.float32))
+        query_vectors = normalize_rows(rng.normal(size=(queries, dimensions)).astype(np.float32))
+    else:
+        vectors = normalize_rows(np.array(vectors, dtype=np.float32))
+        held_out = np.zeros(len(vectors), dtype=bool)
+        held_out[rng.choice(len(vectors), size=queries, replace=False)] = True
+        matrix, query_vectors = vectors[~held_out], vectors[held_out]
+    codes = [str(i) for i in range(len(matrix))]
+
+    truth = []
+    started = time.perf_counter()
+    for query in query_vectors:
+        truth.append(set(top_indices(matrix @ query, k).tolist()))
+    exact_ms = (time.perf_counter() - started) / len(query_vectors) * 1000
+
+    started = time.perf_counter()
+    index = IVFIndex(codes, matrix, dtype=dtype)
+    build_seconds = time.perf_counter() - started
+
+    report = [{"nprobe": "exact", "nlist": index.nlist, "recall": 1.0, "p50_ms": round(exact_ms, 2),
+               "p99_ms": None, "build_seconds": 0, "chosen": False}]
+    for probes in sorted({1, 2, 4, 8, 16, 32, 64, nprobe}):
+        if probes > index.nlist and probes != nprobe:
+            continue
+        hits = 0
+        latencies = []
+        for query, expected in zip(query_vectors, truth):
+            started = time.perf_counter()
+            found = index.search(query, k, nprobe=probes)
+            latencies.append(time.perf_counter() - started)
+            hits += len(expected & {int(code) for code, _ in found})
+        latencies.sort()
+        report.append({
+            "nprobe": probes,
+            "nlist": index.nlist,
+            "recall": round(hits / (k * len(query_vectors)), 4),
+            "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+            "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+            "build_seconds": round(build_seconds, 1),
+            "chosen": probes == nprobe,
+        })
+    return report
+
+
+def credentials_benchmark(seconds: float = 5.0, workers: Optional[int] = None, n: int = 2 ** 14) -> Dict[str, float]:
+    """Sustained password verifications per second through the process pool"""
+    service = CredentialService(workers=workers, n=n)
+    stored = hash_password("correct horse battery staple", n=n)
+
+    async def drive():
+        # Keep every worker busy: a couple of verifications in flight per process
+        in_flight = service.workers * 2
+        done = 0
+        deadline = time.perf_counter() + seconds
+
+        async def worker():
+            nonlocal done
+            while time.perf_counter() < deadline:
+                assert await service.verify("correct horse battery staple", stored)
+                done += 1
+
+        await service.verify("warm-up", stored)  # start the worker processes
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(in_flight)))
+        return done / (time.perf_counter() - started)
+
+    try:
+        per_second = asyncio.run(drive())
+    finally:
+        service.close()
+    return {"workers": service.workers, "n": n, "logins_per_second": round(per_second, 1),
+            "logins_per_second_per_core": round(per_second / service.workers, 1)}
+
+
+def metrics_benchmark(iterations: int = 200000) -> Dict[str, float]:
+    """Per-call cost of the instrumentation primitives, in microseconds"""
+    registry = MetricsRegistry()
+    histogram = registry.histogram("bench_seconds", "benchmark", ("route",)).labels("/bench")
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        pass
+    baseline = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for i in range(iterations):
+        histogram.observe(0.001)
+    observe = time.perf_counter() - started - baseline
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        with registry.span("bench"):
+            pass
+    span = time.perf_counter() - started - baseline
+
+    started = time.perf_counter()
+    for _ in range(100):
+        registry.render()
+    render = (time.perf_counter() - started) / 100
+
+    return {
+        "observe_us": round(observe / iterations * 1e6, 3),
+        "span_us": round(span / iterations * 1e6, 3),
+        "render_ms": round(render * 1000, 3),
+    }
+
+
+def registration_benchmark(students: int = 5000, courses: int = 9, capacity: int = 100, picks: int = 3,
+                           workers: int = 64) -> Dict[str, Any]:
+    """Throughput of `students` concurrent submissions against limited seats"""
+    codes = [f"C{i:03d}" for i in range(courses)]
+    engine = RegistrationEngine({code: capacity for code in codes})
+    rng = random.Random(0)
+    submissions = {f"student-{i}": rng.sample(codes, picks) for i in range(students)}
+
+    def submit(item):
+        uid, picked = item
+        return engine.register(uid, picked, idempotency_key="burst")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(submit, submissions.items()))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "students": students,
+        "submissions_per_second": round(students / elapsed),
+        "seconds": round(elapsed, 3),
+        "usage": engine.snapshot(),
+    }
+
+
+def show_similarity(args):
+    for row in similarity_benchmark():
+        print(f"{row['index']:>15}: {row['megabytes']:>7} MB  recall@10 {row['recall']:.4f}  "
+              f"{row['ms_per_query']} ms/query")
+
+
+def show_ann(args):
+    chosen = int(os.getenv("SEARCH_NPROBE", "8"))
+    dtype = os.getenv("SEARCH_INDEX_DTYPE", "float32")
+    runs = [(args.vectors, None)] if args.vectors else [("isotropic random", "isotropic"), ("clustered random", "clustered")]
+    for name, data in runs:
+        vectors = np.load(args.vectors, mmap_mode="r") if args.vectors else None
+        print(f"{name} vectors; SEARCH_NPROBE={chosen} SEARCH_INDEX_DTYPE={dtype}")
+        for row in ann_benchmark(nprobe=chosen, vectors=vectors, data=data or "isotropic", dtype=dtype):
+            print(f"nlist {row['nlist']} nprobe {row['nprobe']:>5}: recall@10 {row['recall']:.4f}  "
+                  f"p50 {row['p50_ms']} ms  p99 {row['p99_ms']} ms  (built in {row['build_seconds']}s)"
+                  + ("  <- chosen" if row["chosen"] else ""))
+
+
+def show_credentials(args):
+    for cost in (2 ** 13, 2 ** 14, 2 ** 15):
+        result = credentials_benchmark(n=cost)
+        print(f"scrypt n={result['n']}: {result['logins_per_second']} logins/s with {result['workers']} "
+              f"worker(s), {result['logins_per_second_per_core']} per core")
+
+
+def show_metrics(args):
+    result = metrics_benchmark()
+    print(f"histogram observe: {result['observe_us']} us, span: {result['span_us']} us, "
+          f"/metrics render: {result['render_ms']} ms")
+
+
+def show_registration(args):
+    report = registration_benchmark()
+    print(f"{report['students']} concurrent submissions in {report['seconds']}s "
+          f"({report['submissions_per_second']}/s)")
+    for code, usage in report["usage"].items():
+        print(f"  {code}: {usage['taken']}/{usage['capacity']} seats, {usage['waitlisted']} waitlisted")
+    # A submission should only cost the courses it names, however large the catalog
+    report = registration_benchmark(courses=10000)
+    print(f"with 10000 courses: {report['seconds']}s ({report['submissions_per_second']}/s)")
+
+
+BENCHMARKS = {
+    "similarity": show_similarity,
+    "ann": show_ann,
+    "credentials": show_credentials,
+    "metrics": show_metrics,
+    "registration": show_registration,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("benchmark", choices=list(BENCHMARKS))
+    parser.add_argument("vectors", nargs="?", help="ann: .npy matrix of real embeddings (default: isotropic random)")
+    args = parser.parse_args(argv)
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import copy
+from typing import Any, Dict, List, Optional, Tuple
+
+from http_cache import CachedJSON
+
+
+class _Record:
+    """Immutable record with __slots__ storage"""
+
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} records are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} records are immutable")
+
+    def same_as(self, other: Optional["_Record"]) -> bool:
+        """Field-by-field equality (records themselves compare by identity)"""
+        return other is not None and all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__ if not name.startswith("_"))
+        return f"{type(self).__name__}({fields})"
+
+
+class Faculty(_Record):
+    __slots__ = ("name", "email", "office_hours", "educational_background", "courses", "major")
+
+
+class Course(_Record):
+    __slots__ = ("code", "name", "description", "credits", "faculty", "major", "major_id", "capacity", "_raw")
+
+    def info(self) -> Dict[str, Any]:
+        """Flat course summary used by recommendations, search and selection"""
+        return {
+            "major": self.major,
+            "code": self.code,
+            "name": self.name,
+            "description": self.description,
+            "credits": self.credits,
+            "faculty": self.faculty.name
+        }
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Course in the original MAJORS_DATA shape (nested faculty dict)"""
+        return dict(self._raw, faculty=dict(self._raw["faculty"]))
+
+    @property
+    def embedding_text(self) -> str:
+        # Combine course name and description for richer embeddings
+        return f"{self.name} - {self.description}"
+
+
+class Catalog:
+    """Course and faculty data loaded once into immutable records and indexes.
+
+    Exposes code -> course, major id -> courses and faculty name -> faculty
+    lookups plus the ready-made payloads returned by the catalog endpoints,
+    both as dicts and pre-serialized with ETags.
+    A new catalog is a new object, identified by `version`. Built from a
+    `previous` catalog, it reuses the Course records and payloads that did not
+    change, so `course(code) is previous.course(code)` for unchanged courses.
+    """
+
+    def __init__(self, majors_data: Dict[str, List[Dict[str, Any]]], faculty_data: Dict[str, List[Dict[str, Any]]],
+                 version: int = 1, previous: Optional["Catalog"] = None):
+        self.version = version
+        self.majors: Tuple[str, ...] = tuple(majors_data)
+        self.faculty_majors: Tuple[str, ...] = tuple(faculty_data)
+
+        faculty_by_name: Dict[str, Faculty] = {}
+        faculty_by_major: Dict[int, Tuple[Faculty, ...]] = {}
+        for major_id, (major, members) in enumerate(faculty_data.items()):
+            records = []
+            for member in members:
+                record = Faculty(
+                    name=member["name"],
+                    email=member.get("email", ""),
+                    office_hours=member.get("office_hours", ""),
+                    educational_background=member.get("educational_background", ""),
+                    courses=tuple(member.get("courses", ())),
+                    major=major,
+                )
+                faculty_by_name.setdefault(record.name, record)
+                records.append(record)
+            faculty_by_major[major_id] = tuple(records)
+
+        courses: List[Course] = []
+        courses_by_major: Dict[int, Tuple[Course, ...]] = {}
+        for major_id, (major, major_courses) in enumerate(majors_data.items()):
+            records = []
+            for course in major_courses:
+                # Contact details come from the course entry; background and
+                # teaching list from the faculty directory when it has them
+                directory_entry = faculty_by_name.get(course["faculty"]["name"])
+                faculty = Faculty(
+                    name=course["faculty"]["name"],
+                    email=course["faculty"].get("email", ""),
+                    office_hours=course["faculty"].get("office_hours", ""),
+                    educational_background=directory_entry.educational_background if directory_entry else "",
+                    courses=directory_entry.courses if directory_entry else (f"{course['code']}: {course['name']}",),
+                    major=directory_entry.major if directory_entry else major,
+                )
+                unchanged = previous.course(course["code"]) if previous is not None else None
+                if (unchanged is not None and unchanged.major_id == major_id and unchanged.major == major
+                        and unchanged._raw == course and faculty.same_as(unchanged.faculty)):
+                    records.append(unchanged)
+                    continue
+                records.append(Course(
+                    code=course["code"],
+                    name=course["name"],
+                    description=course["description"],
+                    credits=course["credits"],
+                    faculty=faculty,
+                    major=major,
+                    major_id=major_id,
+                    capacity=course.get("capacity"),  # seat limit; None uses the server default
+                    _raw=copy.deepcopy(course),
+                ))
+            courses_by_major[major_id] = tuple(records)
+            courses.extend(records)
+
+        self.courses: Tuple[Course, ...] = tuple(courses)
+        self.courses_by_code: Dict[str, Course] = {course.code: course for course in courses}
+        self.courses_by_major = courses_by_major
+        self.faculty_by_name = faculty_by_name
+        self.faculty_by_major = faculty_by_major
+
+        # Response payloads for the read endpoints, built once per catalog
+        self.majors_payload = [{"id": i, "name": major} for i, major in enumerate(self.majors)]
+        self.courses_payloads = {}
+        self.courses_json = {}
+        for major_id, major in enumerate(self.majors):
+            if (previous is not None and previous.majors[major_id:major_id + 1] == (major,)
+                    and previous.courses_by_major[major_id] == courses_by_major[major_id]):
+                self.courses_payloads[major_id] = previous.courses_payloads[major_id]
+                self.courses_json[major_id] = previous.courses_json[major_id]
+            else:
+                self.courses_payloads[major_id] = {"major": major, "courses": [course.as_dict() for course in courses_by_major[major_id]]}
+                self.courses_json[major_id] = CachedJSON(self.courses_payloads[major_id])
+        self.faculty_payloads = {}
+        self.faculty_json = {}
+        for major_id, major in enumerate(self.faculty_majors):
+            if (previous is not None and previous.faculty_majors[major_id:major_id + 1] == (major,)
+                    and previous.faculty_payloads[major_id]["faculty"] == faculty_data[major]):
+                self.faculty_payloads[major_id] = previous.faculty_payloads[major_id]
+                self.faculty_json[major_id] = previous.faculty_json[major_id]
+            else:
+                self.faculty_payloads[major_id] = {"major": major, "faculty": copy.deepcopy(faculty_data[major])}
+                self.faculty_json[major_id] = CachedJSON(self.faculty_payloads[major_id])
+        self.majors_json = CachedJSON(self.majors_payload)
+
+    def __len__(self) -> int:
+        return len(self.courses)
+
+    def course(self, code: str) -> Optional[Course]:
+        return self.courses_by_code.get(code)
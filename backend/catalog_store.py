@@ -0,0 +1,217 @@
+import csv
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Built-in catalog, used when no catalog file has been imported
+MAJORS_DATA = {
+    "Applied Machine Learning": [
+        {"code": "CS101", "name": "Probability and Statistics", "description": "Introduction to probability theory and statistical methods for data analysis", "credits": 3, "faculty": {"name": "Dr. Sarah Johnson", "email": "s.johnson@university.edu", "office_hours": "Monday & Wednesday 2-4 PM"}},
+        {"code": "CS102", "name": "Data Visualization using R", "description": "Learn to create compelling visualizations using R programming language", "credits": 3, "faculty": {"name": "Prof. Michael Chen", "email": "m.chen@university.edu", "office_hours": "Tuesday & Thursday 10-12 PM"}},
+        {"code": "CS103", "name": "Model Building with Regression Algorithms", "description": "Advanced techniques for building predictive models using various regression methods", "credits": 4, "faculty": {"name": "Dr. Emily Rodriguez", "email": "e.rodriguez@university.edu", "office_hours": "Friday 1-4 PM"}}
+    ],
+    "Deep Learning": [
+        {"code": "CS201", "name": "Neural Network Basics", "description": "Fundamentals of neural networks including perceptrons, backpropagation, and optimization", "credits": 4, "faculty": {"name": "Prof. David Kim", "email": "d.kim@university.edu", "office_hours": "Monday & Friday 9-11 AM"}},
+        {"code": "CS202", "name": "Transformers and Attention", "description": "Modern transformer architectures and attention mechanisms for NLP and computer vision", "credits": 4, "faculty": {"name": "Dr. Lisa Wang", "email": "l.wang@university.edu", "office_hours": "Wednesday 2-5 PM"}},
+        {"code": "CS203", "name": "Generative AI with Python", "description": "Hands-on experience with generative models including GANs, VAEs, and large language models", "credits": 3, "faculty": {"name": "Prof. Alex Thompson", "email": "a.thompson@university.edu", "office_hours": "Tuesday & Thursday 1-3 PM"}}
+    ],
+    "Data Science": [
+        {"code": "CS301", "name": "Data Mining", "description": "Techniques for discovering patterns in large datasets using clustering, classification, and association rules", "credits": 3, "faculty": {"name": "Dr. Rachel Green", "email": "r.green@university.edu", "office_hours": "Monday & Wednesday 11 AM-1 PM"}},
+        {"code": "CS302", "name": "Hypothesis Testing using t-test", "description": "Statistical hypothesis testing methods with focus on t-tests and their applications", "credits": 2, "faculty": {"name": "Prof. James Miller", "email": "j.miller@university.edu", "office_hours": "Thursday 3-6 PM"}},
+        {"code": "CS303", "name": "Feature Engineering with R", "description": "Advanced feature selection and engineering techniques using R for machine learning projects", "credits": 3, "faculty": {"name": "Dr. Maria Garcia", "email": "m.garcia@university.edu", "office_hours": "Tuesday & Friday 10 AM-12 PM"}}
+    ]
+}
+
+# Faculty data for each department
+FACULTY_DATA = {
+    "Applied Machine Learning": [
+        {
+            "name": "Dr. Sarah Johnson",
+            "courses": ["CS101: Probability and Statistics"],
+            "educational_background": "PhD in Statistics, Stanford University; MS in Mathematics, MIT",
+            "email": "s.johnson@university.edu",
+            "office_hours": "Monday & Wednesday 2-4 PM"
+        },
+        {
+            "name": "Prof. Michael Chen",
+            "courses": ["CS102: Data Visualization using R"],
+            "educational_background": "PhD in Computer Science, UC Berkeley; BS in Statistics, UCLA",
+            "email": "m.chen@university.edu",
+            "office_hours": "Tuesday & Thursday 10-12 PM"
+        },
+        {
+            "name": "Dr. Emily Rodriguez",
+            "courses": ["CS103: Model Building with Regression Algorithms"],
+            "educational_background": "PhD in Machine Learning, Carnegie Mellon University; MS in Applied Mathematics, Caltech",
+            "email": "e.rodriguez@university.edu",
+            "office_hours": "Friday 1-4 PM"
+        }
+    ],
+    "Deep Learning": [
+        {
+            "name": "Prof. David Kim",
+            "courses": ["CS201: Neural Network Basics"],
+            "educational_background": "PhD in Artificial Intelligence, MIT; MS in Computer Science, Stanford",
+            "email": "d.kim@university.edu",
+            "office_hours": "Monday & Friday 9-11 AM"
+        },
+        {
+            "name": "Dr. Lisa Wang",
+            "courses": ["CS202: Transformers and Attention"],
+            "educational_background": "PhD in Natural Language Processing, Google Research; MS in Computer Science, University of Washington",
+            "email": "l.wang@university.edu",
+            "office_hours": "Wednesday 2-5 PM"
+        },
+        {
+            "name": "Prof. Alex Thompson",
+            "courses": ["CS203: Generative AI with Python"],
+            "educational_background": "PhD in Machine Learning, Oxford University; BS in Computer Science, Harvard",
+            "email": "a.thompson@university.edu",
+            "office_hours": "Tuesday & Thursday 1-3 PM"
+        }
+    ],
+    "Data Science": [
+        {
+            "name": "Dr. Rachel Green",
+            "courses": ["CS301: Data Mining"],
+            "educational_background": "PhD in Data Science, University of Chicago; MS in Statistics, Northwestern University",
+            "email": "r.green@university.edu",
+            "office_hours": "Monday & Wednesday 11 AM-1 PM"
+        },
+        {
+            "name": "Prof. James Miller",
+            "courses": ["CS302: Hypothesis Testing using t-test"],
+            "educational_background": "PhD in Biostatistics, Johns Hopkins University; MS in Applied Statistics, Columbia University",
+            "email": "j.miller@university.edu",
+            "office_hours": "Thursday 3-6 PM"
+        },
+        {
+            "name": "Dr. Maria Garcia",
+            "courses": ["CS303: Feature Engineering with R"],
+            "educational_background": "PhD in Statistical Computing, University of Texas at Austin; BS in Mathematics, Rice University",
+            "email": "m.garcia@university.edu",
+            "office_hours": "Tuesday & Friday 10 AM-12 PM"
+        }
+    ]
+}
+
+
+CatalogData = Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, List[Dict[str, Any]]]]
+
+
+def load_catalog_data(path: Optional[str]) -> CatalogData:
+    """(majors, faculty) from a catalog file, or the built-in catalog if there is none"""
+    if path:
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            return data["majors"], data["faculty"]
+        except FileNotFoundError:
+            pass
+    return json.loads(json.dumps(MAJORS_DATA)), json.loads(json.dumps(FACULTY_DATA))
+
+
+def save_catalog_data(path: str, majors: Dict[str, List[Dict[str, Any]]], faculty: Dict[str, List[Dict[str, Any]]]):
+    """Write a catalog file atomically"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"majors": majors, "faculty": faculty}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def iter_records(path: str, fmt: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Stream rows from a CSV or JSON-lines file (format taken from the extension by default)"""
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class RecordWriter:
+    """Stream rows to a CSV or JSON-lines file, one row at a time"""
+
+    def __init__(self, f, fields: List[str], fmt: str = "csv"):
+        self.fmt = fmt
+        self.fields = fields
+        self.f = f
+        if fmt == "csv":
+            self._csv = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            self._csv.writeheader()
+
+    def write(self, row: Dict[str, Any]):
+        if self.fmt == "csv":
+            self._csv.writerow(row)
+        else:
+            self.f.write(json.dumps({field: row.get(field) for field in self.fields}) + "\n")
+
+
+def course_from_record(record: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """(major, course) from a flat CSV row or a JSON-lines course object"""
+    faculty = record.get("faculty")
+    if not isinstance(faculty, dict):
+        faculty = {
+            "name": record.get("faculty_name") or faculty or "",
+            "email": record.get("faculty_email", ""),
+            "office_hours": record.get("faculty_office_hours", ""),
+        }
+    course = {
+        "code": record["code"].strip(),
+        "name": record["name"].strip(),
+        "description": record.get("description", "").strip(),
+        "credits": int(record.get("credits") or 0),
+        "faculty": faculty,
+    }
+    if record.get("capacity") not in (None, ""):
+        course["capacity"] = int(record["capacity"])
+    return record["major"].strip(), course
+
+
+def faculty_from_record(record: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """(major, faculty member) from a flat CSV row or a JSON-lines object"""
+    courses = record.get("courses") or []
+    if isinstance(courses, str):
+        courses = [course.strip() for course in courses.split(";") if course.strip()]
+    return record["major"].strip(), {
+        "name": record["name"].strip(),
+        "courses": courses,
+        "educational_background": record.get("educational_background", ""),
+        "email": record.get("email", ""),
+        "office_hours": record.get("office_hours", ""),
+    }
+
+
+class CatalogEditor:
+    """Working copy of catalog data keyed by course code and faculty name, for O(1) upserts"""
+
+    def __init__(self, majors: Dict[str, List[Dict[str, Any]]], faculty: Dict[str, List[Dict[str, Any]]]):
+        self._courses = {major: {course["code"]: course for course in courses} for major, courses in majors.items()}
+        self._faculty = {major: {member["name"]: member for member in members} for major, members in faculty.items()}
+        self._course_majors = {code: major for major, courses in self._courses.items() for code in courses}
+        self._faculty_majors = {name: major for major, members in self._faculty.items() for name in members}
+
+    @staticmethod
+    def _upsert(entries, majors, major: str, key: str, entry: Dict[str, Any]) -> bool:
+        previous_major = majors.get(key)
+        if previous_major == major and entries[major][key] == entry:
+            return False
+        if previous_major is not None and previous_major != major:
+            del entries[previous_major][key]
+        entries.setdefault(major, {})[key] = entry
+        majors[key] = major
+        return True
+
+    def upsert_course(self, major: str, course: Dict[str, Any]) -> bool:
+        """Add or replace a course (moving it if its major changed); True if anything changed"""
+        return self._upsert(self._courses, self._course_majors, major, course["code"], course)
+
+    def upsert_faculty(self, major: str, member: Dict[str, Any]) -> bool:
+        return self._upsert(self._faculty, self._faculty_majors, major, member["name"], member)
+
+    def data(self) -> CatalogData:
+        majors = {major: list(courses.values()) for major, courses in self._courses.items() if courses}
+        faculty = {major: list(members.values()) for major, members in self._faculty.items() if members}
+        return majors, faculty
@@ -0,0 +1,91 @@
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton: finds every occurrence of many patterns in one pass"""
+
+    def __init__(self, patterns: Iterable[Tuple[str, Any]]):
+        # Node i: transitions in _goto[i], failure link in _fail[i], and the
+        # values of patterns ending here (including via failure links) in _out[i]
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Any]] = [[]]
+        for pattern, value in patterns:
+            if pattern:
+                self._add(pattern, value)
+        self._link()
+
+    def _add(self, pattern: str, value: Any):
+        node = 0
+        for char in pattern:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(value)
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                # Root's children fail back to the root, not to themselves
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find_values(self, text: str) -> set:
+        """Values of all patterns occurring anywhere in `text`"""
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+
+class CourseMentionMatcher:
+    """Finds catalog courses mentioned (by code or name) in free text.
+
+    Matching is case-insensitive substring matching, like the original
+    per-course `in` checks, but done in a single pass over the text. The
+    automaton is rebuilt only when `compile` sees a new catalog version.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = None
+        # Automaton and course records are swapped together as one tuple
+        self._compiled: Tuple[AhoCorasick, Tuple] = (AhoCorasick([]), ())
+
+    def compile(self, catalog):
+        if catalog.version == self.version:
+            return
+        with self._lock:
+            if catalog.version == self.version:
+                return
+            patterns = []
+            for position, course in enumerate(catalog.courses):
+                patterns.append((course.code.lower(), position))
+                patterns.append((course.name.lower(), position))
+            self._compiled = (AhoCorasick(patterns), catalog.courses)
+            self.version = catalog.version
+
+    def find(self, text: str) -> List[Dict[str, Any]]:
+        """Mentioned courses, in catalog order"""
+        automaton, courses = self._compiled
+        return [courses[position].info() for position in sorted(automaton.find_values(text.lower()))]
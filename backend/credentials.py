@@ -0,0 +1,145 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+SCHEME = "scrypt"
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def hash_password(password: str, n: int = 2 ** 14, r: int = 8, p: int = 1) -> str:
+    """scrypt hash in the form scrypt$n$r$p$salt$hash"""
+    salt = os.urandom(16)
+    digest = hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r * p, dklen=32)
+    return f"{SCHEME}${n}${r}${p}${_b64(salt)}${_b64(digest)}"
+
+
+def _parse(stored: str) -> Optional[Tuple[int, int, int, bytes, bytes]]:
+    parts = stored.split("$")
+    if len(parts) != 6 or parts[0] != SCHEME:
+        return None
+    try:
+        return int(parts[1]), int(parts[2]), int(parts[3]), base64.b64decode(parts[4]), base64.b64decode(parts[5])
+    except ValueError:
+        return None
+
+
+def is_hashed(stored: str) -> bool:
+    return _parse(stored) is not None
+
+
+def verify_password(password: str, stored: str) -> bool:
+    """Check a password against a scrypt hash, or a legacy plaintext record"""
+    parsed = _parse(stored)
+    if parsed is None:
+        return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8"))
+    n, r, p, salt, expected = parsed
+    digest = hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r * p, dklen=len(expected))
+    return hmac.compare_digest(digest, expected)
+
+
+class CredentialService:
+    """Password hashing and verification in a dedicated process pool.
+
+    scrypt costs tens of milliseconds of CPU per call, so it runs in worker
+    processes instead of the event loop or the request threadpool. The cost
+    (n, r, p) is tunable; records hashed with other parameters, and legacy
+    plaintext records, report `needs_rehash` so they can be upgraded on the
+    next successful login.
+    """
+
+    def __init__(self, workers: Optional[int] = None, n: int = 2 ** 14, r: int = 8, p: int = 1):
+        self.workers = workers or os.cpu_count() or 1
+        self.n, self.r, self.p = n, r, p
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        # Verified against when the email is unknown, so both cases cost the same
+        self._dummy_hash = hash_password("dummy-password", n, r, p)
+
+    @property
+    def dummy_hash(self) -> str:
+        return self._dummy_hash
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    # Forking a server process that is already running threads
+                    # (threadpool, journal writer, open SQLite connections) can
+                    # leave a child holding a lock nobody releases. Spawned
+                    # workers start fresh and import only this module to
+                    # unpickle the hash functions (plus the guarded uvicorn
+                    # entry script), not the app.
+                    self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def needs_rehash(self, stored: str) -> bool:
+        parsed = _parse(stored)
+        return parsed is None or parsed[:3] != (self.n, self.r, self.p)
+
+    async def hash(self, password: str) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor(), hash_password, password, self.n, self.r, self.p)
+
+    async def verify(self, password: str, stored: str) -> bool:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor(), verify_password, password, stored)
+
+    def hash_blocking(self, password: str) -> str:
+        """hash() for sync handlers; the calling thread waits while a worker process computes"""
+        return self._executor().submit(hash_password, password, self.n, self.r, self.p).result()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+class LoginRateLimiter:
+    """Login attempt limit per email over a sliding window.
+
+    `attempt(email)` counts an attempt before its password is checked, so
+    concurrent guesses cannot all pass the limit before the first failure
+    is recorded. After `max_failures` attempts within `window` seconds
+    further ones are refused until the oldest ages out; a successful login
+    (`reset`) clears the email's history. At most `max_tracked` emails are
+    remembered, the least recently tried being dropped first.
+    """
+
+    def __init__(self, max_failures: int = 5, window: float = 300, max_tracked: int = 100000):
+        self.max_failures = max_failures
+        self.window = window
+        self.max_tracked = max_tracked
+        self._attempts: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def attempt(self, email: str) -> float:
+        """Count an attempt for `email`; returns 0 if it may go ahead, else seconds until it may"""
+        now = time.monotonic()
+        with self._lock:
+            attempts = self._attempts.get(email)
+            if attempts is None:
+                if len(self._attempts) >= self.max_tracked:
+                    self._attempts.popitem(last=False)
+                attempts = self._attempts[email] = []
+            else:
+                self._attempts.move_to_end(email)
+                attempts[:] = [t for t in attempts if now - t < self.window]
+            if len(attempts) >= self.max_failures:
+                return self.window - (now - attempts[0])
+            attempts.append(now)
+            return 0
+
+    def reset(self, email: str):
+        with self._lock:
+            self._attempts.pop(email, None)
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # no flock on this platform; processes may compact concurrently
+    fcntl = None
+
+
+def embedding_key(model: str, text: str) -> str:
+    """Content hash identifying an embedding: model name plus embedded text"""
+    return hashlib.sha256(f"{model}\n{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Content-addressed on-disk embedding cache.
+
+    Every save() appends one segment: a float32 .npy matrix of the new vectors
+    (memory-mapped on load) and a JSON list with each row's content hash,
+    renamed into place last so a segment is only visible once complete. A
+    save therefore writes only the new rows. Once more than `compact_after`
+    segments have accumulated, the saving process merges them into one.
+    Unchanged course texts are served straight from the files; only new or
+    edited texts need the API.
+    """
+
+    SEGMENT_PREFIX = "segment-"
+    KEYS_SUFFIX = ".keys.json"
+    LOCK_FILE = "compact.lock"
+
+    def __init__(self, directory: str, model: str, compact_after: int = 32):
+        self.directory = directory
+        self.model = model
+        self.compact_after = compact_after
+        self._lock = threading.Lock()
+        # Content hash -> (segment matrix, row); replaced as a whole on load
+        self._rows: Dict[str, Tuple[np.ndarray, int]] = {}
+        self._segment_files: List[Tuple[str, ...]] = []
+        self._pending: Dict[str, np.ndarray] = {}
+        self.hits = 0
+        self.misses = 0
+        self._loaded_mtime = None
+        self._load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _read_segments(self) -> Iterable[Tuple[Tuple[str, ...], np.ndarray, List[str]]]:
+        for name in sorted(os.listdir(self.directory)):
+            if not (name.startswith(self.SEGMENT_PREFIX) and name.endswith(self.KEYS_SUFFIX)):
+                continue
+            base = self._path(name[:-len(self.KEYS_SUFFIX)])
+            with open(base + self.KEYS_SUFFIX, "r") as f:
+                keys = json.load(f)
+            yield (base + self.KEYS_SUFFIX, base + ".npy"), np.load(base + ".npy", mmap_mode="r"), keys
+
+    def _load(self):
+        for _ in range(3):
+            try:
+                mtime = os.stat(self.directory).st_mtime_ns
+                rows, segment_files = {}, []
+                for files, matrix, keys in self._read_segments():
+                    if matrix.ndim != 2 or len(matrix) != len(keys):
+                        print(f"Ignoring inconsistent embedding cache segment {files[0]}")
+                        continue
+                    segment_files.append(files)
+                    rows.update((key, (matrix, row)) for row, key in enumerate(keys))
+            except FileNotFoundError:
+                # Another process compacted while we listed; its merged segment is there now
+                continue
+            except (ValueError, OSError):
+                return
+            self._rows = rows
+            self._segment_files = segment_files
+            self._loaded_mtime = mtime
+            return
+
+    def refresh(self):
+        """Pick up segments saved by another process (e.g. manage.py embed) since loading"""
+        try:
+            mtime = os.stat(self.directory).st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._loaded_mtime:
+            with self._lock:
+                self._load()
+
+    def __len__(self) -> int:
+        return len(self._rows) + len(self._pending)
+
+    def key(self, text: str) -> str:
+        return embedding_key(self.model, text)
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Return the cached vector for `text`, or None on a miss"""
+        key = self.key(text)
+        vector = self._pending.get(key)
+        if vector is None:
+            location = self._rows.get(key)
+            if location is not None:
+                matrix, row = location
+                vector = np.asarray(matrix[row], dtype=np.float32)
+        if vector is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return vector
+
+    def put(self, text: str, vector: Iterable[float]):
+        """Add a vector; call save() to persist pending entries"""
+        with self._lock:
+            self._pending[self.key(text)] = np.asarray(vector, dtype=np.float32)
+
+    def _write_segment(self, keys: List[str], matrix: np.ndarray):
+        base = self._path(f"{self.SEGMENT_PREFIX}{time.time_ns():020d}-{os.getpid()}")
+        with open(f"{base}.npy.tmp", "wb") as f:
+            np.save(f, matrix)
+        with open(f"{base}{self.KEYS_SUFFIX}.tmp", "w") as f:
+            json.dump(keys, f)
+        # Matrix first: a visible keys file always has its rows on disk
+        os.replace(f"{base}.npy.tmp", f"{base}.npy")
+        os.replace(f"{base}{self.KEYS_SUFFIX}.tmp", base + self.KEYS_SUFFIX)
+
+    def save(self):
+        """Write pending vectors as a new segment, compacting when segments pile up"""
+        with self._lock:
+            pending = {k: v for k, v in self._pending.items() if k not in self._rows}
+            self._pending.clear()
+            if not pending:
+                return
+            new_rows = np.stack(list(pending.values()))
+            if self._rows:
+                matrix, _ = next(iter(self._rows.values()))
+                if matrix.shape[1] != new_rows.shape[1]:
+                    raise ValueError("Embedding dimension does not match the existing cache")
+            os.makedirs(self.directory, exist_ok=True)
+            self._write_segment(list(pending), new_rows)
+            self._load()
+            if len(self._segment_files) > self.compact_after:
+                self._compact()
+
+    def _compact(self):
+        # One compacting process at a time; the others keep appending segments
+        with open(self._path(self.LOCK_FILE), "a") as lock:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return
+            self._load()
+            merged = self._segment_files
+            keys = list(self._rows)
+            self._write_segment(keys, np.stack([matrix[row] for matrix, row in self._rows.values()]))
+            # Keys file first, so a half-removed segment is never read
+            for files in merged:
+                for path in files:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+            self._load()
@@ -0,0 +1,105 @@
+import hashlib
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from types import SimpleNamespace
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+# Model used for course and query embeddings (the server and the CLI share it)
+EMBEDDING_MODEL = "text-embedding-ada-002"
+
+
+class FakeEmbeddingClient:
+    """Offline stand-in for the OpenAI client's embeddings API.
+
+    Returns deterministic pseudo-random vectors per text and can simulate
+    rate limiting on the first `rate_limit_failures` calls.
+    """
+
+    def __init__(self, dimensions: int = 1536, latency: float = 0.0, rate_limit_failures: int = 0):
+        self.dimensions = dimensions
+        self.latency = latency
+        self.rate_limit_failures = rate_limit_failures
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.embeddings = SimpleNamespace(create=self._create)
+
+    def vector(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:4], "little")
+        return np.random.default_rng(seed).normal(size=self.dimensions).astype(np.float32).tolist()
+
+    def _create(self, model: str, input, **kwargs):
+        with self._lock:
+            self.calls += 1
+            fail = self.calls <= self.rate_limit_failures
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise RuntimeError("Rate limit reached for requests (fake client)")
+        texts = [input] if isinstance(input, str) else list(input)
+        data = [SimpleNamespace(index=i, embedding=self.vector(text)) for i, text in enumerate(texts)]
+        return SimpleNamespace(data=data, model=model)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True for HTTP 429 / rate-limit errors from the embedding API"""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    return "rate limit" in str(error).lower()
+
+
+def print_batch_progress(done: int, total: int, batch_size: int, seconds: float):
+    print(f"Embedded batch {done}/{total} ({batch_size} texts) in {seconds:.2f}s")
+
+
+def embed_texts(
+    client,
+    texts: Sequence[str],
+    model: str,
+    batch_size: int = 100,
+    max_concurrency: int = 4,
+    max_retries: int = 5,
+    base_delay: float = 1.0,
+    progress: Optional[Callable[[int, int, int, float], None]] = print_batch_progress,
+) -> List[Optional[List[float]]]:
+    """Embed texts with multi-input requests, a bounded number in flight at once.
+
+    Rate-limited batches are retried with exponential backoff and jitter.
+    The result is aligned with `texts`; entries of batches that ultimately
+    failed are None.
+    """
+    results: List[Optional[List[float]]] = [None] * len(texts)
+    if not texts:
+        return results
+    batches = [(start, texts[start:start + batch_size]) for start in range(0, len(texts), batch_size)]
+
+    def run_batch(start: int, batch: Sequence[str]) -> float:
+        began = time.perf_counter()
+        for attempt in range(max_retries + 1):
+            try:
+                response = client.embeddings.create(model=model, input=list(batch))
+                break
+            except Exception as e:
+                if attempt == max_retries or not is_rate_limit_error(e):
+                    raise
+                time.sleep(base_delay * (2 ** attempt) * (0.5 + random.random() / 2))
+        for item in response.data:
+            results[start + item.index] = item.embedding
+        return time.perf_counter() - began
+
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+        futures = {executor.submit(run_batch, start, batch): batch for start, batch in batches}
+        for future in as_completed(futures):
+            done += 1
+            try:
+                seconds = future.result()
+            except Exception as e:
+                print(f"Error generating embeddings for batch of {len(futures[future])}: {e}")
+                continue
+            if progress:
+                progress(done, len(batches), len(futures[future]), seconds)
+    return results
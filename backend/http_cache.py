@@ -0,0 +1,48 @@
+import hashlib
+import json
+from typing import Any
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+
+def dumps(payload: Any) -> bytes:
+    """Serialize to compact JSON bytes, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class CachedJSON:
+    """A JSON response body serialized once, with a strong ETag"""
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, payload: Any):
+        self.body = dumps(payload)
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+
+    def matches(self, if_none_match: str) -> bool:
+        """True if an If-None-Match header value matches this body's ETag"""
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag == "*" or tag == self.etag or tag == f"W/{self.etag}":
+                return True
+        return False
+
+
+def cached_json_response(request: Request, cached: CachedJSON, max_age: int) -> Response:
+    """Serve pre-serialized JSON, or 304 Not Modified when the client's copy is current"""
+    headers = {
+        "ETag": cached.etag,
+        "Cache-Control": f"public, max-age={max_age}, must-revalidate",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and cached.matches(if_none_match):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
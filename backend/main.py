@@ -1,34 +1,130 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, EmailStr
 import os
-import numpy as np
+import hmac
 import json
 import uuid
 import re
-from typing import List, Dict, Any
-from openai import OpenAI
+import time
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import httpx
+from openai import OpenAI, AsyncOpenAI
+from user_store import UserStore, create_user_backend
+from similarity import EmbeddingIndex, QuantizedIndex, unit_vector
+from embedding_cache import EmbeddingCache
+from shared_index import SharedIndexStore, index_key
+from ann_index import IVFIndex
+from embedding_pipeline import EMBEDDING_MODEL, embed_texts, print_batch_progress
+from assistant_prompt import CatalogPrompt
+from summary_cache import ComputeCache, SummaryCache, cache_key, summary_key
+from course_matcher import CourseMentionMatcher
+from search_index import SearchIndex
+from catalog import Catalog
+from catalog_store import load_catalog_data
+from http_cache import cached_json_response
+from selection_store import SelectionError, create_selection_store
+from registration_engine import RegistrationEngine, RegistrationError, SqliteRegistrationEngine
+from credentials import CredentialService, LoginRateLimiter
+from sessions import FileRevocationList, Session, SessionError, SessionManager, SqliteRevocationList, load_or_create_secret
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, MetricsRegistry
 
 app = FastAPI()
 
+# Latency per route plus timed spans around upstream, storage and index calls,
+# served in Prometheus text format at /metrics (per worker process)
+metrics = MetricsRegistry()
+app.add_middleware(MetricsMiddleware, registry=metrics)
 
-# In-memory storage for course embeddings
-course_embeddings = {}
 
-# In-memory storage for selected courses
-selected_courses = []
+# Normalized float32 matrix of course embeddings, rebuilt after precompute
+embedding_index = EmbeddingIndex.build([], [])
+
+# Approximate nearest-neighbour index over the same vectors for /search;
+# SEARCH_NPROBE clusters are scanned per query (higher = better recall, slower);
+# SEARCH_INDEX_DTYPE "float16" halves the memory of its copy of the vectors
+SEARCH_NPROBE = int(os.getenv("SEARCH_NPROBE", "8"))
+SEARCH_INDEX_DTYPE = os.getenv("SEARCH_INDEX_DTYPE", "float32")
+ann_index = IVFIndex([], embedding_index.matrix, nprobe=SEARCH_NPROBE, dtype=SEARCH_INDEX_DTYPE)
+
+# Embedding warm-up progress, reported by /health and /ready
+warmup_state = {
+    "status": "pending",  # pending -> running -> ready | failed, or disabled without an API key
+    "total_courses": 0,
+    "embedded_courses": 0,
+    "started_at": None,
+    "finished_at": None,
+    "error": None,
+}
+
+# Seconds clients are asked to wait before retrying /recommend during warm-up
+WARMUP_RETRY_AFTER = 5
+
+# Assistant system prompt, compiled once per catalog version
+catalog_prompt = CatalogPrompt()
+
+# Finds courses mentioned in assistant responses, built once per catalog version
+course_matcher = CourseMentionMatcher()
+
+# BM25 keyword index used when the LLM is unavailable
+search_index = SearchIndex()
+FALLBACK_SEARCH_RESULTS = 10
+
+# "full" sends the whole catalog to the assistant; "retrieval" sends only the
+# ASSISTANT_CONTEXT_COURSES courses most similar to the question
+ASSISTANT_CONTEXT_MODE = os.getenv("ASSISTANT_CONTEXT_MODE", "full")
+ASSISTANT_CONTEXT_COURSES = int(os.getenv("ASSISTANT_CONTEXT_COURSES", "5"))
+
+# Cache of generated course summaries keyed by hash of description, model and
+# parameters; set SUMMARY_CACHE_FILE to keep it across restarts
+summary_cache = SummaryCache(
+    max_entries=int(os.getenv("SUMMARY_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("SUMMARY_CACHE_TTL", str(7 * 24 * 3600))),
+    path=os.getenv("SUMMARY_CACHE_FILE") or None,
+)
+
+# Seconds browsers and CDNs may reuse catalog responses before revalidating via ETag
+CATALOG_CACHE_MAX_AGE = int(os.getenv("CATALOG_CACHE_MAX_AGE", "300"))
+
+# Default and maximum number of recommendations per request
+DEFAULT_RECOMMENDATIONS = 3
+MAX_RECOMMENDATIONS = 50
+DEFAULT_SEARCH_RESULTS = 10
+
+# Embeddings of recent /search queries (LRU + TTL, concurrent misses share one call)
+query_embedding_cache = ComputeCache(
+    max_entries=int(os.getenv("SEARCH_QUERY_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("SEARCH_QUERY_CACHE_TTL", str(24 * 3600))),
+)
+
+# Per-user selected courses; "sqlite" shares selections across uvicorn workers
+SELECTION_STORE_BACKEND = os.getenv("SELECTION_STORE_BACKEND", "memory")
+selection_store = create_selection_store(SELECTION_STORE_BACKEND, os.getenv("SELECTIONS_DB", "selections.db"))
+
+# Selections made without a uid (older clients) are kept under this key
+ANONYMOUS_SELECTION_KEY = "anonymous"
+
+# Seats per course when the catalog entry has no "capacity"
+DEFAULT_COURSE_CAPACITY = int(os.getenv("DEFAULT_COURSE_CAPACITY", "100"))
 
 # Request model for chatbot
 class ChatRequest(BaseModel):
     question: str
+    stream: bool = False  # Stream the answer as Server-Sent Events
 
 # Request model for course summarization
 class SummarizeRequest(BaseModel):
     course_description: str
+    stream: bool = False  # Stream the summary as Server-Sent Events
 
 # Request model for course selection
 class CourseSelectionRequest(BaseModel):
     course_code: str
+    uid: Optional[str] = None
 
 # Authentication models
 class SignUpRequest(BaseModel):
@@ -69,36 +165,103 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 # Configure OpenAI
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+# Async client for request-path LLM calls so slow completions don't hold
+# threadpool workers. Connections are pooled, each call has a timeout and
+# at most LLM_MAX_CONCURRENCY calls are in flight per process.
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "64"))
+async_client = AsyncOpenAI(
+    api_key=os.getenv("OPENAI_API_KEY"),
+    timeout=LLM_TIMEOUT,
+    max_retries=1,
+    http_client=httpx.AsyncClient(
+        timeout=LLM_TIMEOUT,
+        limits=httpx.Limits(max_connections=LLM_MAX_CONCURRENCY, max_keepalive_connections=LLM_MAX_CONCURRENCY),
+    ),
+)
+llm_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+# On-disk embedding cache keyed by hash of model name + embedded text
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "embedding_cache")
+embedding_cache = EmbeddingCache(EMBEDDING_CACHE_DIR, EMBEDDING_MODEL)
+
+# With several workers, one builds the normalized course matrix and publishes it
+# next to the cache; every worker memory-maps that file instead of keeping a copy
+SHARED_EMBEDDING_INDEX = os.getenv("SHARED_EMBEDDING_INDEX", "1") == "1"
+shared_index_store = SharedIndexStore(EMBEDDING_CACHE_DIR) if SHARED_EMBEDDING_INDEX else None
+
+# Scan a compact "float16" or "int8" copy of the matrix ("none" scans float32);
+# the best k * EMBEDDING_RERANK candidates are re-scored at full precision
+EMBEDDING_QUANTIZATION = os.getenv("EMBEDDING_QUANTIZATION", "none")
+EMBEDDING_RERANK = int(os.getenv("EMBEDDING_RERANK", "4"))
+
+# Texts per embedding request and number of requests in flight during precompute
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+
 # Functions for course recommendation system
-def get_embedding(text: str):
-    """Generate embedding for a given text using OpenAI's embedding model"""
+async def get_embedding_async(text: str):
+    """Generate an embedding on the request path without blocking the event loop"""
     try:
-        response = client.embeddings.create(
-            model="text-embedding-ada-002",
-            input=text
-        )
+        async with llm_semaphore:
+            with metrics.span("llm_embedding"):
+                response = await async_client.embeddings.create(model=EMBEDDING_MODEL, input=text)
         return response.data[0].embedding
     except Exception as e:
         print(f"Error generating embedding: {e}")
         return None
 
-def cosine_similarity(vec1, vec2):
-    """Calculate cosine similarity between two vectors"""
-    vec1 = np.array(vec1)
-    vec2 = np.array(vec2)
-    dot_product = np.dot(vec1, vec2)
-    norm_vec1 = np.linalg.norm(vec1)
-    norm_vec2 = np.linalg.norm(vec2)
-    
-    if norm_vec1 == 0 or norm_vec2 == 0:
-        return 0
-    
-    return dot_product / (norm_vec1 * norm_vec2)
+async def create_chat_completion(**kwargs):
+    """Chat completion through the pooled async client, bounded by llm_semaphore"""
+    async with llm_semaphore:
+        with metrics.span("llm_chat"):
+            return await async_client.chat.completions.create(**kwargs)
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Encode one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def stream_chat_completion(final_event, fallback=None, **kwargs) -> StreamingResponse:
+    """Stream a chat completion as Server-Sent Events.
+
+    Emits a `token` event per content delta and a final `done` event built by
+    `final_event(full_text)`. If the upstream call fails before any token was
+    sent, `fallback()` (when given) is sent as the `done` payload instead of
+    an `error` event. Starlette cancels the generator when the client
+    disconnects, which closes the upstream stream.
+    """
+    async def events():
+        parts = []
+        try:
+            async with llm_semaphore:
+                # Timed until the stream opens; tokens then arrive as they are generated
+                with metrics.span("llm_chat_stream"):
+                    stream = await async_client.chat.completions.create(stream=True, **kwargs)
+                async with stream:
+                    async for chunk in stream:
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            parts.append(delta)
+                            yield format_sse("token", {"content": delta})
+        except Exception as e:
+            if parts or fallback is None:
+                yield format_sse("error", {"detail": str(e)})
+            else:
+                yield format_sse("done", fallback())
+            return
+        yield format_sse("done", final_event("".join(parts).strip()))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 def get_course_limit():
     """Get the maximum course limit for a student"""
@@ -106,19 +269,59 @@ def get_course_limit():
 
 # User management utilities
 USERS_FILE = "users.json"
+USERS_DB = os.getenv("USERS_DB", "users.db")
+# "json" keeps the original users.json file, "sqlite" uses USERS_DB (WAL mode)
+USER_STORE_BACKEND = os.getenv("USER_STORE_BACKEND", "json")
+
+# Append-only journal for the "json" backend: signups and registration updates
+# are group-committed here and folded into USERS_FILE every
+# USERS_JOURNAL_COMPACT_AFTER records; set USERS_JOURNAL="" to rewrite
+# USERS_FILE on every write instead
+USERS_JOURNAL = os.getenv("USERS_JOURNAL", "users.journal") or None
+USERS_JOURNAL_COMPACT_AFTER = int(os.getenv("USERS_JOURNAL_COMPACT_AFTER", "10000"))
+
+# Password hashing (scrypt) runs in a process pool; raise PASSWORD_SCRYPT_N to
+# make hashes more expensive to crack (and each login more expensive to serve)
+credential_service = CredentialService(
+    workers=int(os.getenv("PASSWORD_HASH_WORKERS", "0")) or None,
+    n=int(os.getenv("PASSWORD_SCRYPT_N", str(2 ** 14))),
+    r=int(os.getenv("PASSWORD_SCRYPT_R", "8")),
+    p=int(os.getenv("PASSWORD_SCRYPT_P", "1")),
+)
+
+# Login attempts allowed per email within LOGIN_FAILURE_WINDOW seconds; a success clears them
+login_rate_limiter = LoginRateLimiter(
+    max_failures=int(os.getenv("LOGIN_MAX_FAILURES", "5")),
+    window=float(os.getenv("LOGIN_FAILURE_WINDOW", "300")),
+)
+
+# Indexed user repository on top of the configured storage backend
+user_store = UserStore(create_user_backend(
+    USER_STORE_BACKEND, USERS_FILE, USERS_DB, USERS_JOURNAL, USERS_JOURNAL_COMPACT_AFTER
+))
+
+# Signed session tokens issued by /login; the signing key comes from
+# SESSION_SECRET or is generated once into SESSION_KEY_FILE for all workers.
+# Logouts are recorded in USERS_DB with the sqlite store (seen by every
+# worker), else in SESSION_REVOCATIONS_FILE
+SESSION_SECRET = os.getenv("SESSION_SECRET")
+session_manager = SessionManager(
+    SESSION_SECRET.encode("utf-8") if SESSION_SECRET else load_or_create_secret(os.getenv("SESSION_KEY_FILE", "session.key")),
+    ttl=float(os.getenv("SESSION_TTL", str(7 * 24 * 3600))),
+    cache_size=int(os.getenv("SESSION_CACHE_SIZE", "10000")),
+    revocations=SqliteRevocationList(user_store.backend) if user_store.backend.shared
+        else FileRevocationList(os.getenv("SESSION_REVOCATIONS_FILE", "sessions.revoked")),
+)
 
 def load_users() -> List[Dict[str, Any]]:
-    """Load users from JSON file"""
-    try:
-        with open(USERS_FILE, "r") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
+    """Load users from the user store"""
+    with metrics.span("users_read"):
+        return user_store.all()
 
 def save_users(users: List[Dict[str, Any]]):
-    """Save users to JSON file"""
-    with open(USERS_FILE, "w") as f:
-        json.dump(users, f, indent=2)
+    """Replace all users in the user store"""
+    with metrics.span("users_write"):
+        user_store.replace_all(users)
 
 def validate_email(email: str) -> bool:
     """Validate email format using regex"""
@@ -127,29 +330,41 @@ def validate_email(email: str) -> bool:
 
 def find_user_by_email(email: str) -> Dict[str, Any] or None:
     """Find user by email"""
-    users = load_users()
-    for user in users:
-        if user["email"] == email:
-            return user
-    return None
+    with metrics.span("users_read"):
+        return user_store.get_by_email(email)
 
 def find_user_by_uid(uid: str) -> Dict[str, Any] or None:
     """Find user by UID"""
-    users = load_users()
-    for user in users:
-        if user["uid"] == uid:
-            return user
-    return None
+    with metrics.span("users_read"):
+        return user_store.get_by_uid(uid)
+
+def current_session(authorization: Optional[str] = Header(None)) -> Optional[Session]:
+    """Session from an "Authorization: Bearer <token>" header; None when there is no header"""
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        raise HTTPException(status_code=401, detail="Invalid authorization header", headers={"WWW-Authenticate": "Bearer"})
+    try:
+        return session_manager.verify(token.strip())
+    except SessionError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"WWW-Authenticate": "Bearer"})
+
+def require_session(session: Optional[Session] = Depends(current_session)) -> Session:
+    """Session for endpoints acting on a user's own data; a bare uid is not enough"""
+    if session is None:
+        raise HTTPException(status_code=401, detail="Not logged in", headers={"WWW-Authenticate": "Bearer"})
+    return session
+
+def authorize_uid(uid: str, session: Session):
+    """A session may only act on its own user"""
+    if session.uid != uid:
+        raise HTTPException(status_code=403, detail="Session does not belong to this user")
 
 def update_user_registrations(uid: str, registered_courses: List[Dict[str, Any]]) -> bool:
     """Update user's registered courses"""
-    users = load_users()
-    for user in users:
-        if user["uid"] == uid:
-            user["registered_courses"] = registered_courses
-            save_users(users)
-            return True
-    return False
+    with metrics.span("users_write"):
+        return user_store.set_registrations(uid, registered_courses)
 
 def get_user_registrations(uid: str) -> List[Dict[str, Any]]:
     """Get user's registered courses"""
@@ -158,225 +373,415 @@ def get_user_registrations(uid: str) -> List[Dict[str, Any]]:
         return user["registered_courses"]
     return []
 
+def embed_courses(course_texts: Dict[str, str], progress=None) -> Dict[str, List[float]]:
+    """Embeddings for {course code: text}, from the cache first and the API for the rest.
+
+    `progress(embedded, total)` is called after the cache lookup and after each
+    API batch. Courses that failed to embed are missing from the result.
+    """
+    embeddings = {}
+    missing = []
+    for course_code, text_to_embed in course_texts.items():
+        embedding = embedding_cache.get(text_to_embed)
+        if embedding is not None:
+            embeddings[course_code] = embedding
+        else:
+            missing.append(course_code)
+    embedded = len(embeddings)
+    if progress:
+        progress(embedded, len(course_texts))
+
+    def report_progress(done, total, batch_size, seconds):
+        nonlocal embedded
+        metrics.observe_span("llm_embedding_batch", seconds)
+        embedded += batch_size
+        if progress:
+            progress(embedded, len(course_texts))
+        print_batch_progress(done, total, batch_size, seconds)
+
+    # Only new or edited course texts go to the API, in concurrent multi-input batches
+    if missing:
+        vectors = embed_texts(
+            client,
+            [course_texts[code] for code in missing],
+            model=EMBEDDING_MODEL,
+            batch_size=EMBEDDING_BATCH_SIZE,
+            max_concurrency=EMBEDDING_CONCURRENCY,
+            progress=report_progress,
+        )
+        for course_code, embedding in zip(missing, vectors):
+            if embedding:
+                embeddings[course_code] = embedding
+                embedding_cache.put(course_texts[course_code], embedding)
+
+    try:
+        embedding_cache.save()
+    except Exception as e:
+        print(f"Error saving embedding cache: {e}")
+    print(f"Embedded {len(embeddings)} courses ({len(course_texts) - len(missing)} from cache)")
+    return embeddings
+
+def embed_catalog_courses():
+    """Embed every catalog course (cache first, then the API) and build the index.
+
+    Returns (index, complete); complete is False if some courses failed to embed.
+    """
+    course_texts = {course.code: course.embedding_text for course in catalog.courses}
+    warmup_state["total_courses"] = len(course_texts)
+
+    def report_progress(embedded, total):
+        warmup_state["embedded_courses"] = embedded
+
+    embeddings = embed_courses(course_texts, report_progress)
+    codes = [code for code in course_texts if code in embeddings]
+    index = EmbeddingIndex.build(codes, (embeddings[code] for code in codes))
+    return index, len(codes) == len(course_texts)
+
 def precompute_course_embeddings():
     """Precompute embeddings for all course descriptions"""
+    global embedding_index, ann_index
     print("Precomputing course embeddings...")
-    for major, courses in MAJORS_DATA.items():
-        for course in courses:
-            course_code = course["code"]
-            # Combine course name and description for richer embeddings
-            text_to_embed = f"{course['name']} - {course['description']}"
-            embedding = get_embedding(text_to_embed)
-            if embedding:
-                course_embeddings[course_code] = {
-                    "embedding": embedding,
-                    "course_info": {
-                        "code": course_code,
-                        "name": course["name"],
-                        "description": course["description"],
-                        "major": major,
-                        "credits": course["credits"],
-                        "faculty": course["faculty"]["name"]
-                    }
-                }
-    print(f"Precomputed embeddings for {len(course_embeddings)} courses")
-
-MAJORS_DATA = {
-    "Applied Machine Learning": [
-        {"code": "CS101", "name": "Probability and Statistics", "description": "Introduction to probability theory and statistical methods for data analysis", "credits": 3, "faculty": {"name": "Dr. Sarah Johnson", "email": "s.johnson@university.edu", "office_hours": "Monday & Wednesday 2-4 PM"}},
-        {"code": "CS102", "name": "Data Visualization using R", "description": "Learn to create compelling visualizations using R programming language", "credits": 3, "faculty": {"name": "Prof. Michael Chen", "email": "m.chen@university.edu", "office_hours": "Tuesday & Thursday 10-12 PM"}},
-        {"code": "CS103", "name": "Model Building with Regression Algorithms", "description": "Advanced techniques for building predictive models using various regression methods", "credits": 4, "faculty": {"name": "Dr. Emily Rodriguez", "email": "e.rodriguez@university.edu", "office_hours": "Friday 1-4 PM"}}
-    ],
-    "Deep Learning": [
-        {"code": "CS201", "name": "Neural Network Basics", "description": "Fundamentals of neural networks including perceptrons, backpropagation, and optimization", "credits": 4, "faculty": {"name": "Prof. David Kim", "email": "d.kim@university.edu", "office_hours": "Monday & Friday 9-11 AM"}},
-        {"code": "CS202", "name": "Transformers and Attention", "description": "Modern transformer architectures and attention mechanisms for NLP and computer vision", "credits": 4, "faculty": {"name": "Dr. Lisa Wang", "email": "l.wang@university.edu", "office_hours": "Wednesday 2-5 PM"}},
-        {"code": "CS203", "name": "Generative AI with Python", "description": "Hands-on experience with generative models including GANs, VAEs, and large language models", "credits": 3, "faculty": {"name": "Prof. Alex Thompson", "email": "a.thompson@university.edu", "office_hours": "Tuesday & Thursday 1-3 PM"}}
-    ],
-    "Data Science": [
-        {"code": "CS301", "name": "Data Mining", "description": "Techniques for discovering patterns in large datasets using clustering, classification, and association rules", "credits": 3, "faculty": {"name": "Dr. Rachel Green", "email": "r.green@university.edu", "office_hours": "Monday & Wednesday 11 AM-1 PM"}},
-        {"code": "CS302", "name": "Hypothesis Testing using t-test", "description": "Statistical hypothesis testing methods with focus on t-tests and their applications", "credits": 2, "faculty": {"name": "Prof. James Miller", "email": "j.miller@university.edu", "office_hours": "Thursday 3-6 PM"}},
-        {"code": "CS303", "name": "Feature Engineering with R", "description": "Advanced feature selection and engineering techniques using R for machine learning projects", "credits": 3, "faculty": {"name": "Dr. Maria Garcia", "email": "m.garcia@university.edu", "office_hours": "Tuesday & Friday 10 AM-12 PM"}}
-    ]
-}
+    started = time.perf_counter()
+    if shared_index_store is not None:
+        # One worker builds and publishes the matrix; the rest map the same file
+        key = index_key(EMBEDDING_MODEL, ((course.code, course.embedding_text) for course in catalog.courses))
+        index = shared_index_store.get_or_build(key, embed_catalog_courses)
+    else:
+        index, _ = embed_catalog_courses()
+    ann = IVFIndex(index.codes, index.matrix, nprobe=SEARCH_NPROBE, dtype=SEARCH_INDEX_DTYPE)
+    if EMBEDDING_QUANTIZATION != "none":
+        index = QuantizedIndex.from_index(index, EMBEDDING_QUANTIZATION, EMBEDDING_RERANK)
+    embedding_index, ann_index = index, ann
+    warmup_state["total_courses"] = len(catalog.courses)
+    warmup_state["embedded_courses"] = len(index)
+    print(f"Precomputed embeddings for {len(index)} courses in {time.perf_counter() - started:.2f}s")
 
-# Faculty data for each department
-FACULTY_DATA = {
-    "Applied Machine Learning": [
-        {
-            "name": "Dr. Sarah Johnson",
-            "courses": ["CS101: Probability and Statistics"],
-            "educational_background": "PhD in Statistics, Stanford University; MS in Mathematics, MIT",
-            "email": "s.johnson@university.edu",
-            "office_hours": "Monday & Wednesday 2-4 PM"
-        },
-        {
-            "name": "Prof. Michael Chen",
-            "courses": ["CS102: Data Visualization using R"],
-            "educational_background": "PhD in Computer Science, UC Berkeley; BS in Statistics, UCLA",
-            "email": "m.chen@university.edu",
-            "office_hours": "Tuesday & Thursday 10-12 PM"
-        },
-        {
-            "name": "Dr. Emily Rodriguez",
-            "courses": ["CS103: Model Building with Regression Algorithms"],
-            "educational_background": "PhD in Machine Learning, Carnegie Mellon University; MS in Applied Mathematics, Caltech",
-            "email": "e.rodriguez@university.edu",
-            "office_hours": "Friday 1-4 PM"
-        }
-    ],
-    "Deep Learning": [
-        {
-            "name": "Prof. David Kim",
-            "courses": ["CS201: Neural Network Basics"],
-            "educational_background": "PhD in Artificial Intelligence, MIT; MS in Computer Science, Stanford",
-            "email": "d.kim@university.edu",
-            "office_hours": "Monday & Friday 9-11 AM"
-        },
-        {
-            "name": "Dr. Lisa Wang",
-            "courses": ["CS202: Transformers and Attention"],
-            "educational_background": "PhD in Natural Language Processing, Google Research; MS in Computer Science, University of Washington",
-            "email": "l.wang@university.edu",
-            "office_hours": "Wednesday 2-5 PM"
-        },
-        {
-            "name": "Prof. Alex Thompson",
-            "courses": ["CS203: Generative AI with Python"],
-            "educational_background": "PhD in Machine Learning, Oxford University; BS in Computer Science, Harvard",
-            "email": "a.thompson@university.edu",
-            "office_hours": "Tuesday & Thursday 1-3 PM"
+# Immutable course/faculty records and lookup indexes built from the data above;
+# a catalog change means a new Catalog with a higher version
+# CATALOG_FILE is written by `python manage.py import-courses`; without it the
+# built-in catalog is used
+CATALOG_FILE = os.getenv("CATALOG_FILE", "catalog.json")
+
+def catalog_file_mtime() -> Optional[int]:
+    try:
+        return os.stat(CATALOG_FILE).st_mtime_ns
+    except OSError:
+        return None
+
+catalog_mtime = catalog_file_mtime()
+catalog = Catalog(*load_catalog_data(CATALOG_FILE))
+
+def record_waitlist_promotion(uid: str, course_code: str):
+    """Persist a seat freed by another student and given to a waitlisted one"""
+    course = catalog.course(course_code)
+    registered_courses = get_user_registrations(uid)
+    if course is None or any(registered.get("code") == course_code for registered in registered_courses):
+        return
+    update_user_registrations(uid, registered_courses + [course.info()])
+
+# Seat counters and waitlists for /complete-registration, seeded from saved
+# registrations at startup. With the sqlite user store they live in USERS_DB
+# and change in the same transaction as the student's registration, so all
+# workers enforce one capacity; the json store keeps them in this process,
+# which is why it runs a single worker
+course_capacities = {course.code: course.capacity or DEFAULT_COURSE_CAPACITY for course in catalog.courses}
+if user_store.backend.shared:
+    registration_engine = SqliteRegistrationEngine(
+        user_store.backend, course_capacities, on_promote=record_waitlist_promotion
+    )
+else:
+    registration_engine = RegistrationEngine(course_capacities, on_promote=record_waitlist_promotion)
+
+def compile_catalog_indexes():
+    """Build the catalog-derived prompt, matcher and search index for the current catalog"""
+    catalog_prompt.compile(catalog)
+    course_matcher.compile(catalog)
+    search_index.compile(catalog)
+
+# Catalog changes are applied without a restart: with CATALOG_RELOAD_INTERVAL > 0
+# every worker polls CATALOG_FILE that often; POST /admin/reload-catalog reloads
+# the worker serving the request and needs X-Admin-Token = CATALOG_RELOAD_TOKEN
+CATALOG_RELOAD_INTERVAL = float(os.getenv("CATALOG_RELOAD_INTERVAL", "0"))
+CATALOG_RELOAD_TOKEN = os.getenv("CATALOG_RELOAD_TOKEN", "")
+catalog_reload_lock = threading.Lock()
+
+def reload_catalog() -> Optional[Dict[str, Any]]:
+    """Load CATALOG_FILE and apply only what changed; None while embeddings are warming up.
+
+    Added or edited course texts are embedded (cache first) and patched into
+    the embedding and search indexes; unchanged vectors are reused. The new
+    catalog and index are built next to the live ones and swapped in together,
+    so requests see either the old snapshot or the new one.
+    """
+    global catalog, catalog_mtime, embedding_index, ann_index
+    with catalog_reload_lock:
+        if embeddings_warming_up():
+            return None
+        started = time.perf_counter()
+        mtime = catalog_file_mtime()
+        previous = catalog
+        updated = Catalog(*load_catalog_data(CATALOG_FILE), version=previous.version + 1, previous=previous)
+
+        # Unchanged courses are the very same records in both catalogs
+        added = [course.code for course in updated.courses if previous.course(course.code) is None]
+        removed = [course.code for course in previous.courses if updated.course(course.code) is None]
+        changed = [
+            course.code for course in updated.courses
+            if previous.course(course.code) not in (None, course)
+        ]
+        stale_texts = {
+            code: updated.course(code).embedding_text for code in added + changed
+            if code in added or previous.course(code).embedding_text != updated.course(code).embedding_text
         }
-    ],
-    "Data Science": [
-        {
-            "name": "Dr. Rachel Green",
-            "courses": ["CS301: Data Mining"],
-            "educational_background": "PhD in Data Science, University of Chicago; MS in Statistics, Northwestern University",
-            "email": "r.green@university.edu",
-            "office_hours": "Monday & Wednesday 11 AM-1 PM"
-        },
-        {
-            "name": "Prof. James Miller",
-            "courses": ["CS302: Hypothesis Testing using t-test"],
-            "educational_background": "PhD in Biostatistics, Johns Hopkins University; MS in Applied Statistics, Columbia University",
-            "email": "j.miller@university.edu",
-            "office_hours": "Thursday 3-6 PM"
-        },
-        {
-            "name": "Dr. Maria Garcia",
-            "courses": ["CS303: Feature Engineering with R"],
-            "educational_background": "PhD in Statistical Computing, University of Texas at Austin; BS in Mathematics, Rice University",
-            "email": "m.garcia@university.edu",
-            "office_hours": "Tuesday & Friday 10 AM-12 PM"
+
+        vectors = {}
+        if stale_texts and warmup_state["status"] == "ready":
+            embedding_cache.refresh()  # manage.py may have embedded them already
+            vectors = embed_courses(stale_texts)
+        dropped = removed + [code for code in stale_texts if code not in vectors]
+        # Both indexes are rebuilt off to the side; requests keep using the
+        # current ones until all three are swapped in together
+        index, ann = embedding_index, ann_index
+        if vectors or dropped:
+            index = index.with_changes(vectors, dropped)
+            ann = ann.with_changes(vectors, dropped)
+
+        embedding_index, ann_index, catalog = index, ann, updated
+        catalog_mtime = mtime
+        compile_catalog_indexes()
+        for code in added + changed:
+            if code in added or previous.course(code).capacity != updated.course(code).capacity:
+                registration_engine.set_capacity(code, updated.course(code).capacity or DEFAULT_COURSE_CAPACITY)
+        for code in removed:
+            registration_engine.remove_course(code)
+        warmup_state["total_courses"] = len(updated)
+        warmup_state["embedded_courses"] = len(index)
+
+        result = {
+            "version": updated.version,
+            "courses": len(updated),
+            "added": len(added),
+            "changed": len(changed),
+            "removed": len(removed),
+            "embedded": len(vectors),
+            "seconds": round(time.perf_counter() - started, 3),
         }
-    ]
-}
+        print(f"Reloaded catalog: {result}")
+        return result
+
+def watch_catalog_file():
+    """Reload the catalog whenever CATALOG_FILE changes"""
+    failed_mtime = None
+    while True:
+        time.sleep(CATALOG_RELOAD_INTERVAL)
+        mtime = catalog_file_mtime()
+        if mtime == catalog_mtime or mtime == failed_mtime:
+            continue
+        try:
+            reload_catalog()
+        except Exception as e:
+            # Keep serving the previous catalog until the file changes again
+            print(f"Error reloading catalog from {CATALOG_FILE}: {e}")
+            failed_mtime = mtime
+
+def run_embedding_warmup():
+    """Precompute embeddings in the background and record warm-up progress"""
+    warmup_state["status"] = "running"
+    warmup_state["started_at"] = time.time()
+    try:
+        precompute_course_embeddings()
+        warmup_state["status"] = "ready"
+    except Exception as e:
+        print(f"Error precomputing course embeddings: {e}")
+        warmup_state["status"] = "failed"
+        warmup_state["error"] = str(e)
+    finally:
+        warmup_state["finished_at"] = time.time()
+
+def embeddings_warming_up() -> bool:
+    return warmup_state["status"] in ("pending", "running")
 
-# Precompute embeddings when the server starts
+# Precompute embeddings when the server starts, in the background so the
+# server takes traffic immediately
 @app.on_event("startup")
 async def startup_event():
+    compile_catalog_indexes()
+    registration_engine.load(
+        (user["uid"], [course.get("code") for course in user.get("registered_courses", [])])
+        for user in load_users()
+    )
     if client.api_key:  # Only precompute if OpenAI API key is available
-        precompute_course_embeddings()
+        threading.Thread(target=run_embedding_warmup, name="embedding-warmup", daemon=True).start()
+    else:
+        warmup_state["status"] = "disabled"
+    if CATALOG_RELOAD_INTERVAL > 0:
+        threading.Thread(target=watch_catalog_file, name="catalog-watcher", daemon=True).start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await async_client.close()
+    user_store.close()
+    credential_service.close()
+    summary_cache.close()
+
+def cache_counts() -> Dict[str, Tuple[int, int]]:
+    """(hits, misses) per cache; lookups that waited on a concurrent miss count as hits"""
+    summaries = summary_cache.stats()
+    queries = query_embedding_cache.stats()
+    return {
+        "summary": (summaries["hits"] + summaries["coalesced"], summaries["misses"]),
+        "search_query_embedding": (queries["hits"] + queries["coalesced"], queries["misses"]),
+        "course_embedding": (embedding_cache.hits, embedding_cache.misses),
+    }
+
+# Read from the caches, warm-up state and catalog only when /metrics is scraped
+metrics.callback("cache_hits_total", "Cache lookups served from the cache", "counter", ("cache",),
+                 lambda: {(name,): hits for name, (hits, _) in cache_counts().items()})
+metrics.callback("cache_misses_total", "Cache lookups that had to compute the value", "counter", ("cache",),
+                 lambda: {(name,): misses for name, (_, misses) in cache_counts().items()})
+metrics.callback("cache_hit_ratio", "Share of cache lookups served from the cache", "gauge", ("cache",),
+                 lambda: {(name,): hits / (hits + misses) if hits + misses else 0.0
+                          for name, (hits, misses) in cache_counts().items()})
+metrics.callback("embedding_warmup_courses", "Catalog courses to embed, and embedded so far", "gauge", ("state",),
+                 lambda: {("total",): warmup_state["total_courses"], ("embedded",): warmup_state["embedded_courses"]})
+metrics.callback("embedding_warmup_status", "1 for the current embedding warm-up status", "gauge", ("status",),
+                 lambda: {(status,): int(warmup_state["status"] == status)
+                          for status in ("pending", "running", "ready", "failed", "disabled")})
+metrics.callback("catalog_courses", "Courses in the loaded catalog", "gauge", (), lambda: {(): len(catalog)})
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus metrics for the worker process serving the request"""
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/health")
+def health():
+    """Liveness check; always succeeds while the process is serving"""
+    return {"status": "ok", "embeddings": warmup_state, "summary_cache": summary_cache.stats(), "search_query_cache": query_embedding_cache.stats()}
+
+@app.get("/ready")
+def ready():
+    """Readiness check; 503 until embedding warm-up has finished"""
+    if embeddings_warming_up():
+        raise HTTPException(
+            status_code=503,
+            detail=warmup_state,
+            headers={"Retry-After": str(WARMUP_RETRY_AFTER)}
+        )
+    return {"status": "ready", "embeddings": warmup_state}
+
+@app.post("/admin/reload-catalog")
+def reload_catalog_endpoint(x_admin_token: Optional[str] = Header(None)):
+    """Apply CATALOG_FILE changes in this worker (set CATALOG_RELOAD_INTERVAL for all workers)"""
+    if not CATALOG_RELOAD_TOKEN or not hmac.compare_digest((x_admin_token or "").encode(), CATALOG_RELOAD_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Not allowed to reload the catalog")
+    try:
+        result = reload_catalog()
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error reloading catalog: {str(e)}")
+    if result is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Course embeddings are warming up, please retry shortly",
+            headers={"Retry-After": str(WARMUP_RETRY_AFTER)}
+        )
+    return result
 
 @app.get("/majors")
-def get_majors():
-    return [{"id": i, "name": major} for i, major in enumerate(MAJORS_DATA.keys())]
+def get_majors(request: Request):
+    return cached_json_response(request, catalog.majors_json, CATALOG_CACHE_MAX_AGE)
 
 @app.get("/courses/{major_id}")
-def get_courses(major_id: int):
-    majors = list(MAJORS_DATA.keys())
-    if major_id < 0 or major_id >= len(majors):
+def get_courses(major_id: int, request: Request):
+    cached = catalog.courses_json.get(major_id)
+    if cached is None:
         raise HTTPException(status_code=404, detail="Major not found")
     
-    major_name = majors[major_id]
-    return {
-        "major": major_name,
-        "courses": MAJORS_DATA[major_name]
-    }
+    return cached_json_response(request, cached, CATALOG_CACHE_MAX_AGE)
 
 @app.get("/faculty/{major_id}")
-def get_faculty(major_id: int):
-    majors = list(FACULTY_DATA.keys())
-    if major_id < 0 or major_id >= len(majors):
+def get_faculty(major_id: int, request: Request):
+    cached = catalog.faculty_json.get(major_id)
+    if cached is None:
         raise HTTPException(status_code=404, detail="Major not found")
     
-    major_name = majors[major_id]
-    return {
-        "major": major_name,
-        "faculty": FACULTY_DATA[major_name]
-    }
+    return cached_json_response(request, cached, CATALOG_CACHE_MAX_AGE)
+
+
 
+def relevant_courses(index, question_embedding: List[float]) -> List[Tuple[str, float]]:
+    """Courses closest to a question, for retrieval-mode prompts"""
+    with metrics.span("index_similarity"):
+        return index.top_k(unit_vector(question_embedding), ASSISTANT_CONTEXT_COURSES)
 
+async def build_system_prompt(question: str) -> str:
+    """Assistant system prompt: cached full catalog, or top-N relevant courses in retrieval mode"""
+    catalog_prompt.compile(catalog)
+    index = embedding_index
+    if ASSISTANT_CONTEXT_MODE == "retrieval" and len(index):
+        question_embedding = await get_embedding_async(question)
+        if question_embedding:
+            # A matrix product over the whole catalog; keep it off the event loop
+            relevant = await run_in_threadpool(relevant_courses, index, question_embedding)
+            prompt = catalog_prompt.for_courses(code for code, _ in relevant)
+            if prompt:
+                return prompt
+    return catalog_prompt.full_prompt
+
+def find_matching_courses(ai_response: str) -> List[Dict[str, Any]]:
+    """Find courses mentioned in an AI response for frontend highlighting"""
+    course_matcher.compile(catalog)
+    with metrics.span("index_mentions"):
+        return course_matcher.find(ai_response)
+
+def assistant_messages(system_prompt: str, question: str) -> List[Dict[str, str]]:
+    return [
+        {
+            "role": "system",
+            "content": system_prompt
+        },
+        {
+            "role": "user",
+            "content": question
+        }
+    ]
 
 @app.post("/assistant")
-def chatbot_assistant(request: ChatRequest):
+async def chatbot_assistant(request: ChatRequest):
     try:
         if not client.api_key:
             raise HTTPException(status_code=500, detail="OpenAI API key not configured")
         
-        # Prepare course database context for the AI
-        courses_context = ""
-        for major, courses in MAJORS_DATA.items():
-            courses_context += f"\n**{major} Department:**\n"
-            for course in courses:
-                courses_context += f"- {course['code']}: {course['name']} ({course['credits']} credits)\n"
-                courses_context += f"  Description: {course['description']}\n"
-                courses_context += f"  Faculty: {course['faculty']['name']} ({course['faculty']['email']})\n"
-                courses_context += f"  Office Hours: {course['faculty']['office_hours']}\n\n"
-        
-        # Enhanced system prompt with course database
-        system_prompt = f"""You are an intelligent course advisor for a Computer Science Department. You help students find courses, understand requirements, and plan their academic journey.
-
-Available Courses Database:
-{courses_context}
-
-Instructions:
-- Answer questions about courses, faculty, prerequisites, and academic planning
-- Be helpful, friendly, and informative
-- When recommending courses, mention course codes, names, credits, and faculty
-- If asked about specific topics, suggest relevant courses from the database
-- For general questions, provide helpful academic guidance
-- Use markdown formatting for better readability (** for bold)
-- Keep responses concise but comprehensive
-- If you cannot find specific information in the course database, provide general academic advice"""
-
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {
-                    "role": "system",
-                    "content": system_prompt
-                },
-                {
-                    "role": "user",
-                    "content": request.question
+        system_prompt = await build_system_prompt(request.question)
+
+        if request.stream:
+            def final_event(ai_response: str) -> Dict[str, Any]:
+                return {
+                    "response": ai_response,
+                    "matching_courses": find_matching_courses(ai_response)
                 }
-            ],
+
+            return stream_chat_completion(
+                final_event,
+                fallback=lambda: fallback_text_search(request.question),
+                model="gpt-3.5-turbo",
+                messages=assistant_messages(system_prompt, request.question),
+                max_tokens=400,
+                temperature=0.7
+            )
+
+        response = await create_chat_completion(
+            model="gpt-3.5-turbo",
+            messages=assistant_messages(system_prompt, request.question),
             max_tokens=400,
             temperature=0.7
         )
         
         ai_response = response.choices[0].message.content.strip()
         
-        # Find relevant courses mentioned in the AI response for frontend highlighting
-        matching_courses = []
-        for major, courses in MAJORS_DATA.items():
-            for course in courses:
-                if (course['code'].lower() in ai_response.lower() or 
-                    course['name'].lower() in ai_response.lower()):
-                    course_info = {
-                        "major": major,
-                        "code": course["code"],
-                        "name": course["name"],
-                        "description": course["description"],
-                        "credits": course["credits"],
-                        "faculty": course["faculty"]["name"]
-                    }
-                    matching_courses.append(course_info)
-        
         return {
             "response": ai_response,
-            "matching_courses": matching_courses
+            "matching_courses": find_matching_courses(ai_response)
         }
         
     except Exception as e:
@@ -384,40 +789,21 @@ Instructions:
         return fallback_text_search(request.question)
 
 def fallback_text_search(question: str):
-    """Fallback function using original text matching if OpenAI fails"""
-    question_lower = question.lower()
-    keywords = question_lower.split()
-    
-    matching_courses = []
-    
-    # Search through all courses
-    for major, courses in MAJORS_DATA.items():
-        for course in courses:
-            # Search in course name, description, and faculty name
-            searchable_text = f"{course['name']} {course['description']} {course['faculty']['name']}".lower()
-            
-            # Check if any keyword matches
-            if any(keyword in searchable_text for keyword in keywords):
-                course_info = {
-                    "major": major,
-                    "code": course["code"],
-                    "name": course["name"],
-                    "description": course["description"],
-                    "credits": course["credits"],
-                    "faculty": course["faculty"]["name"]
-                }
-                matching_courses.append(course_info)
+    """Fallback keyword search (BM25 over the course index) if OpenAI fails"""
+    search_index.compile(catalog)
+    with metrics.span("index_bm25"):
+        matching_courses = [course for course, _ in search_index.search(question, k=FALLBACK_SEARCH_RESULTS)]
     
     # Generate response
     if not matching_courses:
         response = "I couldn't find any courses matching your question. Try asking about specific topics like 'statistics', 'python', 'data', or 'neural networks'."
     elif len(matching_courses) == 1:
         course = matching_courses[0]
-        response = f"I found one course that matches: **{course['code']}: {course['name']}** in {course['major']}. {course['description']} It's {course['credits']} credits, offered in {course['semester']}, and taught by {course['faculty']}."
+        response = f"I found one course that matches: **{course['code']}: {course['name']}** in {course['major']}. {course['description']} It's {course['credits']} credits and taught by {course['faculty']}."
     else:
         response = f"I found {len(matching_courses)} courses that match your question:\n\n"
         for course in matching_courses[:3]:  # Limit to top 3 results
-            response += f"• **{course['code']}: {course['name']}** ({course['major']}) - {course['credits']} credits, {course['semester']}\n"
+            response += f"• **{course['code']}: {course['name']}** ({course['major']}) - {course['credits']} credits, {course['faculty']}\n"
         if len(matching_courses) > 3:
             response += f"\n...and {len(matching_courses) - 3} more courses."
     
@@ -427,42 +813,40 @@ def fallback_text_search(question: str):
     }
 
 @app.get("/recommend/{course_id}")
-def get_course_recommendations(course_id: str):
+def get_course_recommendations(course_id: str, k: int = DEFAULT_RECOMMENDATIONS):
     """Get course recommendations based on similarity to the given course"""
     try:
+        if k < 1 or k > MAX_RECOMMENDATIONS:
+            raise HTTPException(status_code=400, detail=f"k must be between 1 and {MAX_RECOMMENDATIONS}")
+
         # Check if the course exists
-        if course_id not in course_embeddings:
+        index = embedding_index
+        if course_id not in index:
+            if embeddings_warming_up():
+                raise HTTPException(
+                    status_code=503,
+                    detail="Course recommendations are warming up, please retry shortly",
+                    headers={"Retry-After": str(WARMUP_RETRY_AFTER)}
+                )
             raise HTTPException(status_code=404, detail="Course not found")
         
-        # Get the embedding for the target course
-        target_embedding = course_embeddings[course_id]["embedding"]
-        similarities = []
-        
-        # Calculate similarity with all other courses
-        for other_course_id, course_data in course_embeddings.items():
-            if other_course_id != course_id:  # Don't recommend the same course
-                similarity = cosine_similarity(target_embedding, course_data["embedding"])
-                similarities.append({
-                    "course_id": other_course_id,
-                    "similarity": similarity,
-                    "course_info": course_data["course_info"]
-                })
-        
-        # Sort by similarity and get top 3
-        similarities.sort(key=lambda x: x["similarity"], reverse=True)
-        top_recommendations = similarities[:3]
-        
-        # Format response
+        # One matrix-vector product against all courses, then top-k selection
         recommendations = []
-        for rec in top_recommendations:
+        with metrics.span("index_similarity"):
+            similar = index.similar_to(course_id, k)
+        for other_course_id, similarity in similar:
+            course = catalog.course(other_course_id)
+            if course is None:
+                continue  # removed by a catalog reload that is being applied
+            course_info = course.info()
             recommendations.append({
-                "code": rec["course_info"]["code"],
-                "name": rec["course_info"]["name"],
-                "description": rec["course_info"]["description"],
-                "major": rec["course_info"]["major"],
-                "credits": rec["course_info"]["credits"],
-                "faculty": rec["course_info"]["faculty"],
-                "similarity_score": round(rec["similarity"], 3)
+                "code": course_info["code"],
+                "name": course_info["name"],
+                "description": course_info["description"],
+                "major": course_info["major"],
+                "credits": course_info["credits"],
+                "faculty": course_info["faculty"],
+                "similarity_score": round(similarity, 3)
             })
         
         return {
@@ -475,29 +859,109 @@ def get_course_recommendations(course_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating recommendations: {str(e)}")
 
+def search_ann_index(index: IVFIndex, query_vector, k: int, nprobe: Optional[int]) -> List[Tuple[str, float]]:
+    with metrics.span("index_ann"):
+        return index.search(query_vector, k, nprobe=nprobe)
+
+@app.get("/search")
+async def semantic_search(q: str, k: int = DEFAULT_SEARCH_RESULTS, nprobe: Optional[int] = None):
+    """Semantic course search: embed the query and look it up in the ANN index"""
+    try:
+        if not q.strip():
+            raise HTTPException(status_code=400, detail="Query must not be empty")
+        if k < 1 or k > MAX_RECOMMENDATIONS:
+            raise HTTPException(status_code=400, detail=f"k must be between 1 and {MAX_RECOMMENDATIONS}")
+        if nprobe is not None and nprobe < 1:
+            raise HTTPException(status_code=400, detail="nprobe must be at least 1")
+
+        index = ann_index
+        if not len(index):
+            if embeddings_warming_up():
+                raise HTTPException(
+                    status_code=503,
+                    detail="Course search is warming up, please retry shortly",
+                    headers={"Retry-After": str(WARMUP_RETRY_AFTER)}
+                )
+            raise HTTPException(status_code=503, detail="Course embeddings are not available")
+
+        # Queries differing only in case or spacing share one embedding, so
+        # embed exactly the normalized text the cache is keyed on
+        normalized_query = " ".join(q.lower().split())
+
+        async def embed_query():
+            embedding = await get_embedding_async(normalized_query)
+            if not embedding:
+                raise HTTPException(status_code=502, detail="Could not generate query embedding")
+            return unit_vector(embedding)
+
+        query_key = cache_key(EMBEDDING_MODEL, normalized_query)
+        query_vector = await query_embedding_cache.get_or_compute(query_key, embed_query)
+
+        # Scoring the probed lists is CPU work; keep it off the event loop
+        found = await run_in_threadpool(search_ann_index, index, query_vector, k, nprobe)
+        results = []
+        for code, similarity in found:
+            course = catalog.course(code)
+            if course is not None:
+                results.append(dict(course.info(), similarity_score=round(similarity, 3)))
+
+        return {"query": q, "results": results}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching courses: {str(e)}")
+
 @app.post("/summarize")
-def summarize_course(request: SummarizeRequest):
+async def summarize_course(request: SummarizeRequest):
     try:
         if not client.api_key:
             raise HTTPException(status_code=500, detail="OpenAI API key not configured")
         
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an educational assistant that helps summarize course descriptions."
-                },
-                {
-                    "role": "user",
-                    "content": f"Summarize this course description in 3-4 sentences, highlighting prerequisites, key concepts, and expected learning outcomes: {request.course_description}"
-                }
-            ],
-            max_tokens=150,
-            temperature=0.7
-        )
-        
-        summary = response.choices[0].message.content.strip()
+        messages = [
+            {
+                "role": "system",
+                "content": "You are an educational assistant that helps summarize course descriptions."
+            },
+            {
+                "role": "user",
+                "content": f"Summarize this course description in 3-4 sentences, highlighting prerequisites, key concepts, and expected learning outcomes: {request.course_description}"
+            }
+        ]
+
+        completion_params = {"max_tokens": 150, "temperature": 0.7}
+        cache_key = summary_key(messages[1]["content"], "gpt-3.5-turbo", completion_params)
+
+        if request.stream:
+            cached = summary_cache.lookup(cache_key)
+            if cached is not None:
+                return StreamingResponse(
+                    iter([format_sse("done", {"summary": cached})]),
+                    media_type="text/event-stream",
+                    headers={"Cache-Control": "no-cache"}
+                )
+
+            def final_event(summary: str) -> Dict[str, Any]:
+                summary_cache.put(cache_key, summary)
+                return {"summary": summary}
+
+            return stream_chat_completion(
+                final_event,
+                model="gpt-3.5-turbo",
+                messages=messages,
+                **completion_params
+            )
+
+        async def generate_summary() -> str:
+            response = await create_chat_completion(
+                model="gpt-3.5-turbo",
+                messages=messages,
+                **completion_params
+            )
+            return response.choices[0].message.content.strip()
+
+        # Identical descriptions are summarized once; concurrent requests share the call
+        summary = await summary_cache.get_or_compute(cache_key, generate_summary)
         
         return {"summary": summary}
         
@@ -513,50 +977,30 @@ def summarize_course(request: SummarizeRequest):
         else:
             raise HTTPException(status_code=500, detail=f"Error generating summary: {error_message}")
 
+def selection_key(uid: Optional[str], session: Optional[Session] = None) -> str:
+    if session is not None:
+        authorize_uid(uid or session.uid, session)
+        return session.uid
+    if uid:
+        raise HTTPException(status_code=401, detail="Not logged in", headers={"WWW-Authenticate": "Bearer"})
+    return ANONYMOUS_SELECTION_KEY
+
 @app.post("/select-course")
-def select_course(request: CourseSelectionRequest):
-    """Add a course to the selected courses list with course limit validation"""
+def select_course(request: CourseSelectionRequest, session: Optional[Session] = Depends(current_session)):
+    """Add a course to the user's selected courses with course limit validation"""
     try:
         course_code = request.course_code
         
         # Find the course in the database
-        course_found = None
-        
-        for major, courses in MAJORS_DATA.items():
-            for course in courses:
-                if course["code"] == course_code:
-                    course_found = course
-                    break
-            if course_found:
-                break
+        course_found = catalog.course(course_code)
         
         if not course_found:
             raise HTTPException(status_code=404, detail="Course not found")
         
-        # Check if course is already selected
-        if course_code in [c["code"] for c in selected_courses]:
-            raise HTTPException(status_code=400, detail="Course is already selected")
-        
-        # Check global course limit
+        # Duplicate and course limit checks happen atomically with the insert
         course_limit = get_course_limit()
-        
-        if len(selected_courses) >= course_limit:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"You cannot add more than {course_limit} courses."
-            )
-        
-        # Add course to selected courses
-        course_info = {
-            "code": course_found["code"],
-            "name": course_found["name"],
-            "description": course_found["description"],
-            "credits": course_found["credits"],
-            "faculty": course_found["faculty"]["name"],
-            "major": major
-        }
-        
-        selected_courses.append(course_info)
+        with metrics.span("selections_write"):
+            selected_courses = selection_store.add(selection_key(request.uid, session), course_found.info(), course_limit)
         
         return {
             "success": True,
@@ -564,26 +1008,19 @@ def select_course(request: CourseSelectionRequest):
             "selected_courses": selected_courses
         }
         
+    except SelectionError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error selecting course: {str(e)}")
 
 @app.delete("/remove-course/{course_code}")
-def remove_course(course_code: str):
-    """Remove a course from the selected courses list"""
+def remove_course(course_code: str, uid: Optional[str] = None, session: Optional[Session] = Depends(current_session)):
+    """Remove a course from the user's selected courses"""
     try:
-        # Find and remove the course
-        course_removed = False
-        
-        for i, course in enumerate(selected_courses):
-            if course["code"] == course_code:
-                selected_courses.pop(i)
-                course_removed = True
-                break
-        
-        if not course_removed:
-            raise HTTPException(status_code=404, detail="Course not found in selected courses")
+        with metrics.span("selections_write"):
+            selected_courses = selection_store.remove(selection_key(uid, session), course_code)
         
         return {
             "success": True,
@@ -591,15 +1028,19 @@ def remove_course(course_code: str):
             "selected_courses": selected_courses
         }
         
+    except SelectionError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error removing course: {str(e)}")
 
 @app.get("/selected-courses")
-def get_selected_courses():
-    """Get the current list of selected courses"""
+def get_selected_courses(uid: Optional[str] = None, session: Optional[Session] = Depends(current_session)):
+    """Get the user's current list of selected courses"""
     course_limit = get_course_limit()
+    with metrics.span("selections_read"):
+        selected_courses = selection_store.list(selection_key(uid, session))
     return {
         "selected_courses": selected_courses,
         "total_courses": len(selected_courses),
@@ -626,18 +1067,21 @@ def signup(request: SignUpRequest):
             raise HTTPException(status_code=400, detail="Email already exists")
         
         # Create new user
-        users = load_users()
         new_uid = str(uuid.uuid4())
         
         new_user = {
             "uid": new_uid,
             "name": request.name.strip(),
             "email": request.email.lower().strip(),
-            "password": request.password  # TODO: Hash password using bcrypt or similar for production
+            "password": credential_service.hash_blocking(request.password)
         }
         
-        users.append(new_user)
-        save_users(users)
+        try:
+            with metrics.span("users_write"):
+                user_store.add(new_user)
+        except ValueError as e:
+            # A concurrent signup took the email between the check and the insert
+            raise HTTPException(status_code=400, detail=str(e))
         
         return {
             "success": True,
@@ -651,19 +1095,49 @@ def signup(request: SignUpRequest):
         raise HTTPException(status_code=500, detail=f"Error creating user: {str(e)}")
 
 @app.post("/login")
-def login(request: LoginRequest):
+async def login(request: LoginRequest):
     """Login user with email and password"""
     try:
-        # Find user by email
-        user = find_user_by_email(request.email.lower().strip())
+        email = request.email.lower().strip()
+        if not request.password:
+            # Never matched, even against a record imported without a password
+            raise HTTPException(status_code=401, detail="Invalid email or password")
+        retry_after = login_rate_limiter.attempt(email)
+        if retry_after:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many failed login attempts, please try again later",
+                headers={"Retry-After": str(int(retry_after) + 1)}
+            )
+
+        # Find user by email (a SQLite query with the sqlite store)
+        user = await run_in_threadpool(find_user_by_email, email)
         
-        if not user or user["password"] != request.password:
+        # Unknown emails are checked against a dummy hash so both cases take as long
+        stored_password = user["password"] if user else credential_service.dummy_hash
+        with metrics.span("password_verify"):
+            verified = await credential_service.verify(request.password, stored_password)
+        if not verified or not user:
+            # Already counted by attempt()
             raise HTTPException(status_code=401, detail="Invalid email or password")
+        login_rate_limiter.reset(email)
+
+        # Upgrade plaintext records and hashes made with older cost settings
+        if credential_service.needs_rehash(stored_password):
+            try:
+                password_hash = await credential_service.hash(request.password)
+                with metrics.span("users_write"):
+                    await run_in_threadpool(user_store.set_password, user["uid"], password_hash)
+            except Exception as e:
+                print(f"Error upgrading password hash for {user['uid']}: {e}")
         
         return {
             "success": True,
             "message": "Login successful",
-            "uid": user["uid"]
+            "uid": user["uid"],
+            "token": session_manager.issue(user["uid"], user["name"]),
+            "token_type": "bearer",
+            "expires_in": int(session_manager.ttl)
         }
         
     except HTTPException:
@@ -671,20 +1145,29 @@ def login(request: LoginRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error during login: {str(e)}")
 
+@app.post("/logout")
+def logout(session: Session = Depends(require_session), authorization: Optional[str] = Header(None)):
+    """Revoke the session token sent in the Authorization header"""
+    session_manager.revoke(authorization.partition(" ")[2].strip())
+    return {
+        "success": True,
+        "message": "Logged out successfully"
+    }
+
 @app.get("/welcome/{uid}")
-def welcome(uid: str):
+def welcome(uid: str, session: Session = Depends(require_session)):
     """Get welcome message for user"""
     try:
-        user = find_user_by_uid(uid)
-        
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+        # The token proves the user exists and carries the name; seats held
+        # come from the registration engine, so the user store is not read
+        authorize_uid(uid, session)
+        user_name = session.name
         
         return {
-            "message": f"Welcome, {user['name']}!",
-            "user_name": user["name"],
+            "message": f"Welcome, {user_name}!",
+            "user_name": user_name,
             "uid": uid,
-            "has_registered_courses": len(get_user_registrations(uid)) > 0
+            "has_registered_courses": bool(registration_engine.status(uid)["registered"])
         }
         
     except HTTPException:
@@ -694,43 +1177,62 @@ def welcome(uid: str):
 
 # Course Registration endpoints
 @app.post("/complete-registration")
-def complete_registration(request: CourseRegistrationRequest):
-    """Complete user's course registration"""
+def complete_registration(
+    request: CourseRegistrationRequest,
+    idempotency_key: Optional[str] = Header(None),
+    session: Session = Depends(require_session),
+):
+    """Complete user's course registration, reserving a seat or a waitlist place per course"""
     try:
-        # Verify user exists
-        user = find_user_by_uid(request.uid)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        # Update user's registered courses
-        success = update_user_registrations(request.uid, request.courses)
-        if not success:
-            raise HTTPException(status_code=500, detail="Failed to save course registration")
-        
+        authorize_uid(request.uid, session)
+
+        submitted = {course.get("code"): course for course in request.courses}
+        for code in submitted:
+            if catalog.course(code) is None:
+                raise HTTPException(status_code=404, detail=f"Course {code} not found")
+
+        def save_registration(result: Dict[str, Any]):
+            registered_courses = [submitted[code] for code in result["registered"]]
+            if not update_user_registrations(request.uid, registered_courses):
+                raise HTTPException(status_code=500, detail="Failed to save course registration")
+
+        # Reserve seats and update user's registered courses
+        result = registration_engine.register(
+            request.uid,
+            list(submitted),
+            held=[course.get("code") for course in get_user_registrations(request.uid)],
+            idempotency_key=idempotency_key,
+            persist=save_registration,
+        )
+
+        waitlisted = [submitted[code] for code in result["waitlisted"]]
         return {
             "success": True,
-            "message": "Course registration completed successfully",
-            "registered_courses": request.courses
+            "message": "Course registration completed successfully" if not waitlisted
+                else "Course registration completed; some courses are full and you have been waitlisted",
+            "registered_courses": [submitted[code] for code in result["registered"]],
+            "waitlisted_courses": waitlisted
         }
         
+    except RegistrationError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error completing registration: {str(e)}")
 
 @app.get("/user-registrations/{uid}")
-def get_user_course_registrations(uid: str):
+def get_user_course_registrations(uid: str, session: Session = Depends(require_session)):
     """Get user's registered courses"""
     try:
-        user = find_user_by_uid(uid)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+        authorize_uid(uid, session)
+        user_name = session.name
         
         registered_courses = get_user_registrations(uid)
         
         return {
             "uid": uid,
-            "user_name": user["name"],
+            "user_name": user_name,
             "registered_courses": registered_courses,
             "total_courses": len(registered_courses),
             "registration_status": "completed" if registered_courses else "pending"
@@ -742,16 +1244,17 @@ def get_user_course_registrations(uid: str):
         raise HTTPException(status_code=500, detail=f"Error fetching user registrations: {str(e)}")
 
 @app.delete("/user-registrations/{uid}")
-def clear_user_registrations(uid: str):
+def clear_user_registrations(uid: str, session: Session = Depends(require_session)):
     """Clear user's registered courses (for re-registration)"""
     try:
-        user = find_user_by_uid(uid)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+        authorize_uid(uid, session)
         
-        success = update_user_registrations(uid, [])
-        if not success:
-            raise HTTPException(status_code=500, detail="Failed to clear registrations")
+        def clear_saved_registrations():
+            if not update_user_registrations(uid, []):
+                raise HTTPException(status_code=500, detail="Failed to clear registrations")
+
+        # Free the user's seats; waitlisted students move up
+        registration_engine.release_all(uid, persist=clear_saved_registrations)
         
         return {
             "success": True,
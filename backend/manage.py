@@ -0,0 +1,255 @@
+"""Bulk import/export for catalog and user data.
+
+    python manage.py import-courses courses.csv       # embed new courses, then upsert them
+    python manage.py import-faculty faculty.jsonl
+    python manage.py embed                            # embed courses missing from the cache
+    python manage.py import-users users.csv --batch-size 1000
+    python manage.py export-registrations registrations.csv
+
+Files are CSV or JSON lines (picked by extension, or --format). Settings come
+from the same environment variables as the server (CATALOG_FILE,
+USER_STORE_BACKEND, USERS_DB, EMBEDDING_CACHE_DIR, ...).
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from catalog import Catalog
+from catalog_store import CatalogEditor, RecordWriter, course_from_record, faculty_from_record, iter_records, load_catalog_data, save_catalog_data
+from credentials import hash_password, is_hashed
+from embedding_cache import EmbeddingCache
+from embedding_pipeline import EMBEDDING_MODEL, embed_texts, print_batch_progress
+from registration_journal import read_journal
+from user_store import JsonUserBackend, SqliteUserBackend, iter_snapshot_users
+
+USERS_FILE = "users.json"
+CATALOG_FILE = os.getenv("CATALOG_FILE", "catalog.json")
+USER_STORE_BACKEND = os.getenv("USER_STORE_BACKEND", "json")
+USERS_DB = os.getenv("USERS_DB", "users.db")
+USERS_JOURNAL = os.getenv("USERS_JOURNAL", "users.journal") or None
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "embedding_cache")
+
+REGISTRATION_FIELDS = ["uid", "name", "email", "course_code", "course_name", "credits", "major", "faculty"]
+
+
+def batched(records: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(records)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def import_catalog(path: str, fmt: str, kind: str, embed: bool = False) -> int:
+    majors, faculty = load_catalog_data(CATALOG_FILE)
+    editor = CatalogEditor(majors, faculty)
+    changed = 0
+    for record in iter_records(path, fmt):
+        if kind == "courses":
+            changed += editor.upsert_course(*course_from_record(record))
+        else:
+            changed += editor.upsert_faculty(*faculty_from_record(record))
+    if changed and embed:
+        # Before saving, so servers reloading the file find the vectors cached
+        embed_catalog(Catalog(*editor.data()))
+    save_catalog_data(CATALOG_FILE, *editor.data())
+    print(f"Imported {kind} from {path}: {changed} added or changed, catalog saved to {CATALOG_FILE}")
+    return changed
+
+
+def embed_catalog(catalog: Optional[Catalog] = None) -> int:
+    """Embed catalog courses whose text is not in the embedding cache yet"""
+    from openai import OpenAI
+
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    cache = EmbeddingCache(EMBEDDING_CACHE_DIR, EMBEDDING_MODEL)
+    catalog = catalog or Catalog(*load_catalog_data(CATALOG_FILE))
+    missing = list(dict.fromkeys(
+        course.embedding_text for course in catalog.courses if cache.get(course.embedding_text) is None
+    ))
+    print(f"{len(catalog) - len(missing)} of {len(catalog)} courses already embedded")
+    if not missing:
+        return 0
+    vectors = embed_texts(
+        client,
+        missing,
+        model=EMBEDDING_MODEL,
+        batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", "100")),
+        max_concurrency=int(os.getenv("EMBEDDING_CONCURRENCY", "4")),
+        progress=print_batch_progress,
+    )
+    embedded = 0
+    for text, vector in zip(missing, vectors):
+        if vector:
+            cache.put(text, vector)
+            embedded += 1
+    cache.save()
+    print(f"Embedded {embedded} new or changed courses into {EMBEDDING_CACHE_DIR}")
+    return embedded
+
+
+def user_from_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    email = record["email"].lower().strip()
+    password = record.get("password_hash") or record.get("password")
+    if not password:
+        # Hashing "" would let anyone sign in with a blank password
+        raise ValueError(f"{email} has no password")
+    user = {
+        "uid": record.get("uid") or str(uuid.uuid4()),
+        "name": record["name"].strip(),
+        "email": email,
+        "password": password,
+    }
+    if isinstance(record.get("registered_courses"), list):
+        user["registered_courses"] = record["registered_courses"]
+    return user
+
+
+def iter_users(path: str, fmt: Optional[str]) -> Iterator[Dict[str, Any]]:
+    """Users from an import file; rows that cannot be imported are reported and skipped"""
+    for number, record in enumerate(iter_records(path, fmt), 1):
+        try:
+            yield user_from_record(record)
+        except ValueError as e:
+            print(f"Skipping record {number}: {e}")
+
+
+def unseen_users(batch: List[Dict[str, Any]], uids: Set[str], emails: Set[str]) -> List[Dict[str, Any]]:
+    """Users whose uid and email are not in `uids`/`emails` (nor earlier in the batch); records theirs"""
+    fresh = []
+    for user in batch:
+        if user["uid"] in uids or user["email"] in emails:
+            continue
+        uids.add(user["uid"])
+        emails.add(user["email"])
+        fresh.append(user)
+    return fresh
+
+
+def hash_plaintext_passwords(users: List[Dict[str, Any]], pool: ProcessPoolExecutor):
+    n = int(os.getenv("PASSWORD_SCRYPT_N", str(2 ** 14)))
+    r = int(os.getenv("PASSWORD_SCRYPT_R", "8"))
+    p = int(os.getenv("PASSWORD_SCRYPT_P", "1"))
+    plaintext = [user for user in users if not is_hashed(user["password"])]
+    hashes = pool.map(hash_password, [user["password"] for user in plaintext],
+                      itertools.repeat(n), itertools.repeat(r), itertools.repeat(p))
+    for user, password_hash in zip(plaintext, hashes):
+        user["password"] = password_hash
+
+
+def import_users(path: str, fmt: str, batch_size: int) -> int:
+    """Bulk-load users; existing uids and emails are skipped"""
+    inserted = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor() as pool:
+        if USER_STORE_BACKEND == "sqlite":
+            # One transaction per batch; safe while the server is running
+            backend = SqliteUserBackend(USERS_DB)
+            for batch in batched(iter_users(path, fmt), batch_size):
+                # Skip known users and repeated rows before paying for their password hashes
+                batch = [user for user in unseen_users(batch, set(), set())
+                         if backend.get_by_uid(user["uid"]) is None and backend.get_by_email(user["email"]) is None]
+                hash_plaintext_passwords(batch, pool)
+                inserted += backend.insert_many(batch, skip_existing=True)
+                print(f"Imported {inserted} users...")
+        else:
+            # users.json is rewritten once at the end; fails while the server holds the file
+            backend = JsonUserBackend(USERS_FILE, USERS_JOURNAL)
+            try:
+                users = backend.load_all()
+                uids = {user["uid"] for user in users}
+                emails = {user["email"].lower() for user in users}
+                for batch in batched(iter_users(path, fmt), batch_size):
+                    batch = unseen_users(batch, uids, emails)
+                    hash_plaintext_passwords(batch, pool)
+                    users.extend(batch)
+                    inserted += len(batch)
+                backend.save_all(users)
+            finally:
+                backend.close()
+    print(f"Imported {inserted} users into the {USER_STORE_BACKEND} user store in {time.perf_counter() - started:.1f}s")
+    return inserted
+
+
+def iter_registrations():
+    if USER_STORE_BACKEND == "sqlite":
+        yield from SqliteUserBackend(USERS_DB).iter_registrations()
+        return
+    # Streamed: only the journal is held in memory, not users.json
+    for user in iter_snapshot_users(USERS_FILE, read_journal(USERS_JOURNAL) if USERS_JOURNAL else ()):
+        for course in user.get("registered_courses", []):
+            yield user["uid"], user["name"], user["email"], course
+
+
+def export_registrations(path: str, fmt: str) -> int:
+    """One row per registered course, streamed straight from the user store"""
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") or path == "-" else "jsonl")
+    out = sys.stdout if path == "-" else open(path, "w", newline="", encoding="utf-8")
+    rows = 0
+    try:
+        writer = RecordWriter(out, REGISTRATION_FIELDS, fmt)
+        for uid, name, email, course in iter_registrations():
+            writer.write({
+                "uid": uid,
+                "name": name,
+                "email": email,
+                "course_code": course.get("code"),
+                "course_name": course.get("name"),
+                "credits": course.get("credits"),
+                "major": course.get("major"),
+                "faculty": course.get("faculty") if isinstance(course.get("faculty"), str) else (course.get("faculty") or {}).get("name"),
+            })
+            rows += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"Exported {rows} registrations", file=sys.stderr)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for kind in ("courses", "faculty"):
+        command = commands.add_parser(f"import-{kind}", help=f"Upsert {kind} into the catalog file")
+        command.add_argument("path")
+        command.add_argument("--format", choices=("csv", "jsonl"))
+        if kind == "courses":
+            command.add_argument("--no-embed", action="store_true", help="Skip embedding new courses")
+
+    commands.add_parser("embed", help="Embed catalog courses missing from the embedding cache")
+
+    command = commands.add_parser("import-users", help="Bulk-load users into the user store")
+    command.add_argument("path")
+    command.add_argument("--format", choices=("csv", "jsonl"))
+    command.add_argument("--batch-size", type=int, default=1000)
+
+    command = commands.add_parser("export-registrations", help="Write all registered courses (- for stdout)")
+    command.add_argument("path")
+    command.add_argument("--format", choices=("csv", "jsonl"))
+
+    args = parser.parse_args(argv)
+    if args.command == "import-courses":
+        embed = not args.no_embed and bool(os.getenv("OPENAI_API_KEY"))
+        if not args.no_embed and not embed:
+            print("OPENAI_API_KEY not set; new courses will be embedded by the server")
+        import_catalog(args.path, args.format, "courses", embed)
+    elif args.command == "import-faculty":
+        import_catalog(args.path, args.format, "faculty")
+    elif args.command == "embed":
+        embed_catalog()
+    elif args.command == "import-users":
+        import_users(args.path, args.format, args.batch_size)
+    elif args.command == "export-registrations":
+        export_registrations(args.path, args.format)
+
+
+if __name__ == "__main__":
+    main()
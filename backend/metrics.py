@@ -0,0 +1,219 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Upper bounds in seconds, from sub-millisecond index lookups to slow LLM calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"  # the response adds "; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """Observations counted into fixed buckets, plus their sum"""
+
+    __slots__ = ("buckets", "counts", "total", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[slot] += 1
+            self.total += value
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self.counts), self.total
+
+
+class Family:
+    """A named metric with one child Counter or Histogram per label combination"""
+
+    def __init__(self, name: str, help_text: str, kind: str, labelnames: Tuple[str, ...], factory: Callable):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.labelnames = labelnames
+        self._factory = factory
+        self._children: Dict[LabelValues, object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._factory())
+        return child
+
+    def render(self) -> Iterable[str]:
+        for values, child in list(self._children.items()):
+            if self.kind == "counter":
+                yield f"{self.name}{_labels(self.labelnames, values)} {_number(child.value)}"
+                continue
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(child.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, values, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, values)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, values)} {cumulative}"
+
+
+class SpanTimer:
+    __slots__ = ("_histogram", "_errors", "_started")
+
+    def __init__(self, histogram: Histogram, errors: Counter):
+        self._histogram = histogram
+        self._errors = errors
+
+    def __enter__(self) -> "SpanTimer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self._histogram.observe(time.perf_counter() - self._started)
+        if exc_type is not None:
+            self._errors.inc()
+        return False
+
+
+class MetricsRegistry:
+    """In-process metrics rendered in the Prometheus text exposition format.
+
+    Counters (named *_total) and histograms are updated on the request path,
+    under one small lock each; values owned elsewhere (cache statistics,
+    warm-up progress) are read by callbacks only when /metrics is scraped.
+    `span(name)` times a `with` block into span_duration_seconds{span=name}
+    and counts the blocks that raised in span_errors_total. Each worker
+    process keeps its own values.
+    """
+
+    def __init__(self):
+        self._families: Dict[str, Family] = {}
+        self._callbacks: List[Tuple[str, str, str, Tuple[str, ...], Callable[[], Dict[LabelValues, float]]]] = []
+        self._lock = threading.Lock()
+        self._spans = self.histogram("span_duration_seconds", "Duration of instrumented operations", ("span",))
+        self._span_errors = self.counter("span_errors_total", "Instrumented operations that raised", ("span",))
+        self._span_children: Dict[str, Tuple[Histogram, Counter]] = {}
+
+    def _family(self, name: str, help_text: str, kind: str, labelnames: Tuple[str, ...], factory: Callable) -> Family:
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = Family(name, help_text, kind, labelnames, factory)
+            return family
+
+    def counter(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Family:
+        return self._family(name, help_text, "counter", labelnames, Counter)
+
+    def histogram(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Family:
+        return self._family(name, help_text, "histogram", labelnames, lambda: Histogram(buckets))
+
+    def callback(self, name: str, help_text: str, kind: str, labelnames: Tuple[str, ...],
+                 read: Callable[[], Dict[LabelValues, float]]):
+        """Metric whose values `read()` returns as {label values: value} at scrape time"""
+        self._callbacks.append((name, help_text, kind, labelnames, read))
+
+    def _span(self, name: str) -> Tuple[Histogram, Counter]:
+        children = self._span_children.get(name)
+        if children is None:
+            children = self._span_children.setdefault(name, (self._spans.labels(name), self._span_errors.labels(name)))
+        return children
+
+    def span(self, name: str) -> SpanTimer:
+        return SpanTimer(*self._span(name))
+
+    def observe_span(self, name: str, seconds: float):
+        """Record a span timed elsewhere (e.g. reported by a progress callback)"""
+        self._span(name)[0].observe(seconds)
+
+    def render(self) -> str:
+        lines = []
+        for family in list(self._families.values()):
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            lines.extend(family.render())
+        for name, help_text, kind, labelnames, read in self._callbacks:
+            try:
+                values = read()
+            except Exception as e:
+                print(f"Error collecting metric {name}: {e}")
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for label_values, value in values.items():
+                lines.append(f"{name}{_labels(labelnames, label_values)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording http_request_duration_seconds per route.
+
+    Routes are labelled by their path template ("/recommend/{course_id}"), so
+    the number of series stays bounded; unmatched paths share one label.
+    Durations run until the last body chunk is sent, including streamed ones.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.requests = registry.histogram(
+            "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            self.requests.labels(scope["method"], path, str(status)).observe(time.perf_counter() - started)
@@ -0,0 +1,454 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+class RegistrationError(Exception):
+    """Base class for registration errors; carries the HTTP status to report"""
+
+    status_code = 400
+
+
+class UnknownCourseError(RegistrationError):
+    status_code = 404
+
+
+class IdempotencyConflictError(RegistrationError):
+    status_code = 409
+
+
+class CourseSeats:
+    """Seat counter for one course: holders, capacity and an ordered waitlist"""
+
+    __slots__ = ("code", "capacity", "holders", "waitlist", "lock")
+
+    def __init__(self, code: str, capacity: int):
+        self.code = code
+        self.capacity = capacity
+        self.holders: Set[str] = set()
+        # Insertion-ordered dict used as a FIFO set of waiting uids
+        self.waitlist: Dict[str, None] = {}
+        self.lock = threading.Lock()
+
+
+class RegistrationEngine:
+    """Per-course seat reservation with waitlists and idempotent submissions.
+
+    Every course has its own lock, so students competing for different
+    courses never contend, and check-and-reserve on one course is atomic.
+    A student's own submissions are serialized by a striped per-user lock.
+    No code path holds two course locks, or two user locks, at once.
+    Each student's held and waitlisted codes are also indexed, so a
+    submission only touches the courses it names or the student is in.
+
+    `register` reserves newly requested seats (or waitlists the student),
+    persists the outcome, and only then releases seats the student dropped,
+    so a failed write leaves the student's old registration intact. Freed
+    seats go to the first waitlisted student; `on_promote(uid, code)` is
+    called for each promotion after the releasing student's lock is dropped.
+
+    Seats, waitlists and idempotency keys live in this process, so capacity
+    is only enforced with a single server process, and a restart forgets
+    the waitlists and idempotency keys (seat holders are reseeded from the
+    saved registrations by `load`). See SqliteRegistrationEngine for
+    workers sharing a database.
+    """
+
+    USER_LOCK_STRIPES = 256
+
+    def __init__(
+        self,
+        capacities: Dict[str, int],
+        on_promote: Optional[Callable[[str, str], None]] = None,
+        idempotency_capacity: int = 100000,
+    ):
+        self.seats: Dict[str, CourseSeats] = {code: CourseSeats(code, capacity) for code, capacity in capacities.items()}
+        self.on_promote = on_promote
+        self._user_locks = [threading.Lock() for _ in range(self.USER_LOCK_STRIPES)]
+        # Codes each student holds or is waitlisted for, changed only under the
+        # student's lock; may still name courses removed since (checked on use)
+        self._user_codes: Dict[str, Dict[str, None]] = {}
+        self._idempotency: "OrderedDict[Tuple[str, str], Tuple[Tuple[str, ...], Dict[str, Any]]]" = OrderedDict()
+        self._idempotency_lock = threading.Lock()
+        self._idempotency_capacity = idempotency_capacity
+
+    def user_lock(self, uid: str) -> threading.Lock:
+        return self._user_locks[hash(uid) % self.USER_LOCK_STRIPES]
+
+    def load(self, registrations: Iterable[Tuple[str, Iterable[str]]]):
+        """Seed seat holders from already-persisted registrations"""
+        for uid, codes in registrations:
+            for code in codes:
+                seats = self.seats.get(code)
+                if seats is not None:
+                    seats.holders.add(uid)
+                    self._user_codes.setdefault(uid, {})[code] = None
+
+    def set_capacity(self, code: str, capacity: int):
+        """Add a course or change its capacity; a raised capacity admits waitlisted students"""
+        seats = self.seats.setdefault(code, CourseSeats(code, capacity))
+        promotions = []
+        with seats.lock:
+            seats.capacity = capacity
+            while seats.waitlist and len(seats.holders) < seats.capacity:
+                promotions.append(self._promote_next(seats))
+        self._notify(promotions)
+
+    def remove_course(self, code: str):
+        """Forget a course that left the catalog, with its seats and waitlist"""
+        self.seats.pop(code, None)
+
+    def _seats(self, code: str) -> CourseSeats:
+        seats = self.seats.get(code)
+        if seats is None:
+            raise UnknownCourseError(f"Course {code} not found")
+        return seats
+
+    @staticmethod
+    def _promote_next(seats: CourseSeats) -> Tuple[str, str]:
+        uid = next(iter(seats.waitlist))
+        del seats.waitlist[uid]
+        seats.holders.add(uid)
+        return uid, seats.code
+
+    def _notify(self, promotions: List[Tuple[str, str]]):
+        if self.on_promote is None:
+            return
+        for uid, code in promotions:
+            with self.user_lock(uid):
+                seats = self.seats.get(code)
+                if seats is None or uid not in seats.holders:
+                    continue  # the student dropped the course again in the meantime
+                try:
+                    self.on_promote(uid, code)
+                except Exception as e:
+                    print(f"Error recording waitlist promotion of {uid} into {code}: {e}")
+
+    def _release(self, uid: str, codes: Iterable[str]) -> List[Tuple[str, str]]:
+        promotions = []
+        indexed = self._user_codes.get(uid, {})
+        for code in codes:
+            indexed.pop(code, None)
+            seats = self.seats.get(code)
+            if seats is None:
+                continue
+            with seats.lock:
+                seats.waitlist.pop(uid, None)
+                if uid in seats.holders:
+                    seats.holders.discard(uid)
+                    if seats.waitlist and len(seats.holders) < seats.capacity:
+                        promotions.append(self._promote_next(seats))
+        if not indexed:
+            self._user_codes.pop(uid, None)
+        return promotions
+
+    def status(self, uid: str) -> Dict[str, List[str]]:
+        """Courses a student holds and is waitlisted for"""
+        registered, waitlisted = [], []
+        with self.user_lock(uid):
+            codes = list(self._user_codes.get(uid, ()))
+        for code in codes:
+            seats = self.seats.get(code)
+            if seats is None:
+                continue
+            if uid in seats.holders:
+                registered.append(code)
+            elif uid in seats.waitlist:
+                waitlisted.append(code)
+        return {"registered": registered, "waitlisted": waitlisted}
+
+    def register(
+        self,
+        uid: str,
+        codes: Iterable[str],
+        held: Iterable[str] = (),
+        idempotency_key: Optional[str] = None,
+        persist: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        """Replace a student's registration with `codes`.
+
+        `held` is the student's currently persisted registration. Returns
+        {"registered", "waitlisted", "released"} course code lists. A repeated
+        idempotency key returns the first result without doing anything.
+        """
+        requested = tuple(dict.fromkeys(codes))
+        requested_seats = [self._seats(code) for code in requested]
+
+        promotions: List[Tuple[str, str]] = []
+        with self.user_lock(uid):
+            if idempotency_key is not None:
+                previous = self._idempotent_result(uid, idempotency_key, requested)
+                if previous is not None:
+                    return previous
+
+            indexed = self._user_codes.setdefault(uid, {})
+            for code in [code for code in indexed if code not in self.seats]:
+                del indexed[code]  # the course left the catalog
+            reserved, queued, registered, waitlisted = [], [], [], []
+            for code, seats in zip(requested, requested_seats):
+                with seats.lock:
+                    if uid in seats.holders:
+                        registered.append(code)
+                    elif len(seats.holders) < seats.capacity and not seats.waitlist:
+                        seats.holders.add(uid)
+                        reserved.append(code)
+                        registered.append(code)
+                    else:
+                        if uid not in seats.waitlist:
+                            seats.waitlist[uid] = None
+                            queued.append(code)
+                        waitlisted.append(code)
+                indexed[code] = None
+
+            # Drop seats and waitlist places the new submission no longer asks for
+            keep = set(requested)
+            dropped = [code for code in dict.fromkeys([*held, *indexed]) if code not in keep]
+            result = {"registered": registered, "waitlisted": waitlisted, "released": dropped}
+
+            failure = None
+            if persist is not None:
+                try:
+                    persist(result)
+                except Exception as e:
+                    failure = e
+            if failure is None:
+                promotions = self._release(uid, dropped)
+                if idempotency_key is not None:
+                    self._remember_result(uid, idempotency_key, requested, result)
+            else:
+                # Undo this submission's reservations and waitlist places
+                promotions = self._release(uid, reserved + queued)
+
+        self._notify(promotions)
+        if failure is not None:
+            raise failure
+        return result
+
+    def release_all(self, uid: str, persist: Optional[Callable[[], None]] = None):
+        """Drop all of a student's seats and waitlist places"""
+        with self.user_lock(uid):
+            if persist is not None:
+                persist()
+            promotions = self._release(uid, list(self._user_codes.get(uid, ())))
+        self._notify(promotions)
+
+    def _idempotent_result(self, uid: str, key: str, requested: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+        with self._idempotency_lock:
+            entry = self._idempotency.get((uid, key))
+            if entry is None:
+                return None
+            self._idempotency.move_to_end((uid, key))
+        previous_request, result = entry
+        if previous_request != requested:
+            raise IdempotencyConflictError("Idempotency key was already used for a different registration")
+        return result
+
+    def _remember_result(self, uid: str, key: str, requested: Tuple[str, ...], result: Dict[str, Any]):
+        with self._idempotency_lock:
+            self._idempotency[(uid, key)] = (requested, result)
+            while len(self._idempotency) > self._idempotency_capacity:
+                self._idempotency.popitem(last=False)
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Seat usage per course"""
+        return {
+            code: {"capacity": seats.capacity, "taken": len(seats.holders), "waitlisted": len(seats.waitlist)}
+            for code, seats in list(self.seats.items())
+        }
+
+
+class SqliteRegistrationEngine:
+    """RegistrationEngine with seats, waitlists and idempotency keys in SQLite.
+
+    `database` is the SqliteUserBackend holding the students' registrations.
+    Every operation runs in one of its write transactions (BEGIN IMMEDIATE),
+    which serializes writers across all worker processes sharing the file;
+    `persist` and `on_promote` write the student's registered courses in
+    that same transaction. Capacity is therefore checked and taken
+    atomically database-wide, and a failed write rolls back the seats too.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS course_seats (code TEXT PRIMARY KEY, capacity INTEGER NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS seat_holders (code TEXT NOT NULL, uid TEXT NOT NULL, PRIMARY KEY (code, uid))",
+        "CREATE INDEX IF NOT EXISTS seat_holders_uid_idx ON seat_holders (uid)",
+        # AUTOINCREMENT positions keep the waitlist in arrival order
+        "CREATE TABLE IF NOT EXISTS seat_waitlist ("
+        " position INTEGER PRIMARY KEY AUTOINCREMENT, code TEXT NOT NULL, uid TEXT NOT NULL, UNIQUE (code, uid))",
+        "CREATE INDEX IF NOT EXISTS seat_waitlist_uid_idx ON seat_waitlist (uid)",
+        "CREATE TABLE IF NOT EXISTS registration_requests ("
+        " uid TEXT NOT NULL, key TEXT NOT NULL, request TEXT NOT NULL, result TEXT NOT NULL, PRIMARY KEY (uid, key))",
+    )
+
+    def __init__(
+        self,
+        database,
+        capacities: Dict[str, int],
+        on_promote: Optional[Callable[[str, str], None]] = None,
+        idempotency_capacity: int = 100000,
+    ):
+        self.database = database
+        self.on_promote = on_promote
+        self._idempotency_capacity = idempotency_capacity
+        with database.transaction() as conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+            for code, capacity in capacities.items():
+                self._set_capacity(conn, code, capacity)
+            # Courses dropped from the catalog while the server was down
+            for (code,) in conn.execute("SELECT code FROM course_seats").fetchall():
+                if code not in capacities:
+                    self._remove_course(conn, code)
+
+    def load(self, registrations: Iterable[Tuple[str, Iterable[str]]]):
+        """Seed seat holders from already-persisted registrations (safe to repeat)"""
+        with self.database.transaction() as conn:
+            known = {code for (code,) in conn.execute("SELECT code FROM course_seats")}
+            conn.executemany(
+                "INSERT OR IGNORE INTO seat_holders (code, uid) VALUES (?, ?)",
+                [(code, uid) for uid, codes in registrations for code in codes if code in known],
+            )
+
+    def set_capacity(self, code: str, capacity: int):
+        """Add a course or change its capacity; a raised capacity admits waitlisted students"""
+        with self.database.transaction() as conn:
+            self._set_capacity(conn, code, capacity)
+
+    def remove_course(self, code: str):
+        """Forget a course that left the catalog, with its seats and waitlist"""
+        with self.database.transaction() as conn:
+            self._remove_course(conn, code)
+
+    @staticmethod
+    def _remove_course(conn, code: str):
+        for table in ("course_seats", "seat_holders", "seat_waitlist"):
+            conn.execute(f"DELETE FROM {table} WHERE code = ?", (code,))
+
+    def _set_capacity(self, conn, code: str, capacity: int):
+        conn.execute(
+            "INSERT INTO course_seats (code, capacity) VALUES (?, ?) "
+            "ON CONFLICT (code) DO UPDATE SET capacity = excluded.capacity",
+            (code, capacity),
+        )
+        while self._taken(conn, code) < capacity and self._promote_next(conn, code):
+            pass
+
+    @staticmethod
+    def _taken(conn, code: str) -> int:
+        return conn.execute("SELECT COUNT(*) FROM seat_holders WHERE code = ?", (code,)).fetchone()[0]
+
+    def _promote_next(self, conn, code: str) -> bool:
+        row = conn.execute(
+            "SELECT position, uid FROM seat_waitlist WHERE code = ? ORDER BY position LIMIT 1", (code,)
+        ).fetchone()
+        if row is None:
+            return False
+        position, uid = row
+        conn.execute("DELETE FROM seat_waitlist WHERE position = ?", (position,))
+        conn.execute("INSERT OR IGNORE INTO seat_holders (code, uid) VALUES (?, ?)", (code, uid))
+        if self.on_promote is not None:
+            try:
+                self.on_promote(uid, code)
+            except Exception as e:
+                print(f"Error recording waitlist promotion of {uid} into {code}: {e}")
+        return True
+
+    def _release(self, conn, uid: str, codes: Iterable[str]):
+        for code in codes:
+            conn.execute("DELETE FROM seat_waitlist WHERE code = ? AND uid = ?", (code, uid))
+            if conn.execute("DELETE FROM seat_holders WHERE code = ? AND uid = ?", (code, uid)).rowcount:
+                row = conn.execute("SELECT capacity FROM course_seats WHERE code = ?", (code,)).fetchone()
+                if row is not None and self._taken(conn, code) < row[0]:
+                    self._promote_next(conn, code)
+
+    @staticmethod
+    def _codes_of(conn, uid: str) -> Tuple[List[str], List[str]]:
+        held = [code for (code,) in conn.execute("SELECT code FROM seat_holders WHERE uid = ? ORDER BY code", (uid,))]
+        waiting = [code for (code,) in conn.execute("SELECT code FROM seat_waitlist WHERE uid = ? ORDER BY code", (uid,))]
+        return held, waiting
+
+    def status(self, uid: str) -> Dict[str, List[str]]:
+        """Courses a student holds and is waitlisted for"""
+        with self.database.transaction() as conn:
+            registered, waitlisted = self._codes_of(conn, uid)
+        return {"registered": registered, "waitlisted": waitlisted}
+
+    def register(
+        self,
+        uid: str,
+        codes: Iterable[str],
+        held: Iterable[str] = (),
+        idempotency_key: Optional[str] = None,
+        persist: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        """Replace a student's registration with `codes`; same contract as RegistrationEngine.register"""
+        requested = tuple(dict.fromkeys(codes))
+        with self.database.transaction() as conn:
+            capacities = {}
+            for code in requested:
+                row = conn.execute("SELECT capacity FROM course_seats WHERE code = ?", (code,)).fetchone()
+                if row is None:
+                    raise UnknownCourseError(f"Course {code} not found")
+                capacities[code] = row[0]
+
+            if idempotency_key is not None:
+                row = conn.execute(
+                    "SELECT request, result FROM registration_requests WHERE uid = ? AND key = ?", (uid, idempotency_key)
+                ).fetchone()
+                if row is not None:
+                    if tuple(json.loads(row[0])) != requested:
+                        raise IdempotencyConflictError("Idempotency key was already used for a different registration")
+                    return json.loads(row[1])
+
+            registered, waitlisted = [], []
+            for code in requested:
+                if conn.execute("SELECT 1 FROM seat_holders WHERE code = ? AND uid = ?", (code, uid)).fetchone():
+                    registered.append(code)
+                elif self._taken(conn, code) < capacities[code] and not conn.execute(
+                    "SELECT 1 FROM seat_waitlist WHERE code = ? LIMIT 1", (code,)
+                ).fetchone():
+                    conn.execute("INSERT INTO seat_holders (code, uid) VALUES (?, ?)", (code, uid))
+                    registered.append(code)
+                else:
+                    conn.execute("INSERT OR IGNORE INTO seat_waitlist (code, uid) VALUES (?, ?)", (code, uid))
+                    waitlisted.append(code)
+
+            # Drop seats and waitlist places the new submission no longer asks for
+            keep = set(requested)
+            holding, waiting = self._codes_of(conn, uid)
+            dropped = [code for code in dict.fromkeys([*held, *holding, *waiting]) if code not in keep]
+            result = {"registered": registered, "waitlisted": waitlisted, "released": dropped}
+
+            if persist is not None:
+                persist(result)
+            self._release(conn, uid, dropped)
+            if idempotency_key is not None:
+                conn.execute(
+                    "INSERT INTO registration_requests (uid, key, request, result) VALUES (?, ?, ?, ?)",
+                    (uid, idempotency_key, json.dumps(requested), json.dumps(result)),
+                )
+                conn.execute(
+                    "DELETE FROM registration_requests WHERE rowid <= (SELECT MAX(rowid) FROM registration_requests) - ?",
+                    (self._idempotency_capacity,),
+                )
+        return result
+
+    def release_all(self, uid: str, persist: Optional[Callable[[], None]] = None):
+        """Drop all of a student's seats and waitlist places"""
+        with self.database.transaction() as conn:
+            if persist is not None:
+                persist()
+            holding, waiting = self._codes_of(conn, uid)
+            self._release(conn, uid, dict.fromkeys(holding + waiting))
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Seat usage per course"""
+        with self.database.transaction() as conn:
+            rows = conn.execute(
+                "SELECT s.code, s.capacity,"
+                " (SELECT COUNT(*) FROM seat_holders h WHERE h.code = s.code),"
+                " (SELECT COUNT(*) FROM seat_waitlist w WHERE w.code = s.code)"
+                " FROM course_seats s ORDER BY s.code"
+            ).fetchall()
+        return {code: {"capacity": capacity, "taken": taken, "waitlisted": waiting} for code, capacity, taken, waiting in rows}
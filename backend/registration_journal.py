@@ -0,0 +1,141 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional
+
+
+def read_journal(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the records of a journal file; a torn last line from a crash is skipped"""
+    try:
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    print(f"Skipping unreadable journal entry in {path}")
+    except FileNotFoundError:
+        return
+
+
+class JournalCommit:
+    """Handle for one appended record; `wait` returns once it is on disk"""
+
+    __slots__ = ("_done", "error")
+
+    def __init__(self):
+        self._done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+    def _finish(self, error: Optional[BaseException] = None):
+        self.error = error
+        self._done.set()
+
+    def wait(self, timeout: Optional[float] = None):
+        if not self._done.wait(timeout):
+            raise TimeoutError("Journal write was not committed in time")
+        if self.error is not None:
+            raise self.error
+
+
+class RegistrationJournal:
+    """Append-only JSON-lines journal with group commit.
+
+    `append` queues a record and returns immediately; a single writer thread
+    drains the queue, waiting up to `flush_interval` seconds or `max_batch`
+    records, writes the batch and fsyncs once for all of it. Callers that
+    need durability `wait()` on the returned commit, so a burst of N writes
+    costs roughly N / batch fsyncs instead of N whole-file rewrites.
+
+    `records` replays the journal and `reset` truncates it once its contents
+    are captured in a snapshot.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 0.002, max_batch: int = 512):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue: "deque[tuple]" = deque()
+        self._cond = threading.Condition()
+        self._file_lock = threading.Lock()
+        self._closed = False
+        self._drop_torn_tail()
+        self._file = open(path, "ab")
+        self.size = sum(1 for _ in self.records())
+        self.batches = 0
+        self._writer = threading.Thread(target=self._run, name="registration-journal", daemon=True)
+        self._writer.start()
+
+    def _drop_torn_tail(self):
+        # Cut a partial last line left by a crash so new appends start on a fresh line
+        try:
+            with open(self.path, "rb+") as f:
+                data = f.read()
+                if data and not data.endswith(b"\n"):
+                    f.truncate(data.rfind(b"\n") + 1)
+        except FileNotFoundError:
+            pass
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        return read_journal(self.path)
+
+    def append(self, record: Dict[str, Any]) -> JournalCommit:
+        commit = JournalCommit()
+        line = json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Journal is closed")
+            self._queue.append((line, commit))
+            self._cond.notify()
+        return commit
+
+    def _take_batch(self) -> List[tuple]:
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if not self._queue:
+                return []
+            # Give concurrent writers a moment to join this batch
+            deadline = time.monotonic() + self.flush_interval
+            while len(self._queue) < self.max_batch and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return [self._queue.popleft() for _ in range(min(len(self._queue), self.max_batch))]
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            error = None
+            try:
+                with self._file_lock:
+                    self._file.write(b"".join(line for line, _ in batch))
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                    self.size += len(batch)
+                    self.batches += 1
+            except Exception as e:
+                print(f"Error writing registration journal: {e}")
+                error = e
+            for _, commit in batch:
+                commit._finish(error)
+
+    def reset(self):
+        """Truncate the journal after its records were written to a snapshot"""
+        with self._file_lock:
+            self._file.truncate(0)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.size = 0
+
+    def close(self):
+        """Flush queued records and stop the writer thread"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join()
+        self._file.close()
@@ -0,0 +1,106 @@
+import heapq
+import math
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a about an and any are as at be can courses course do dr for from have how i in is it me "
+    "of on or prof professor should some take teach teaches that the there to what which who with you".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class SearchIndex:
+    """In-process BM25 keyword index over course name, description and faculty.
+
+    Postings map each term to (document, weighted term frequency) pairs. Query
+    terms also match indexed terms they are a prefix of ("stat" finds
+    "statistics"), at a discount. Built once per catalog version.
+    """
+
+    # Name matches count more than description or faculty matches
+    FIELD_WEIGHTS = {"name": 2.0, "description": 1.0, "faculty": 1.0}
+    PREFIX_WEIGHT = 0.7
+    MIN_PREFIX_LENGTH = 3
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = None
+        # (postings, vocabulary, document lengths, average length, courses),
+        # swapped as a single tuple so searches see one consistent build
+        self._compiled: Tuple = ({}, [], [], 0.0, ())
+
+    def compile(self, catalog):
+        if catalog.version == self.version:
+            return
+        with self._lock:
+            if catalog.version == self.version:
+                return
+            postings: Dict[str, List[Tuple[int, float]]] = {}
+            lengths = []
+            for doc_id, course in enumerate(catalog.courses):
+                frequencies = Counter()
+                fields = {
+                    "name": course.name,
+                    "description": course.description,
+                    "faculty": course.faculty.name,
+                }
+                length = 0
+                for field, text in fields.items():
+                    tokens = tokenize(text)
+                    length += len(tokens)
+                    for token in tokens:
+                        frequencies[token] += self.FIELD_WEIGHTS[field]
+                for term, frequency in frequencies.items():
+                    postings.setdefault(term, []).append((doc_id, frequency))
+                lengths.append(length)
+            average_length = sum(lengths) / len(lengths) if lengths else 0.0
+            self._compiled = (postings, sorted(postings), lengths, average_length, catalog.courses)
+            self.version = catalog.version
+
+    def _expand(self, vocabulary: List[str], token: str) -> List[Tuple[str, float]]:
+        """Indexed terms matching a query token: exact, then prefix matches"""
+        if len(token) < self.MIN_PREFIX_LENGTH:
+            i = bisect_left(vocabulary, token)
+            return [(token, 1.0)] if i < len(vocabulary) and vocabulary[i] == token else []
+        terms = []
+        i = bisect_left(vocabulary, token)
+        while i < len(vocabulary) and vocabulary[i].startswith(token):
+            term = vocabulary[i]
+            terms.append((term, 1.0 if term == token else self.PREFIX_WEIGHT))
+            i += 1
+        return terms
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[Dict[str, Any], float]]:
+        """Top-k (course_info, score) pairs ranked by BM25"""
+        postings, vocabulary, lengths, average_length, documents = self._compiled
+        if not documents:
+            return []
+        tokens = [token for token in dict.fromkeys(tokenize(query)) if token not in STOPWORDS]
+        scores: Dict[int, float] = {}
+        for token in tokens:
+            # Best contribution per document for this query token, so one
+            # token expanding to several terms is not counted several times
+            best: Dict[int, float] = {}
+            for term, weight in self._expand(vocabulary, token):
+                term_postings = postings[term]
+                idf = math.log(1 + (len(documents) - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+                for doc_id, frequency in term_postings:
+                    norm = self.K1 * (1 - self.B + self.B * lengths[doc_id] / average_length)
+                    score = weight * idf * frequency * (self.K1 + 1) / (frequency + norm)
+                    if score > best.get(doc_id, 0.0):
+                        best[doc_id] = score
+            for doc_id, score in best.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + score
+        ranked = heapq.nsmallest(k, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(documents[doc_id].info(), score) for doc_id, score in ranked]
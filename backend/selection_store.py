@@ -0,0 +1,141 @@
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, List
+
+
+class SelectionError(Exception):
+    """Base class for selection errors; carries the HTTP status to report"""
+
+    status_code = 400
+
+
+class AlreadySelectedError(SelectionError):
+    pass
+
+
+class SelectionLimitError(SelectionError):
+    pass
+
+
+class NotSelectedError(SelectionError):
+    status_code = 404
+
+
+class MemorySelectionStore:
+    """Per-user selected courses kept in process memory.
+
+    Each user's selection is an insertion-ordered dict used as an ordered set
+    (code -> course info), so add, remove and membership are O(1). Updates
+    take one of a fixed set of striped locks, so the limit check and the
+    insert happen atomically without serializing unrelated users.
+    """
+
+    LOCK_STRIPES = 64
+
+    def __init__(self):
+        self._selections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+
+    def _lock(self, user_key: str) -> threading.Lock:
+        return self._locks[hash(user_key) % self.LOCK_STRIPES]
+
+    def list(self, user_key: str) -> List[Dict[str, Any]]:
+        return list(self._selections.get(user_key, {}).values())
+
+    def add(self, user_key: str, course_info: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+        with self._lock(user_key):
+            selection = self._selections.setdefault(user_key, {})
+            if course_info["code"] in selection:
+                raise AlreadySelectedError("Course is already selected")
+            if len(selection) >= limit:
+                raise SelectionLimitError(f"You cannot add more than {limit} courses.")
+            selection[course_info["code"]] = course_info
+            return list(selection.values())
+
+    def remove(self, user_key: str, course_code: str) -> List[Dict[str, Any]]:
+        with self._lock(user_key):
+            selection = self._selections.get(user_key, {})
+            if selection.pop(course_code, None) is None:
+                raise NotSelectedError("Course not found in selected courses")
+            if not selection:
+                self._selections.pop(user_key, None)
+            return list(selection.values())
+
+
+class SqliteSelectionStore:
+    """Per-user selected courses in a SQLite database shared by all workers.
+
+    The limit check and insert run in one BEGIN IMMEDIATE transaction, so
+    concurrent requests from different uvicorn workers cannot exceed it.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS selected_courses (
+            user_key TEXT NOT NULL,
+            code TEXT NOT NULL,
+            course TEXT NOT NULL,
+            PRIMARY KEY (user_key, code)
+        );
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connect().executescript(self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _list(conn: sqlite3.Connection, user_key: str) -> List[Dict[str, Any]]:
+        rows = conn.execute(
+            "SELECT course FROM selected_courses WHERE user_key = ? ORDER BY rowid", (user_key,)
+        ).fetchall()
+        return [json.loads(course) for (course,) in rows]
+
+    def list(self, user_key: str) -> List[Dict[str, Any]]:
+        return self._list(self._connect(), user_key)
+
+    def add(self, user_key: str, course_info: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            codes = [code for (code,) in conn.execute(
+                "SELECT code FROM selected_courses WHERE user_key = ?", (user_key,)
+            )]
+            if course_info["code"] in codes:
+                raise AlreadySelectedError("Course is already selected")
+            if len(codes) >= limit:
+                raise SelectionLimitError(f"You cannot add more than {limit} courses.")
+            conn.execute(
+                "INSERT INTO selected_courses (user_key, code, course) VALUES (?, ?, ?)",
+                (user_key, course_info["code"], json.dumps(course_info)),
+            )
+            return self._list(conn, user_key)
+
+    def remove(self, user_key: str, course_code: str) -> List[Dict[str, Any]]:
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            deleted = conn.execute(
+                "DELETE FROM selected_courses WHERE user_key = ? AND code = ?", (user_key, course_code)
+            ).rowcount
+            if not deleted:
+                raise NotSelectedError("Course not found in selected courses")
+            return self._list(conn, user_key)
+
+
+def create_selection_store(kind: str, db_path: str):
+    """Build the configured selection store ("memory" or "sqlite")"""
+    if kind == "memory":
+        return MemorySelectionStore()
+    if kind == "sqlite":
+        return SqliteSelectionStore(db_path)
+    raise ValueError(f"Unknown selection store backend: {kind}")
@@ -0,0 +1,206 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class SessionError(Exception):
+    """Invalid, expired or revoked session token"""
+
+    status_code = 401
+
+
+class Session:
+    """A verified session decoded from a token"""
+
+    __slots__ = ("uid", "name", "sid", "expires_at")
+
+    def __init__(self, uid: str, name: str, sid: str, expires_at: float):
+        self.uid = uid
+        self.name = name
+        self.sid = sid
+        self.expires_at = expires_at
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+def load_or_create_secret(path: str) -> bytes:
+    """Signing key shared by all workers: read from `path`, or created there once"""
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        for _ in range(50):
+            with open(path, "rb") as f:
+                secret = f.read()
+            if secret:
+                return secret
+            time.sleep(0.01)  # another worker is writing it right now
+        raise RuntimeError(f"Session key file {path} is empty")
+    secret = secrets.token_bytes(32)
+    with os.fdopen(fd, "wb") as f:
+        f.write(secret)
+    return secret
+
+
+class RevocationList:
+    """Revoked session ids with their expiry, held in this process only"""
+
+    def __init__(self):
+        self._revoked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, sid: str, expires_at: float):
+        now = time.time()
+        with self._lock:
+            self._revoked[sid] = expires_at
+            # Forget revocations for tokens that have expired anyway
+            if len(self._revoked) % 1024 == 0:
+                self._revoked = {sid: exp for sid, exp in self._revoked.items() if exp > now}
+
+    def __contains__(self, sid: str) -> bool:
+        return sid in self._revoked
+
+
+class FileRevocationList(RevocationList):
+    """RevocationList that survives restarts: one "<sid> <expiry>" line per logout.
+
+    For a single server process (the json user store); the file is read
+    once at startup and rewritten without the expired entries.
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        now = time.time()
+        try:
+            with open(path, "r") as f:
+                for line in f:
+                    sid, _, expires_at = line.partition(" ")
+                    try:
+                        if float(expires_at) > now:
+                            self._revoked[sid] = float(expires_at)
+                    except ValueError:
+                        continue  # torn last line
+        except FileNotFoundError:
+            pass
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.writelines(f"{sid} {exp}\n" for sid, exp in self._revoked.items())
+        os.replace(tmp_path, path)
+        self._file = open(path, "a")
+
+    def add(self, sid: str, expires_at: float):
+        super().add(sid, expires_at)
+        with self._lock:
+            self._file.write(f"{sid} {expires_at}\n")
+            self._file.flush()
+
+
+class SqliteRevocationList:
+    """Revoked session ids in the SQLite database shared by all workers.
+
+    `database` is the SqliteUserBackend; a logout on one worker is seen by
+    the others at their next verification, and survives restarts.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS revoked_sessions (sid TEXT PRIMARY KEY, expires_at REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS revoked_sessions_expiry_idx ON revoked_sessions (expires_at)",
+    )
+
+    def __init__(self, database):
+        self.database = database
+        with database.transaction() as conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+
+    def add(self, sid: str, expires_at: float):
+        with self.database.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO revoked_sessions (sid, expires_at) VALUES (?, ?)", (sid, expires_at))
+            conn.execute("DELETE FROM revoked_sessions WHERE expires_at <= ?", (time.time(),))
+
+    def __contains__(self, sid: str) -> bool:
+        return self.database.connection().execute(
+            "SELECT 1 FROM revoked_sessions WHERE sid = ?", (sid,)
+        ).fetchone() is not None
+
+
+class SessionManager:
+    """HMAC-SHA256 signed session tokens: `<payload>.<signature>`, base64url.
+
+    The payload carries uid, display name, a random session id and expiry,
+    so verification needs only the key - no user store lookup. Verified
+    tokens are kept in a bounded LRU so repeat requests skip the HMAC and
+    JSON decode too; expiry and revocation are still checked every time.
+    Revoked session ids are kept in `revocations` (by default this process's
+    memory) until their tokens would expire.
+    """
+
+    def __init__(self, secret: bytes, ttl: float = 7 * 24 * 3600, cache_size: int = 10000, revocations=None):
+        self.secret = secret
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self.revocations = revocations if revocations is not None else RevocationList()
+        self._cache: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _sign(self, payload: bytes) -> bytes:
+        return base64.urlsafe_b64encode(hmac.new(self.secret, payload, hashlib.sha256).digest()).rstrip(b"=")
+
+    def issue(self, uid: str, name: str) -> str:
+        claims = {"uid": uid, "name": name, "sid": secrets.token_urlsafe(12), "exp": int(time.time() + self.ttl)}
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+        return f"{payload}.{self._sign(payload.encode('ascii')).decode('ascii')}"
+
+    def _decode(self, token: str) -> Session:
+        # Tokens arrive from a header decoded as latin-1; anything outside our
+        # ASCII alphabet or otherwise malformed is just an invalid token
+        try:
+            payload, _, signature = token.encode("ascii").partition(b".")
+            if not signature or not hmac.compare_digest(signature, self._sign(payload)):
+                raise SessionError("Invalid session token")
+            claims = json.loads(_b64decode(payload))
+            return Session(claims["uid"], claims.get("name", ""), claims["sid"], float(claims["exp"]))
+        except (UnicodeError, ValueError, KeyError, TypeError, AttributeError):
+            raise SessionError("Invalid session token")
+
+    def verify(self, token: str) -> Session:
+        """Return the session for a token, or raise SessionError"""
+        with self._lock:
+            session = self._cache.get(token)
+            if session is not None:
+                self._cache.move_to_end(token)
+        if session is None:
+            session = self._decode(token)
+            with self._lock:
+                self._cache[token] = session
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        if session.expires_at <= time.time():
+            self._forget(token)
+            raise SessionError("Session expired")
+        if session.sid in self.revocations:
+            raise SessionError("Session revoked")
+        return session
+
+    def _forget(self, token: str):
+        with self._lock:
+            self._cache.pop(token, None)
+
+    def revoke(self, token: str):
+        """Invalidate a token before its expiry (logout)"""
+        session = self._decode(token)
+        self.revocations.add(session.sid, session.expires_at)
+        self._forget(token)
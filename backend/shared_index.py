@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+from typing import Callable, Iterable, Optional, Tuple
+
+import numpy as np
+
+from similarity import EmbeddingIndex
+
+try:
+    import fcntl
+except ImportError:  # no flock on this platform; workers may build concurrently
+    fcntl = None
+
+
+def index_key(model: str, courses: Iterable[Tuple[str, str]]) -> str:
+    """Content hash of the embedding model and every (course code, text) pair, in order.
+
+    The codes are part of the key because the published index maps rows to
+    codes: renaming a course without touching its text changes the index.
+    """
+    digest = hashlib.sha256(model.encode("utf-8"))
+    for code, text in courses:
+        for value in (code, text):
+            digest.update(b"\0")
+            digest.update(value.encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+class SharedIndexStore:
+    """Normalized embedding matrices published to disk for all worker processes.
+
+    An index is stored as `index-<key>.npy` (the float32 matrix) plus
+    `index-<key>.codes.json`, where the key hashes the model and the
+    catalog's course codes and texts. Workers attach with a read-only memory map, so every process
+    shares the same page-cache pages instead of holding its own copy.
+    The first worker to find no index takes an exclusive file lock and
+    builds it while the others wait; both files are renamed into place,
+    codes last, so a worker never sees a half-written index.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"index-{key}{suffix}")
+
+    def attach(self, key: str) -> Optional[EmbeddingIndex]:
+        """Map a published index, or None if there is none for this key"""
+        try:
+            with open(self._path(key, ".codes.json"), "r") as f:
+                codes = json.load(f)
+            matrix = np.load(self._path(key, ".npy"), mmap_mode="r")
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+        if matrix.ndim != 2 or len(matrix) != len(codes):
+            print(f"Ignoring inconsistent shared embedding index {key}")
+            return None
+        return EmbeddingIndex(codes, matrix)
+
+    def publish(self, key: str, index: EmbeddingIndex):
+        """Write an index for other workers and drop indexes for older catalogs"""
+        os.makedirs(self.directory, exist_ok=True)
+        matrix_path = self._path(key, ".npy")
+        codes_path = self._path(key, ".codes.json")
+        np.save(f"{matrix_path}.tmp.npy", np.ascontiguousarray(index.matrix, dtype=np.float32))
+        with open(f"{codes_path}.tmp", "w") as f:
+            json.dump(index.codes, f)
+        os.replace(f"{matrix_path}.tmp.npy", matrix_path)
+        os.replace(f"{codes_path}.tmp", codes_path)
+
+        # Workers still mapping an old file keep their pages until they move on
+        for name in os.listdir(self.directory):
+            if name.startswith("index-") and not name.startswith(f"index-{key}"):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def get_or_build(self, key: str, build: Callable[[], Tuple[EmbeddingIndex, bool]]) -> EmbeddingIndex:
+        """Attach to the published index, building and publishing it first if needed.
+
+        `build` returns (index, complete); an incomplete index (some courses
+        failed to embed) is used by this worker but not published.
+        """
+        index = self.attach(key)
+        if index is not None:
+            return index
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(key, ".lock"), "w") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # Another worker may have published while we waited for the lock
+                index = self.attach(key)
+                if index is not None:
+                    return index
+                index, complete = build()
+                if not complete:
+                    return index
+                self.publish(key, index)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return self.attach(key) or index
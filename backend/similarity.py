@@ -0,0 +1,200 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row in place; all-zero rows are left as zeros"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+def unit_vector(vector: Iterable[float]) -> np.ndarray:
+    """Return `vector` as a float32 unit vector (zeros stay zeros)"""
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def top_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first"""
+    k = min(k, len(scores))
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def _stack(kept: np.ndarray, added: np.ndarray) -> np.ndarray:
+    return np.concatenate([kept, added]) if len(kept) else added
+
+
+class EmbeddingIndex:
+    """Course embeddings held as one pre-normalized float32 matrix.
+
+    Row i of `matrix` is the unit vector for `codes[i]`, so cosine similarity
+    against every course is a single matrix-vector product.
+    """
+
+    def __init__(self, codes: List[str], matrix: np.ndarray):
+        self.codes = list(codes)
+        self.matrix = matrix
+        self.rows: Dict[str, int] = {code: i for i, code in enumerate(self.codes)}
+
+    @classmethod
+    def build(cls, codes: Iterable[str], vectors: Iterable[Iterable[float]]) -> "EmbeddingIndex":
+        codes = list(codes)
+        matrix = np.array(list(vectors), dtype=np.float32)
+        if not codes:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        return cls(codes, normalize_rows(matrix))
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self.rows
+
+    def vector(self, code: str) -> np.ndarray:
+        return self.matrix[self.rows[code]]
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of a unit query vector against every course"""
+        return self.matrix @ query
+
+    def _scores_excluding(self, query: np.ndarray, k: int, exclude: Optional[str]) -> Tuple[np.ndarray, int]:
+        scores = self.scores(query)
+        if exclude is not None and exclude in self.rows:
+            scores[self.rows[exclude]] = -np.inf
+            k = min(k, len(self.codes) - 1)
+        return scores, k
+
+    def top_k(self, query: np.ndarray, k: int, exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Return the k most similar (code, score) pairs for a unit query vector"""
+        if not len(self.codes) or k <= 0:
+            return []
+        scores, k = self._scores_excluding(query, k, exclude)
+        if k <= 0:
+            return []
+        return [(self.codes[i], float(scores[i])) for i in top_indices(scores, k)]
+
+    def similar_to(self, code: str, k: int) -> List[Tuple[str, float]]:
+        """Return the k courses most similar to `code`, excluding itself"""
+        return self.top_k(self.vector(code), k, exclude=code)
+
+    def _width(self) -> int:
+        return self.matrix.shape[1]
+
+    def _kept_rows(self, vectors: Dict[str, Iterable[float]], removed: Iterable[str]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        dropped = set(removed) | set(vectors)
+        kept = [code for code in self.codes if code not in dropped]
+        rows = np.fromiter((self.rows[code] for code in kept), dtype=np.int64, count=len(kept))
+        if vectors:
+            added = np.array(list(vectors.values()), dtype=np.float32)
+        else:
+            added = np.zeros((0, self._width()), dtype=np.float32)
+        return kept + list(vectors), rows, normalize_rows(added)
+
+    def with_changes(self, vectors: Dict[str, Iterable[float]], removed: Iterable[str] = ()) -> "EmbeddingIndex":
+        """New index with `vectors` added or replaced and `removed` codes dropped.
+
+        Unchanged rows are copied over as they are, so only the changed
+        vectors are normalized; this index is left untouched.
+        """
+        codes, rows, added = self._kept_rows(vectors, removed)
+        return type(self)(codes, _stack(np.asarray(self.matrix[rows], dtype=np.float32), added))
+
+
+class QuantizedIndex(EmbeddingIndex):
+    """Embedding index scanned in a compact float16 or int8 copy of the matrix.
+
+    int8 rows are scaled per vector (row / max|row| * 127) and the scale is
+    applied to the scores. With `rerank` > 0 the best k * rerank candidates
+    from the compact scan are re-scored against the full-precision matrix,
+    which may be a shared memory map (only the candidate rows are touched).
+    With `rerank` = 0 the full matrix is dropped and vectors are dequantized.
+    """
+
+    MODES = ("float16", "int8")
+    CHUNK_ROWS = 1024  # rows upcast to float32 at a time while scanning
+
+    def __init__(self, codes: List[str], matrix: np.ndarray, mode: str = "int8", rerank: int = 4):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown quantization mode: {mode}")
+        super().__init__(codes, matrix)
+        self.mode = mode
+        self.rerank = rerank
+        self.data, self.scales = self._quantize(matrix, mode)
+        if not rerank:
+            self.matrix = None
+
+    @staticmethod
+    def _quantize(matrix: np.ndarray, mode: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        if mode == "float16":
+            return np.asarray(matrix, dtype=np.float16), None
+        peaks = np.abs(matrix).max(axis=1) if len(matrix) else np.zeros(0, dtype=np.float32)
+        peaks[peaks == 0] = 1.0
+        return np.round(matrix / peaks[:, None] * 127).astype(np.int8), (peaks / 127).astype(np.float32)
+
+    @classmethod
+    def from_index(cls, index: EmbeddingIndex, mode: str, rerank: int = 4) -> "QuantizedIndex":
+        return cls(index.codes, index.matrix, mode, rerank)
+
+    def with_changes(self, vectors: Dict[str, Iterable[float]], removed: Iterable[str] = ()) -> "QuantizedIndex":
+        """Like EmbeddingIndex.with_changes; only the changed vectors are quantized"""
+        codes, rows, added = self._kept_rows(vectors, removed)
+        data, scales = self._quantize(added, self.mode)
+        index = QuantizedIndex.__new__(QuantizedIndex)
+        matrix = None
+        if self.matrix is not None:
+            matrix = _stack(np.asarray(self.matrix[rows], dtype=np.float32), added)
+        EmbeddingIndex.__init__(index, codes, matrix)
+        index.mode = self.mode
+        index.rerank = self.rerank
+        index.data = _stack(self.data[rows], data)
+        index.scales = None if scales is None else _stack(self.scales[rows], scales)
+        return index
+
+    def _width(self) -> int:
+        return self.data.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        """Private memory of the compact copy (the full matrix may be shared)"""
+        return self.data.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def vector(self, code: str) -> np.ndarray:
+        row = self.rows[code]
+        if self.matrix is not None:
+            return np.asarray(self.matrix[row], dtype=np.float32)
+        vector = self.data[row].astype(np.float32)
+        return vector * self.scales[row] if self.scales is not None else vector
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        for start in range(0, len(self.codes), self.CHUNK_ROWS):
+            block = self.data[start:start + self.CHUNK_ROWS].astype(np.float32)
+            scores[start:start + self.CHUNK_ROWS] = block @ query
+        if self.scales is not None:
+            scores *= self.scales
+        return scores
+
+    def top_k(self, query: np.ndarray, k: int, exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        if self.matrix is None or not self.rerank:
+            return super().top_k(query, k, exclude)
+        if not len(self.codes) or k <= 0:
+            return []
+        scores, k = self._scores_excluding(query, k, exclude)
+        if k <= 0:
+            return []
+        candidates = top_indices(scores, k * self.rerank)
+        candidates = np.sort(candidates[np.isfinite(scores[candidates])])
+        exact = np.asarray(self.matrix[candidates], dtype=np.float32) @ query
+        return [(self.codes[candidates[i]], float(exact[i])) for i in top_indices(exact, k)]
@@ -0,0 +1,86 @@
+"""Local stand-in for the OpenAI API, for exercising the backend offline.
+
+Run it with `uvicorn stub_llm_server:app --port 9000` and start the backend
+with OPENAI_BASE_URL=http://localhost:9000/v1 and any OPENAI_API_KEY.
+STUB_LATENCY (seconds) delays every completion to simulate a slow upstream.
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+from embedding_pipeline import FakeEmbeddingClient
+
+app = FastAPI()
+
+STUB_LATENCY = float(os.getenv("STUB_LATENCY", "0.5"))
+fake_embeddings = FakeEmbeddingClient(dimensions=int(os.getenv("STUB_EMBEDDING_DIMENSIONS", "1536")))
+
+
+def stub_answer(messages) -> str:
+    question = messages[-1]["content"] if messages else ""
+    return f"For '{question[:80]}', you might look at CS101: Probability and Statistics and CS201: Neural Network Basics."
+
+
+def stream_answer(body, answer: str):
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+    def chunk(delta, finish_reason=None) -> str:
+        return "data: " + json.dumps({
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }) + "\n\n"
+
+    async def events():
+        words = answer.split(" ")
+        for i, word in enumerate(words):
+            # Spread the simulated latency over the tokens
+            await asyncio.sleep(STUB_LATENCY / len(words))
+            yield chunk({"content": word if i == 0 else f" {word}"})
+        yield chunk({}, "stop")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    answer = stub_answer(body.get("messages", []))
+    if body.get("stream"):
+        return stream_answer(body, answer)
+    await asyncio.sleep(STUB_LATENCY)
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": answer},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+    return {
+        "object": "list",
+        "data": [
+            {"object": "embedding", "index": i, "embedding": fake_embeddings.vector(text)}
+            for i, text in enumerate(texts)
+        ],
+        "model": body.get("model", "stub"),
+        "usage": {"prompt_tokens": 0, "total_tokens": 0},
+    }
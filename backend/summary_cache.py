@@ -0,0 +1,181 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+def cache_key(*parts: Any) -> str:
+    """Hash of JSON-serializable parts, e.g. an input text plus the model and parameters applied to it"""
+    payload = json.dumps(list(parts), sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def summary_key(description: str, model: str, params: Dict[str, Any]) -> str:
+    """Hash of the description plus everything that shapes the completion"""
+    return cache_key(model, params, description.strip())
+
+
+class ComputeCache:
+    """LRU + TTL cache of computed values with single-flight misses.
+
+    Concurrent requests for the same key share one upstream call, which runs
+    in its own task so a caller giving up doesn't cancel it for the others.
+    When `path` is set, new entries are appended to a JSON-lines file by a
+    background thread; the file is replayed on startup and compacted whenever
+    it reaches twice `max_entries` lines, so persisted values must be JSON.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 7 * 24 * 3600, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._file_lock = threading.Lock()
+        self._file_lines = 0
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        if path:
+            # A single thread keeps file writes in order and off the event loop
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-writer")
+            self._load()
+
+    def _load(self):
+        now = time.time()
+        try:
+            with open(self.path, "r") as f:
+                for line in f:
+                    try:
+                        key, value, expires_at = json.loads(line)
+                    except ValueError:
+                        continue
+                    if expires_at > now:
+                        self._entries[key] = (value, expires_at)
+                        self._entries.move_to_end(key)
+        except FileNotFoundError:
+            return
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._file_lines = len(self._entries)
+        self._rewrite(list(self._entries.items()))
+
+    def _rewrite(self, entries: List[Tuple[str, tuple]]):
+        # A unique temp file per writer: workers starting together each rewrite the file
+        with self._file_lock:
+            with tempfile.NamedTemporaryFile(
+                "w", dir=os.path.dirname(self.path) or ".", prefix=os.path.basename(self.path) + ".", suffix=".tmp", delete=False
+            ) as f:
+                for key, (value, expires_at) in entries:
+                    f.write(json.dumps([key, value, expires_at]) + "\n")
+            try:
+                os.replace(f.name, self.path)
+            except OSError:
+                os.remove(f.name)
+                raise
+
+    def _append(self, key: str, value: Any, expires_at: float):
+        try:
+            with self._file_lock:
+                with open(self.path, "a") as f:
+                    f.write(json.dumps([key, value, expires_at]) + "\n")
+        except OSError as e:
+            print(f"Error persisting cache entry to {self.path}: {e}")
+
+    def _compact(self, entries: List[Tuple[str, tuple]]):
+        # Entries other workers appended since this worker's snapshot are dropped
+        try:
+            self._rewrite(entries)
+        except OSError as e:
+            print(f"Error compacting cache file {self.path}: {e}")
+
+    def _persist(self, key: str, value: Any, expires_at: float):
+        self._file_lines += 1
+        if self._file_lines < 2 * self.max_entries:
+            self._writer.submit(self._append, key, value, expires_at)
+            return
+        now = time.time()
+        live = [(k, entry) for k, entry in self._entries.items() if entry[1] > now]
+        self._file_lines = len(live)
+        self._writer.submit(self._compact, live)
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.time():
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any):
+        expires_at = time.time() + self.ttl
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        if self._writer is not None:
+            self._persist(key, value, expires_at)
+
+    def lookup(self, key: str) -> Optional[Any]:
+        """get() that also counts a hit or miss"""
+        value = self.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value, joining an in-flight computation if there is one"""
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._compute(key, compute))
+            self._inflight[key] = task
+            # Mark the exception retrieved when every caller gave up waiting
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        # Cancelling one caller leaves the computation running for the rest
+        return await asyncio.shield(task)
+
+    async def _compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await compute()
+            self.put(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def close(self):
+        """Finish pending file writes"""
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SummaryCache(ComputeCache):
+    """ComputeCache of generated course summaries, keyed by summary_key"""
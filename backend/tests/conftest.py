@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+# The backend modules are imported flat, the way uvicorn runs them from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def app_client(tmp_path_factory):
+    """TestClient for main.app, imported in an empty directory with the json user store"""
+    directory = tmp_path_factory.mktemp("app")
+    previous = os.getcwd()
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv("OPENAI_API_KEY", "")
+        patch.setenv("SESSION_SECRET", "test-secret")
+        patch.setenv("USER_STORE_BACKEND", "json")
+        patch.setenv("PASSWORD_HASH_WORKERS", "1")
+        os.chdir(directory)
+        try:
+            from fastapi.testclient import TestClient
+
+            import main
+            with TestClient(main.app) as client:
+                yield client
+        finally:
+            os.chdir(previous)
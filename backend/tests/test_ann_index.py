@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from ann_index import IVFIndex
+from similarity import normalize_rows, top_indices
+
+
+def random_vectors(count, dimensions=16, seed=0):
+    return normalize_rows(np.random.default_rng(seed).normal(size=(count, dimensions)).astype(np.float32))
+
+
+def exact(codes, matrix, query, k):
+    scores = matrix @ query
+    return [codes[i] for i in top_indices(scores, k)]
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_probing_every_list_is_an_exact_search(dtype):
+    matrix = random_vectors(400)
+    codes = [f"C{i}" for i in range(len(matrix))]
+    index = IVFIndex(codes, matrix, dtype=dtype)
+
+    assert len(index) == 400 and index.nlist == 20
+    for query in random_vectors(5, seed=1):
+        found = index.search(query, 10, nprobe=index.nlist)
+        assert [code for code, _ in found] == exact(codes, matrix, query, 10)
+        assert all(-1.0 <= score <= 1.0 for _, score in found)
+
+
+def test_with_changes_adds_replaces_and_removes_without_touching_the_original():
+    matrix = random_vectors(100)
+    codes = [f"C{i}" for i in range(len(matrix))]
+    index = IVFIndex(codes, matrix)
+    moved, fresh = random_vectors(2, seed=2)
+
+    changed = index.with_changes({"C0": moved * 3, "NEW": fresh}, removed=["C1", "MISSING"])
+
+    assert len(index) == 100 and "C1" in index and "NEW" not in index
+    assert len(changed) == 100 and "C1" not in changed and "NEW" in changed
+    assert changed.centroids is index.centroids  # not grown enough to recluster
+    for code, vector in (("C0", moved), ("NEW", fresh)):
+        best, score = changed.search(vector, 1, nprobe=changed.nlist)[0]
+        assert best == code and score == pytest.approx(1.0, abs=1e-5)
+    assert index.search(moved, 1, nprobe=index.nlist)[0][0] != "C0"
+    assert all(code != "C1" for code, _ in changed.search(matrix[1], 100, nprobe=changed.nlist))
+    # Lists that did not change are shared, not copied
+    assert sum(a is b for a, b in zip(index.lists, changed.lists)) >= index.nlist - 4
+
+
+def test_index_reclusters_once_it_has_doubled():
+    index = IVFIndex([], np.zeros((0, 0), dtype=np.float32))
+    assert index.search(random_vectors(1)[0], 5) == []
+
+    matrix = random_vectors(300)
+    index = index.with_changes({f"C{i}": vector for i, vector in enumerate(matrix[:9])})
+    assert index.nlist == 3
+    index = index.with_changes({f"C{i}": vector for i, vector in enumerate(matrix[9:18], start=9)})
+    assert index.nlist == 3 and index.trained_size == 9
+    index = index.with_changes({f"C{i}": vector for i, vector in enumerate(matrix[18:], start=18)})
+    assert index.nlist == 17 and index.trained_size == 300
+
+    codes = [f"C{i}" for i in range(300)]
+    query = random_vectors(1, seed=3)[0]
+    assert [code for code, _ in index.search(query, 5, nprobe=index.nlist)] == exact(codes, matrix, query, 5)
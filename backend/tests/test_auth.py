@@ -0,0 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+def test_signup_racing_for_an_email_is_a_400(app_client, monkeypatch):
+    import main
+
+    signup = {"name": "Ada", "email": "race@example.com", "password": "secret-1"}
+    assert app_client.post("/signup", json=signup).status_code == 200
+
+    # The second signup passed the existence check before the first one was stored
+    monkeypatch.setattr(main, "find_user_by_email", lambda email: None)
+    response = app_client.post("/signup", json=signup)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already exists"
+
+
+def test_blank_password_never_logs_in(app_client):
+    import main
+
+    # A record imported without a password, stored as an empty legacy plaintext
+    main.user_store.add({"uid": "blank-1", "name": "Ada", "email": "blank@example.com", "password": ""})
+    response = app_client.post("/login", json={"email": "blank@example.com", "password": ""})
+    assert response.status_code == 401
+
+
+def test_parallel_guesses_are_limited(app_client):
+    import main
+
+    main.user_store.add({"uid": "guess-1", "name": "Ada", "email": "guess@example.com", "password": "right"})
+    guess = {"email": "guess@example.com", "password": "wrong"}
+    with ThreadPoolExecutor(max_workers=12) as executor:
+        statuses = list(executor.map(lambda _: app_client.post("/login", json=guess).status_code, range(12)))
+
+    assert sorted(statuses) == [401] * main.login_rate_limiter.max_failures + [429] * (12 - main.login_rate_limiter.max_failures)
@@ -0,0 +1,39 @@
+import os
+
+import numpy as np
+
+from ann_index import IVFIndex
+from similarity import EmbeddingIndex, normalize_rows
+from summary_cache import cache_key
+
+
+def test_reload_swaps_in_a_new_search_index_with_the_catalog(app_client, monkeypatch):
+    import catalog_store
+    import main
+
+    codes = [course.code for course in main.catalog.courses]
+    matrix = normalize_rows(np.random.default_rng(0).normal(size=(len(codes), 8)).astype(np.float32))
+    monkeypatch.setattr(main, "embedding_index", EmbeddingIndex(codes, matrix))
+    monkeypatch.setattr(main, "ann_index", IVFIndex(codes, matrix, nprobe=len(codes)))
+    monkeypatch.setattr(main, "catalog", main.catalog)
+    majors, faculty = catalog_store.load_catalog_data(None)
+    removed = majors["Applied Machine Learning"].pop(0)["code"]
+    # The query lands right on the course that is about to be removed
+    main.query_embedding_cache.put(cache_key(main.EMBEDDING_MODEL, "reload probe"), matrix[codes.index(removed)])
+
+    before = main.ann_index
+    assert app_client.get("/search", params={"q": "reload probe", "k": 1}).json()["results"][0]["code"] == removed
+
+    catalog_store.save_catalog_data(main.CATALOG_FILE, majors, faculty)
+    try:
+        assert main.reload_catalog()["removed"] == 1
+    finally:
+        os.remove(main.CATALOG_FILE)
+
+    # The index searches were using is left as it was; the new one went in with the catalog
+    assert removed in before and len(before) == len(codes)
+    assert main.ann_index is not before and removed not in main.ann_index
+    assert len(main.ann_index) == len(main.embedding_index) == len(main.catalog)
+    found = app_client.get("/search", params={"q": "reload probe", "k": 3}).json()["results"]
+    assert len(found) == 3 and removed not in [course["code"] for course in found]
+    main.reload_catalog()
@@ -0,0 +1,38 @@
+import random
+
+from catalog import Catalog
+from catalog_store import load_catalog_data
+from course_matcher import AhoCorasick, CourseMentionMatcher
+
+
+def test_automaton_finds_overlapping_and_nested_patterns():
+    automaton = AhoCorasick([("he", "he"), ("she", "she"), ("his", "his"), ("hers", "hers"), ("", "empty")])
+
+    assert automaton.find_values("ushers") == {"he", "she", "hers"}
+    assert automaton.find_values("this") == {"his"}
+    assert automaton.find_values("") == set()
+
+
+def test_automaton_matches_substring_search_on_random_text():
+    rng = random.Random(0)
+    patterns = {"".join(rng.choice("abc") for _ in range(rng.randint(1, 5))) for _ in range(40)}
+    automaton = AhoCorasick((pattern, pattern) for pattern in patterns)
+
+    for _ in range(200):
+        text = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 30)))
+        assert automaton.find_values(text) == {pattern for pattern in patterns if pattern in text}
+
+
+def test_mentions_are_case_insensitive_in_catalog_order_and_follow_new_catalogs():
+    majors, faculty = load_catalog_data(None)
+    matcher = CourseMentionMatcher()
+    matcher.compile(Catalog(majors, faculty, version=1))
+
+    text = "Take NEURAL NETWORK BASICS after cs101, and maybe Transformers and Attention."
+    assert [course["code"] for course in matcher.find(text)] == ["CS101", "CS201", "CS202"]
+    assert matcher.find("nothing relevant here") == []
+
+    majors["Applied Machine Learning"][0]["name"] = "Bayesian Statistics"
+    matcher.compile(Catalog(majors, faculty, version=2))
+    assert [course["name"] for course in matcher.find("bayesian statistics")] == ["Bayesian Statistics"]
+    assert matcher.find("probability and statistics") == []
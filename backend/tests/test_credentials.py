@@ -0,0 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from credentials import LoginRateLimiter, hash_password, verify_password
+
+
+def test_password_round_trip():
+    stored = hash_password("correct horse", n=1024)
+    assert verify_password("correct horse", stored)
+    assert not verify_password("", stored)
+
+
+def test_concurrent_attempts_are_counted_before_verification():
+    limiter = LoginRateLimiter(max_failures=5, window=60)
+
+    with ThreadPoolExecutor(max_workers=20) as executor:
+        waits = list(executor.map(lambda _: limiter.attempt("ada@example.com"), range(50)))
+
+    assert waits.count(0) == 5
+    assert all(0 < wait <= 60 for wait in waits if wait)
+    limiter.reset("ada@example.com")
+    assert limiter.attempt("ada@example.com") == 0
+
+
+def test_least_recently_tried_email_is_forgotten_first():
+    limiter = LoginRateLimiter(max_failures=1, window=60, max_tracked=2)
+    limiter.attempt("a")
+    limiter.attempt("b")
+    assert limiter.attempt("a") > 0  # "a" is now the most recent
+
+    limiter.attempt("c")  # evicts "b"
+
+    assert limiter.attempt("a") > 0
+    assert limiter.attempt("b") == 0
@@ -0,0 +1,48 @@
+from embedding_pipeline import FakeEmbeddingClient, embed_texts
+
+TEXTS = [f"course {i}" for i in range(10)]
+
+
+def test_rate_limited_batches_are_retried_and_results_keep_input_order():
+    client = FakeEmbeddingClient(dimensions=8, rate_limit_failures=2)
+
+    vectors = embed_texts(client, TEXTS, model="test", batch_size=3, max_concurrency=1, base_delay=0, progress=None)
+
+    # 4 batches, plus one extra call for each rate-limited attempt
+    assert client.calls == 4 + 2
+    assert vectors == [client.vector(text) for text in TEXTS]
+
+
+def test_concurrent_batches_are_reassembled_in_input_order():
+    client = FakeEmbeddingClient(dimensions=8, latency=0.01)
+
+    vectors = embed_texts(client, TEXTS, model="test", batch_size=2, max_concurrency=4, progress=None)
+
+    assert client.calls == 5
+    assert vectors == [client.vector(text) for text in TEXTS]
+
+
+def test_batch_is_dropped_after_max_retries():
+    client = FakeEmbeddingClient(dimensions=8, rate_limit_failures=100)
+    reported = []
+
+    vectors = embed_texts(
+        client, TEXTS[:2], model="test", max_retries=2, base_delay=0,
+        progress=lambda *args: reported.append(args),
+    )
+
+    assert client.calls == 3
+    assert vectors == [None, None]
+    assert reported == []
+
+
+def test_other_errors_are_not_retried():
+    class BrokenClient(FakeEmbeddingClient):
+        def _create(self, model, input, **kwargs):
+            self.calls += 1
+            raise ValueError("bad request")
+
+    client = BrokenClient(dimensions=8)
+
+    assert embed_texts(client, TEXTS[:2], model="test", base_delay=0, progress=None) == [None, None]
+    assert client.calls == 1
@@ -0,0 +1,32 @@
+import json
+
+from http_cache import CachedJSON
+
+
+def test_etag_is_strong_and_follows_the_body():
+    cached = CachedJSON({"name": "Zoë", "courses": [1, 2]})
+
+    assert json.loads(cached.body) == {"name": "Zoë", "courses": [1, 2]}
+    assert cached.etag.startswith('"') and cached.etag.endswith('"')
+    assert CachedJSON({"name": "Zoë", "courses": [1, 2]}).etag == cached.etag
+    assert CachedJSON({"name": "Zoe", "courses": [1, 2]}).etag != cached.etag
+    assert cached.matches(f'"stale", W/{cached.etag}') and cached.matches("*")
+    assert not cached.matches('"stale"')
+
+
+def test_catalog_endpoints_answer_304_to_a_current_etag(app_client):
+    first = app_client.get("/majors")
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and first.json()
+    assert "max-age=" in first.headers["cache-control"]
+
+    revalidated = app_client.get("/majors", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b"" and revalidated.headers["etag"] == etag
+
+    assert app_client.get("/majors", headers={"If-None-Match": '"stale"'}).status_code == 200
+    courses = app_client.get("/courses/1")
+    assert courses.headers["etag"] != etag
+    assert app_client.get("/courses/1", headers={"If-None-Match": etag}).status_code == 200
+    assert app_client.get("/courses/1", headers={"If-None-Match": courses.headers["etag"]}).status_code == 304
+    assert app_client.get("/courses/999", headers={"If-None-Match": "*"}).status_code == 404
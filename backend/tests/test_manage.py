@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+import manage
+from credentials import verify_password
+from user_store import JsonUserBackend, UserStore, apply_journal, iter_json_array, iter_snapshot_users
+
+COURSE = {"code": "CS101", "name": "Probability and Statistics"}
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("PASSWORD_SCRYPT_N", "1024")
+    monkeypatch.setattr(manage, "USERS_JOURNAL", str(tmp_path / "users.journal"))
+    return tmp_path
+
+
+def write_jsonl(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+    return str(path)
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_import_skips_rows_without_a_password_and_repeated_emails(workdir, monkeypatch, backend):
+    monkeypatch.setattr(manage, "USER_STORE_BACKEND", backend)
+    path = write_jsonl(workdir / "users.jsonl", [
+        {"name": "Ada", "email": "ada@example.com", "password": "first"},
+        {"name": "No Password", "email": "blank@example.com"},
+        {"name": "Empty Password", "email": "empty@example.com", "password": ""},
+        {"name": "Ada Again", "email": "ADA@example.com", "password": "second"},
+    ])
+
+    assert manage.import_users(path, None, batch_size=10) == 1
+
+    if backend == "json":
+        users = JsonUserBackend("users.json", manage.USERS_JOURNAL, lock=False).load_all()
+    else:
+        users = manage.SqliteUserBackend("users.db").load_all()
+    assert [user["name"] for user in users] == ["Ada"]
+    assert verify_password("first", users[0]["password"])
+
+
+def test_json_array_is_decoded_across_chunk_boundaries(tmp_path):
+    items = [{"uid": f"u{i}", "name": "Zoë " * i, "n": 10 ** i} for i in range(30)] + [123456789, "x,]"]
+    path = tmp_path / "items.json"
+    path.write_text(json.dumps(items, indent=2))
+
+    assert list(iter_json_array(str(path), chunk_size=7)) == items
+    (tmp_path / "empty.json").write_text("")
+    assert list(iter_json_array(str(tmp_path / "empty.json"))) == []
+
+
+def test_snapshot_users_stream_matches_the_replayed_journal(tmp_path):
+    users_file, journal = str(tmp_path / "users.json"), str(tmp_path / "users.journal")
+    store = UserStore(JsonUserBackend(users_file, journal, compact_after=3))
+    for i in range(4):
+        store.add({"uid": f"u{i}", "name": f"User {i}", "email": f"u{i}@example.com", "password": "hash"})
+    store.set_registrations("u0", [COURSE])
+    store.set_registrations("u3", [COURSE])
+    store.set_password("u1", "new-hash")
+    store.close()
+
+    snapshot = json.loads(open(users_file).read())
+    records = list(manage.read_journal(journal))
+    assert records  # part of the state is still only in the journal
+    assert list(iter_snapshot_users(users_file, records)) == apply_journal(snapshot, records)
+    assert list(iter_snapshot_users(str(tmp_path / "missing.json"), records)) == apply_journal([], records)
+
+
+def test_export_registrations_from_the_json_store(workdir, monkeypatch):
+    monkeypatch.setattr(manage, "USER_STORE_BACKEND", "json")
+    store = UserStore(JsonUserBackend("users.json", manage.USERS_JOURNAL))
+    store.add({"uid": "u1", "name": "Ada", "email": "ada@example.com", "password": "hash"})
+    store.set_registrations("u1", [COURSE, {"code": "CS102", "name": "Data Visualization using R"}])
+    store.close()
+
+    assert manage.export_registrations("registrations.jsonl", None) == 2
+    rows = [json.loads(line) for line in open("registrations.jsonl")]
+    assert [(row["uid"], row["course_code"]) for row in rows] == [("u1", "CS101"), ("u1", "CS102")]
@@ -0,0 +1,139 @@
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from registration_engine import (
+    IdempotencyConflictError, RegistrationEngine, SqliteRegistrationEngine, UnknownCourseError,
+)
+from user_store import SqliteUserBackend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_engine(request, tmp_path):
+    """Factory for either engine; sqlite engines built from one factory share a database"""
+    if request.param == "memory":
+        return lambda capacities: RegistrationEngine(capacities)
+    database = SqliteUserBackend(str(tmp_path / "users.db"))
+    database.insert_many([
+        {"uid": f"student-{i}", "name": f"Student {i}", "email": f"student{i}@example.com", "password": "unused"}
+        for i in range(3)
+    ])
+    return lambda capacities: SqliteRegistrationEngine(database, capacities)
+
+
+def test_concurrent_submissions_never_oversell(make_engine):
+    codes = ["C1", "C2", "C3"]
+    engine = make_engine({code: 10 for code in codes})
+    rng = random.Random(0)
+    submissions = {f"burst-{i}": rng.sample(codes, 2) for i in range(150)}
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = dict(zip(submissions, executor.map(lambda item: engine.register(*item), submissions.items())))
+
+    for uid, picked in submissions.items():
+        assert sorted(results[uid]["registered"] + results[uid]["waitlisted"]) == sorted(picked)
+    usage = engine.snapshot()
+    for code in codes:
+        demand = sum(code in picked for picked in submissions.values())
+        assert usage[code]["taken"] == min(10, demand)
+        assert usage[code]["waitlisted"] == demand - usage[code]["taken"]
+        holders = [uid for uid, result in results.items() if code in result["registered"]]
+        assert len(holders) == usage[code]["taken"]
+
+
+def test_repeated_idempotency_key_changes_nothing(make_engine):
+    engine = make_engine({"CS101": 1, "CS102": 1})
+    first = engine.register("student-0", ["CS101"], idempotency_key="k1")
+    engine.register("student-0", ["CS102"])
+
+    # A retry of the first request replays its result instead of registering again
+    assert engine.register("student-0", ["CS101"], idempotency_key="k1") == first
+    assert engine.status("student-0") == {"registered": ["CS102"], "waitlisted": []}
+
+    with pytest.raises(IdempotencyConflictError) as error:
+        engine.register("student-0", ["CS101", "CS102"], idempotency_key="k1")
+    assert error.value.status_code == 409
+    # Keys belong to one student
+    assert engine.register("student-1", ["CS101"], idempotency_key="k1")["registered"] == ["CS101"]
+
+
+def test_reused_idempotency_key_is_a_409(app_client):
+    import main
+
+    main.user_store.add({"uid": "retry-1", "name": "Ada", "email": "retry1@example.com", "password": "unused"})
+    course, other = main.catalog.courses[0].info(), main.catalog.courses[1].info()
+    headers = {"Idempotency-Key": "request-1", "Authorization": f"Bearer {main.session_manager.issue('retry-1', 'Ada')}"}
+
+    first = app_client.post("/complete-registration", json={"uid": "retry-1", "courses": [course]}, headers=headers)
+    retry = app_client.post("/complete-registration", json={"uid": "retry-1", "courses": [course]}, headers=headers)
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+
+    conflict = app_client.post("/complete-registration", json={"uid": "retry-1", "courses": [other]}, headers=headers)
+    assert conflict.status_code == 409
+    assert main.get_user_registrations("retry-1") == [course]
+
+
+def test_removed_course_is_forgotten(make_engine):
+    engine = make_engine({"CS101": 1, "CS102": 1})
+    engine.register("student-0", ["CS101"])
+    engine.register("student-1", ["CS101"])
+
+    engine.remove_course("CS101")
+
+    assert "CS101" not in engine.snapshot()
+    assert engine.status("student-1") == {"registered": [], "waitlisted": []}
+    with pytest.raises(UnknownCourseError):
+        engine.register("student-2", ["CS101"])
+    assert engine.register("student-0", ["CS102"])["registered"] == ["CS102"]
+
+
+def test_courses_missing_from_the_catalog_are_dropped_on_restart(make_engine):
+    make_engine({"CS101": 1, "CS102": 1}).register("student-0", ["CS101"])
+
+    restarted = make_engine({"CS102": 1})
+
+    assert list(restarted.snapshot()) == ["CS102"]
+
+
+def test_catalog_reload_drops_removed_courses(app_client):
+    import catalog_store
+    import main
+
+    main.user_store.add({"uid": "reload-1", "name": "Ada", "email": "reload1@example.com", "password": "unused"})
+    majors, faculty = catalog_store.load_catalog_data(None)
+    removed = majors["Applied Machine Learning"].pop(0)
+    kept = majors["Applied Machine Learning"][0]
+    headers = {"Authorization": f"Bearer {main.session_manager.issue('reload-1', 'Ada')}"}
+    response = app_client.post("/complete-registration", json={"uid": "reload-1", "courses": [removed]}, headers=headers)
+    assert response.json()["registered_courses"] == [removed]
+
+    catalog_store.save_catalog_data(main.CATALOG_FILE, majors, faculty)
+    try:
+        assert main.reload_catalog()["removed"] == 1
+        assert removed["code"] not in main.registration_engine.snapshot()
+
+        response = app_client.post("/complete-registration", json={"uid": "reload-1", "courses": [removed]}, headers=headers)
+        assert response.status_code == 404
+        response = app_client.post("/complete-registration", json={"uid": "reload-1", "courses": [kept]}, headers=headers)
+        assert response.json()["registered_courses"] == [kept]
+    finally:
+        os.remove(main.CATALOG_FILE)
+        main.reload_catalog()
+
+
+def test_status_follows_promotions_and_release_all(make_engine):
+    engine = make_engine({"CS101": 1, "CS102": 1, "CS103": 1})
+    engine.register("student-0", ["CS101", "CS102"])
+    engine.register("student-1", ["CS101", "CS103"])
+    assert engine.status("student-1") == {"registered": ["CS103"], "waitlisted": ["CS101"]}
+
+    engine.release_all("student-0")
+
+    assert engine.status("student-0") == {"registered": [], "waitlisted": []}
+    assert sorted(engine.status("student-1")["registered"]) == ["CS101", "CS103"]
+    # A later submission drops the promoted seat along with the rest
+    assert sorted(engine.register("student-1", ["CS102"])["released"]) == ["CS101", "CS103"]
+    assert engine.snapshot()["CS101"]["taken"] == 0
@@ -0,0 +1,111 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from sessions import SessionManager
+from user_store import SqliteUserBackend
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUDENTS = 40
+CAPACITY = 5
+COURSE = {"code": "CS101", "name": "Probability and Statistics"}
+SESSIONS = SessionManager(b"test-secret")
+
+
+def auth(i: int) -> dict:
+    return {"Authorization": f"Bearer {SESSIONS.issue(f'student-{i}', f'Student {i}')}"}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Three uvicorn workers sharing one SQLite user store"""
+    users_db = str(tmp_path / "users.db")
+    SqliteUserBackend(users_db).insert_many([
+        {"uid": f"student-{i}", "name": f"Student {i}", "email": f"student{i}@example.com", "password": "unused"}
+        for i in range(STUDENTS)
+    ])
+    port = free_port()
+    env = dict(
+        os.environ,
+        USER_STORE_BACKEND="sqlite",
+        USERS_DB=users_db,
+        DEFAULT_COURSE_CAPACITY=str(CAPACITY),
+        OPENAI_API_KEY="",
+        SESSION_SECRET="test-secret",
+        PASSWORD_HASH_WORKERS="1",
+        EMBEDDING_CACHE_DIR=str(tmp_path / "embedding_cache"),
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "--app-dir", BACKEND_DIR, "main:app", "--port", str(port), "--workers", "3"],
+        cwd=tmp_path, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                if httpx.get(f"{url}/health").status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline or process.poll() is not None:
+                pytest.fail("server did not start")
+            time.sleep(0.2)
+        yield url
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def test_concurrent_registrations_across_workers_never_oversell(server):
+    def register(i):
+        response = httpx.post(
+            f"{server}/complete-registration",
+            json={"uid": f"student-{i}", "courses": [COURSE]},
+            headers=auth(i),
+            timeout=30,
+        )
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    with ThreadPoolExecutor(max_workers=STUDENTS) as executor:
+        results = list(executor.map(register, range(STUDENTS)))
+
+    registered = [i for i, result in enumerate(results) if result["registered_courses"]]
+    waitlisted = [i for i, result in enumerate(results) if result["waitlisted_courses"]]
+    assert len(registered) == CAPACITY
+    assert len(waitlisted) == STUDENTS - CAPACITY
+
+    def saved(i):
+        return httpx.get(f"{server}/user-registrations/student-{i}", headers=auth(i)).json()["registered_courses"]
+
+    assert sum(bool(saved(i)) for i in range(STUDENTS)) == CAPACITY
+
+    # A freed seat goes to a waitlisted student, whichever worker serves the release
+    assert httpx.delete(f"{server}/user-registrations/student-{registered[0]}", headers=auth(registered[0])).status_code == 200
+    holders = [i for i in range(STUDENTS) if saved(i)]
+    assert len(holders) == CAPACITY
+    assert registered[0] not in holders
+    assert len(set(holders) & set(waitlisted)) == 1
+
+
+def test_logout_on_one_worker_revokes_the_token_on_all(server):
+    headers = auth(0)
+    # New connections each time, so the requests spread over the workers
+    assert {httpx.get(f"{server}/welcome/student-0", headers=headers).status_code for _ in range(20)} == {200}
+
+    assert httpx.post(f"{server}/logout", headers=headers).status_code == 200
+
+    assert {httpx.get(f"{server}/welcome/student-0", headers=headers).status_code for _ in range(20)} == {401}
@@ -0,0 +1,65 @@
+import pytest
+
+from search_index import SearchIndex
+
+
+class Faculty:
+    def __init__(self, name):
+        self.name = name
+
+
+class Course:
+    def __init__(self, code, name, description, faculty="Dr. Smith"):
+        self.code, self.name, self.description, self.faculty = code, name, description, Faculty(faculty)
+
+    def info(self):
+        return {"code": self.code, "name": self.name}
+
+
+class Catalog:
+    def __init__(self, courses, version=1):
+        self.courses, self.version = tuple(courses), version
+
+
+COURSES = [
+    Course("C1", "Applied Statistics", "Statistical inference and statistics for data."),
+    Course("C2", "Deep Learning", "Neural networks, with some statistics along the way."),
+    Course("C3", "Databases", "Stored procedures and query planning.", faculty="Dr. Stark"),
+    Course("C4", "Algorithms", "Sorting, graphs and dynamic programming."),
+]
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    index.compile(Catalog(COURSES))
+    return index
+
+
+def codes(results):
+    return [course["code"] for course, _ in results]
+
+
+def test_prefix_matches_rank_below_exact_matches(index):
+    assert codes(index.search("statistics")) == ["C1", "C2"]
+    assert codes(index.search("stat")) == ["C1", "C2"]
+    assert index.search("stat")[0][1] < index.search("statistics")[0][1]
+    # "sto" is long enough to expand, "st" is not
+    assert codes(index.search("sto")) == ["C3"]
+    assert index.search("st") == []
+
+
+def test_a_token_expanding_to_several_terms_counts_its_best_term_once(index):
+    best = max(index.search(term)[0][1] for term in ("statistics", "statistical"))
+    (course, score), = [result for result in index.search("statis") if result[0]["code"] == "C1"]
+    assert score == pytest.approx(SearchIndex.PREFIX_WEIGHT * best)
+
+
+def test_name_matches_outweigh_description_matches_and_stopwords_are_ignored(index):
+    assert codes(index.search("which courses teach statistics?")) == ["C1", "C2"]
+    assert codes(index.search("the")) == []
+    assert codes(index.search("stark")) == ["C3"]
+
+    index.compile(Catalog(COURSES[:2] + [Course("C5", "Statistics", "Introductory.")], version=2))
+    assert codes(index.search("statistics"))[0] == "C5"
+    assert codes(index.search("stored")) == []
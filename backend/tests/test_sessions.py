@@ -0,0 +1,123 @@
+import base64
+import json
+
+import pytest
+
+from sessions import FileRevocationList, SessionError, SessionManager, SqliteRevocationList
+from user_store import SqliteUserBackend
+
+
+def bearer(token: str) -> dict:
+    # Raw latin-1 bytes, the way a browser or proxy may send them
+    return {"Authorization": ("Bearer " + token).encode("latin-1")}
+
+
+def test_token_round_trip():
+    manager = SessionManager(b"secret")
+    session = manager.verify(manager.issue("u1", "Zoë"))
+    assert (session.uid, session.name) == ("u1", "Zoë")
+
+
+@pytest.mark.parametrize("token", ["", ".", "abc", "é.é", "payload.é", "W10.W10"])
+def test_malformed_tokens_are_session_errors(token):
+    with pytest.raises(SessionError):
+        SessionManager(b"secret").verify(token)
+
+
+def test_revoked_token_is_rejected():
+    manager = SessionManager(b"secret")
+    token = manager.issue("u1", "Ada")
+    manager.verify(token)
+    manager.revoke(token)
+    with pytest.raises(SessionError, match="revoked"):
+        manager.verify(token)
+
+
+def test_tampered_tokens_get_401(app_client):
+    import main
+
+    token = main.session_manager.issue("u1", "Ada")
+    assert app_client.get("/welcome/u1", headers=bearer(token)).status_code == 200
+
+    payload, signature = token.split(".")
+    claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    claims["uid"] = "u2"
+    other_user = base64.urlsafe_b64encode(json.dumps(claims).encode()).rstrip(b"=").decode()
+    tampered = [
+        f"{other_user}.{signature}",
+        f"{payload}.{signature[:-1]}{'B' if signature[-1] == 'A' else 'A'}",
+        SessionManager(b"another key").issue("u1", "Ada"),
+        token + "é",
+        "é" * 40,
+    ]
+    for bad in tampered:
+        response = app_client.get("/welcome/u1", headers=bearer(bad))
+        assert response.status_code == 401, bad
+        assert response.headers["WWW-Authenticate"] == "Bearer"
+
+
+@pytest.mark.parametrize("method, path, body", [
+    ("GET", "/welcome/u1", None),
+    ("GET", "/user-registrations/u1", None),
+    ("DELETE", "/user-registrations/u1", None),
+    ("POST", "/complete-registration", {"uid": "u1", "courses": []}),
+    ("GET", "/selected-courses?uid=u1", None),
+    ("POST", "/select-course", {"uid": "u1", "course_code": "CS101"}),
+])
+def test_user_endpoints_need_a_token(app_client, method, path, body):
+    response = app_client.request(method, path, json=body)
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+
+
+def test_logged_out_token_is_rejected_everywhere(app_client):
+    import main
+
+    token = main.session_manager.issue("u1", "Ada")
+    assert app_client.post("/logout", headers=bearer(token)).status_code == 200
+    assert app_client.get("/welcome/u1", headers=bearer(token)).status_code == 401
+    assert app_client.get("/welcome/u1").status_code == 401
+    assert app_client.get("/user-registrations/u1", headers=bearer(token)).status_code == 401
+
+
+def test_welcome_does_not_read_the_user_store(app_client, monkeypatch):
+    import main
+
+    def unreachable(*args):
+        raise AssertionError("user store read")
+
+    monkeypatch.setattr(main.user_store, "get_by_uid", unreachable)
+    response = app_client.get("/welcome/u9", headers=bearer(main.session_manager.issue("u9", "Zoë")))
+    assert response.status_code == 200
+    assert response.json()["user_name"] == "Zoë"
+    assert response.json()["has_registered_courses"] is False
+
+
+def test_sqlite_revocations_are_seen_by_every_worker(tmp_path):
+    database = SqliteUserBackend(str(tmp_path / "users.db"))
+    worker, other_worker = (SessionManager(b"secret", revocations=SqliteRevocationList(database)) for _ in range(2))
+    token = worker.issue("u1", "Ada")
+    other_worker.verify(token)  # now cached there
+
+    worker.revoke(token)
+
+    with pytest.raises(SessionError, match="revoked"):
+        other_worker.verify(token)
+    restarted = SessionManager(b"secret", revocations=SqliteRevocationList(SqliteUserBackend(str(tmp_path / "users.db"))))
+    with pytest.raises(SessionError, match="revoked"):
+        restarted.verify(token)
+
+
+def test_file_revocations_survive_a_restart(tmp_path):
+    path = str(tmp_path / "sessions.revoked")
+    manager = SessionManager(b"secret", revocations=FileRevocationList(path))
+    token = manager.issue("u1", "Ada")
+    manager.revoke(token)
+    expired = SessionManager(b"secret", ttl=-1, revocations=manager.revocations)
+    expired.revoke(expired.issue("u2", "Bob"))
+
+    restarted = SessionManager(b"secret", revocations=FileRevocationList(path))
+    with pytest.raises(SessionError, match="revoked"):
+        restarted.verify(token)
+    # Entries for tokens that expired anyway are dropped on load
+    assert len(open(path).readlines()) == 1
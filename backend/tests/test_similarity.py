@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from similarity import EmbeddingIndex, QuantizedIndex, normalize_rows
+
+
+def random_index(count=300, dimensions=32, seed=0):
+    matrix = np.random.default_rng(seed).normal(size=(count, dimensions)).astype(np.float32)
+    return EmbeddingIndex.build([f"C{i}" for i in range(count)], matrix)
+
+
+@pytest.mark.parametrize("mode", QuantizedIndex.MODES)
+def test_reranked_results_carry_full_precision_scores(mode):
+    exact = random_index()
+    quantized = QuantizedIndex.from_index(exact, mode, rerank=4)
+    assert quantized.nbytes < exact.nbytes
+
+    for query in normalize_rows(np.random.default_rng(1).normal(size=(10, 32)).astype(np.float32)):
+        expected = exact.top_k(query, 5)
+        found = quantized.top_k(query, 5)
+        assert [code for code, _ in found] == [code for code, _ in expected]
+        assert [score for _, score in found] == pytest.approx([score for _, score in expected], abs=1e-6)
+
+    neighbours = quantized.similar_to("C7", 3)
+    assert len(neighbours) == 3 and "C7" not in [code for code, _ in neighbours]
+
+
+def test_without_rerank_the_full_matrix_is_dropped():
+    exact = random_index()
+    quantized = QuantizedIndex.from_index(exact, "int8", rerank=0)
+
+    assert quantized.matrix is None
+    assert quantized.vector("C3") == pytest.approx(exact.vector("C3"), abs=0.01)
+    query = exact.vector("C3")
+    assert quantized.top_k(query, 1)[0][0] == "C3"
+    assert quantized.top_k(query, 1)[0][1] == pytest.approx(1.0, abs=0.02)
+
+
+@pytest.mark.parametrize("mode,rerank", [("int8", 4), ("float16", 4), ("int8", 0)])
+def test_with_changes_matches_quantizing_from_scratch(mode, rerank):
+    exact = random_index()
+    quantized = QuantizedIndex.from_index(exact, mode, rerank)
+    rng = np.random.default_rng(2)
+    vectors = {"C0": rng.normal(size=32), "NEW": rng.normal(size=32)}
+
+    changed = quantized.with_changes(vectors, removed=["C1", "C2"])
+    rebuilt = QuantizedIndex.from_index(exact.with_changes(vectors, removed=["C1", "C2"]), mode, rerank)
+
+    assert changed.codes == rebuilt.codes and "C1" not in changed and "NEW" in changed
+    assert np.array_equal(changed.data, rebuilt.data)
+    if rerank:
+        assert np.allclose(changed.matrix, rebuilt.matrix)
+    assert (changed.scales is None) == (mode == "float16")
+    query = rebuilt.vector("NEW")
+    assert changed.top_k(query, 3) == rebuilt.top_k(query, 3)
+    # The index it came from is unchanged
+    assert len(quantized) == 300 and "C1" in quantized and "NEW" not in quantized
@@ -0,0 +1,110 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUB_ANSWER = "you might look at CS101: Probability and Statistics and CS201: Neural Network Basics."
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start(app: str, cwd, env) -> tuple:
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "--app-dir", BACKEND_DIR, app, "--port", str(port)],
+        cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            httpx.get(f"{url}/health")
+            return process, url
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline or process.poll() is not None:
+            process.terminate()
+            pytest.fail(f"{app} did not start")
+        time.sleep(0.2)
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    """The backend talking to stub_llm_server.py through OPENAI_BASE_URL"""
+    directory = tmp_path_factory.mktemp("stub")
+    processes = []
+    try:
+        stub, stub_url = start("stub_llm_server:app", directory, dict(
+            os.environ, STUB_LATENCY="0.05", STUB_EMBEDDING_DIMENSIONS="64",
+        ))
+        processes.append(stub)
+        backend, url = start("main:app", directory, dict(
+            os.environ,
+            OPENAI_BASE_URL=f"{stub_url}/v1",
+            OPENAI_API_KEY="stub",
+            SESSION_SECRET="test-secret",
+            USER_STORE_BACKEND="json",
+            PASSWORD_HASH_WORKERS="1",
+            EMBEDDING_CACHE_DIR=str(directory / "embedding_cache"),
+        ))
+        processes.append(backend)
+        yield url
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(timeout=10)
+
+
+def events(response: httpx.Response) -> list:
+    parsed = []
+    for block in response.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        parsed.append((lines["event"], json.loads(lines["data"])))
+    return parsed
+
+
+def test_assistant_answers_through_the_stub(server):
+    response = httpx.post(f"{server}/assistant", json={"question": "What should I take?"}, timeout=30)
+    assert response.status_code == 200
+    body = response.json()
+    assert STUB_ANSWER in body["response"]
+    assert [course["code"] for course in body["matching_courses"]] == ["CS101", "CS201"]
+
+
+def test_assistant_streams_tokens_then_the_final_answer(server):
+    response = httpx.post(f"{server}/assistant", json={"question": "What should I take?", "stream": True}, timeout=30)
+    assert response.headers["content-type"].startswith("text/event-stream")
+    received = events(response)
+    tokens = [data["content"] for event, data in received if event == "token"]
+    event, done = received[-1]
+    assert event == "done" and len(tokens) > 1
+    assert "".join(tokens).strip() == done["response"]
+    assert STUB_ANSWER in done["response"]
+    assert [course["code"] for course in done["matching_courses"]] == ["CS101", "CS201"]
+
+
+def test_summaries_stream_and_are_cached(server):
+    description = {"course_description": "An introduction to probability and statistics."}
+    streamed = events(httpx.post(f"{server}/summarize", json=dict(description, stream=True), timeout=30))
+    assert streamed[-1][0] == "done" and STUB_ANSWER in streamed[-1][1]["summary"]
+    assert any(event == "token" for event, _ in streamed)
+
+    # The streamed summary was cached, so this is served without another upstream call
+    summary = httpx.post(f"{server}/summarize", json=description, timeout=30).json()["summary"]
+    assert summary == streamed[-1][1]["summary"]
+    cached = events(httpx.post(f"{server}/summarize", json=dict(description, stream=True), timeout=30))
+    assert cached == [("done", {"summary": summary})]
+    assert httpx.get(f"{server}/health").json()["summary_cache"]["hits"] >= 1
+
+    other = httpx.post(f"{server}/summarize", json={"course_description": "Graph algorithms."}, timeout=30)
+    assert other.status_code == 200 and STUB_ANSWER in other.json()["summary"]
@@ -0,0 +1,78 @@
+import asyncio
+import hashlib
+import json
+
+import numpy as np
+import pytest
+
+from summary_cache import ComputeCache, SummaryCache, cache_key, summary_key
+
+
+def test_cancelling_the_first_caller_leaves_the_others_waiting():
+    async def scenario():
+        cache = SummaryCache()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "summary"
+
+        first = asyncio.ensure_future(cache.get_or_compute("k", compute))
+        second = asyncio.ensure_future(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        assert await second == "summary"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert calls == [1]
+        assert cache.get("k") == "summary"
+
+    asyncio.run(scenario())
+
+
+def test_failures_reach_every_caller_and_are_not_cached():
+    async def scenario():
+        cache = SummaryCache()
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        results = await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(3)), return_exceptions=True)
+        assert [str(result) for result in results] == ["upstream down"] * 3
+        assert cache.get("k") is None
+
+    asyncio.run(scenario())
+
+
+def test_persisted_file_is_compacted_while_running(tmp_path):
+    path = str(tmp_path / "summaries.jsonl")
+    cache = SummaryCache(max_entries=5, path=path)
+    for i in range(100):
+        cache.put("same" if i % 2 else f"k{i % 10}", f"value {i}")
+    cache.close()
+
+    assert len(open(path).readlines()) < 2 * cache.max_entries
+    reloaded = SummaryCache(max_entries=5, path=path)
+    assert reloaded.get("same") == "value 99"
+    assert reloaded.get("k8") == "value 98"
+    assert reloaded.stats()["entries"] == 5
+
+
+def test_query_embeddings_get_their_own_keys_and_cache():
+    async def scenario():
+        cache = ComputeCache()
+
+        async def embed():
+            return np.ones(3, dtype=np.float32)
+
+        vector = await cache.get_or_compute(cache_key("text-embedding-ada-002", "machine learning"), embed)
+        assert cache.get(cache_key("text-embedding-ada-002", "machine learning")) is vector
+        assert cache_key("text-embedding-ada-002", "machine learning") != cache_key("other-model", "machine learning")
+
+    asyncio.run(scenario())
+    # Summary keys still match the entries persisted by earlier versions
+    payload = json.dumps(["gpt-3.5-turbo", {"max_tokens": 150}, "Intro to ML"], sort_keys=True)
+    assert summary_key(" Intro to ML ", "gpt-3.5-turbo", {"max_tokens": 150}) == hashlib.sha256(payload.encode()).hexdigest()
@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from user_store import JsonUserBackend, UserStore
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+USER = {"uid": "u1", "name": "Ada", "email": "ada@example.com", "password": "hash"}
+COURSE = {"code": "CS101", "name": "Probability and Statistics"}
+
+
+def test_journal_is_replayed_after_a_crash(tmp_path):
+    users_file, journal = tmp_path / "users.json", tmp_path / "users.journal"
+    # Commit two writes, start a third that is cut off mid-line, then die without closing
+    crash = textwrap.dedent(f"""
+        import os, sys
+        sys.path.insert(0, {BACKEND_DIR!r})
+        from user_store import JsonUserBackend, UserStore
+        store = UserStore(JsonUserBackend({str(users_file)!r}, {str(journal)!r}))
+        store.add({USER!r})
+        store.set_registrations("u1", [{COURSE!r}])
+        with open({str(journal)!r}, "ab") as f:
+            f.write(b'{{"op":"set_registrations","uid":"u1","regis')
+        os._exit(1)
+    """)
+    assert subprocess.run([sys.executable, "-c", crash]).returncode == 1
+    assert not users_file.exists()
+
+    backend = JsonUserBackend(str(users_file), str(journal))
+    store = UserStore(backend)
+    assert store.get_by_email("ADA@example.com")["registered_courses"] == [COURSE]
+
+    # The torn line was cut off, so new records start on a line of their own
+    store.set_registrations("u1", [])
+    backend.close()
+    reopened = JsonUserBackend(str(users_file), str(journal))
+    assert UserStore(reopened).get_by_uid("u1")["registered_courses"] == []
+    reopened.close()
+
+
+def test_compaction_folds_the_journal_into_the_snapshot(tmp_path):
+    backend = JsonUserBackend(str(tmp_path / "users.json"), str(tmp_path / "users.journal"), compact_after=2)
+    store = UserStore(backend)
+    store.add(USER)
+    store.set_registrations("u1", [COURSE])
+    assert backend.journal.size == 0
+    backend.close()
+
+    reopened = JsonUserBackend(str(tmp_path / "users.json"))
+    assert reopened.load_all() == [dict(USER, registered_courses=[COURSE])]
+    reopened.close()
+
+
+def test_second_writer_is_refused(tmp_path):
+    backend = JsonUserBackend(str(tmp_path / "users.json"), str(tmp_path / "users.journal"))
+    with pytest.raises(RuntimeError, match="single worker"):
+        JsonUserBackend(str(tmp_path / "users.json"), str(tmp_path / "users.journal"))
+    # Readers (exports, migration) do not take the lock
+    assert JsonUserBackend(str(tmp_path / "users.json"), lock=False).load_all() == []
+    backend.close()
+    JsonUserBackend(str(tmp_path / "users.json")).close()
@@ -0,0 +1,594 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from registration_journal import RegistrationJournal, read_journal
+
+try:
+    import fcntl
+except ImportError:  # no flock on this platform; a second writer is not detected
+    fcntl = None
+
+
+def apply_journal(users: List[Dict[str, Any]], records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Replay journaled signups and registration updates onto a snapshot.
+
+    Records are absolute (a whole user or a whole course list), so replaying
+    one that is already part of the snapshot changes nothing.
+    """
+    by_uid = {user["uid"]: user for user in users}
+    for record in records:
+        op = record.get("op")
+        if op == "insert_user":
+            user = record["user"]
+            if user["uid"] not in by_uid:
+                users.append(user)
+                by_uid[user["uid"]] = user
+        elif op == "set_registrations":
+            user = by_uid.get(record["uid"])
+            if user is not None:
+                user["registered_courses"] = record["registered_courses"]
+        elif op == "set_password":
+            user = by_uid.get(record["uid"])
+            if user is not None:
+                user["password"] = record["password"]
+    return users
+
+
+def iter_json_array(path: str, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Decode the elements of a file holding one JSON array, one at a time"""
+    decoder = json.JSONDecoder()
+    with open(path, "r") as f:
+        buffer, pos, eof = "", 0, False
+
+        def fill():
+            nonlocal buffer, pos, eof
+            chunk = f.read(chunk_size)
+            buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+
+        fill()
+        buffer = buffer.lstrip()
+        if not buffer and eof:
+            return
+        if not buffer.startswith("["):
+            raise json.JSONDecodeError("Expecting '['", buffer, 0)
+        pos = 1
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buffer):
+                if eof:
+                    raise json.JSONDecodeError("Unterminated array", buffer, pos)
+                fill()
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()  # the element continues in the next chunk
+                continue
+            if end == len(buffer) and not eof:
+                fill()  # a number may go on in the next chunk; decode it again whole
+                continue
+            yield item
+            pos = end
+
+
+def iter_snapshot_users(path: str, records: Iterable[Dict[str, Any]] = ()) -> Iterator[Dict[str, Any]]:
+    """Stream the users of a users.json snapshot with journal `records` replayed.
+
+    Same result as apply_journal(load), but only the journal is held in
+    memory (it is folded into the snapshot every `compact_after` records),
+    so reading does not grow with the number of users.
+    """
+    pending: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        uid = record["user"]["uid"] if record.get("op") == "insert_user" else record.get("uid")
+        pending.setdefault(uid, []).append(record)
+    try:
+        for user in iter_json_array(path):
+            yield from apply_journal([user], pending.pop(user["uid"], ()))
+    except FileNotFoundError:
+        pass
+    for user_records in pending.values():
+        yield from apply_journal([], user_records)
+
+
+class JsonUserBackend:
+    """Stores all users as a single JSON array (the original users.json format).
+
+    With a journal path, signups and registration updates are appended to a
+    group-committed journal instead of rewriting the file; the file becomes a
+    snapshot that is rewritten (compacted) once `compact_after` records have
+    accumulated, and the journal is replayed on top of it when loading.
+
+    The file and journal support one writing process: a second one would
+    compact from a stale snapshot and truncate the first one's records. A
+    writer therefore holds an exclusive lock on `<path>.lock` until it is
+    closed, and another writer fails at startup (run a single uvicorn
+    worker, or use the sqlite backend). `lock=False` opens the file for
+    reading only.
+    """
+
+    # Only this process writes the file, so UserStore may cache its users
+    shared = False
+
+    def __init__(self, path: str, journal_path: Optional[str] = None, compact_after: int = 10000, lock: bool = True):
+        self.path = path
+        self.compact_after = compact_after
+        self._lock_file = self._acquire_lock() if lock else None
+        self.journal = RegistrationJournal(journal_path) if journal_path else None
+
+    def _acquire_lock(self):
+        lock_file = open(f"{self.path}.lock", "a")
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                raise RuntimeError(
+                    f"{self.path} is already in use by another process; the json user store "
+                    f"supports a single worker (use USER_STORE_BACKEND=sqlite for several)"
+                )
+        return lock_file
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        try:
+            with open(self.path, "r") as f:
+                users = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            users = []
+        if self.journal is not None:
+            users = apply_journal(users, self.journal.records())
+        return users
+
+    def save_all(self, users: List[Dict[str, Any]]):
+        # Write to a temp file and swap it in so readers never see a partial file
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(users, f, indent=2)
+            if self.journal is not None:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        if self.journal is not None:
+            # Everything journaled so far is in the snapshot now
+            self.journal.reset()
+
+    def insert_user(self, user: Dict[str, Any], users: List[Dict[str, Any]]):
+        if self.journal is not None:
+            return self.journal.append({"op": "insert_user", "user": user})
+        self.save_all(users)
+
+    def set_registrations(self, uid: str, registered_courses: List[Dict[str, Any]], users: List[Dict[str, Any]]):
+        if self.journal is not None:
+            return self.journal.append({"op": "set_registrations", "uid": uid, "registered_courses": registered_courses})
+        self.save_all(users)
+
+    def set_password(self, uid: str, password: str, users: List[Dict[str, Any]]):
+        if self.journal is not None:
+            return self.journal.append({"op": "set_password", "uid": uid, "password": password})
+        self.save_all(users)
+
+    def needs_compaction(self) -> bool:
+        return self.journal is not None and self.journal.size >= self.compact_after
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+class SqliteUserBackend:
+    """Stores users and registered courses in SQLite (WAL mode).
+
+    Signups and registration updates are single-user transactions instead of
+    whole-file rewrites, and several workers can share one database file.
+    """
+
+    # Other workers (and manage.py) write the same database, so UserStore
+    # reads through to it instead of caching users
+    shared = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS users (
+            uid TEXT NOT NULL,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL,
+            password TEXT NOT NULL,
+            extra TEXT NOT NULL DEFAULT '{}'
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS users_uid_idx ON users (uid);
+        CREATE UNIQUE INDEX IF NOT EXISTS users_email_idx ON users (email);
+        CREATE TABLE IF NOT EXISTS registered_courses (
+            uid TEXT NOT NULL REFERENCES users (uid) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
+            code TEXT,
+            course TEXT NOT NULL,
+            PRIMARY KEY (uid, position)
+        );
+        CREATE INDEX IF NOT EXISTS registered_courses_code_idx ON registered_courses (code);
+    """
+
+    USER_COLUMNS = ("uid", "name", "email", "password", "registered_courses")
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connect()
+        conn.executescript(self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; FastAPI runs sync handlers in a threadpool
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection, for reads outside a write transaction"""
+        return self._connect()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction on this thread's connection (BEGIN IMMEDIATE ... COMMIT).
+
+        A transaction opened while another is active on the same thread joins
+        it, so callers can group several backend writes into one commit.
+        """
+        conn = self._connect()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def _row_to_user(self, conn: sqlite3.Connection, row) -> Dict[str, Any]:
+        uid, name, email, password, extra = row
+        user = {"uid": uid, "name": name, "email": email, "password": password}
+        user.update(json.loads(extra))
+        courses = conn.execute(
+            "SELECT course FROM registered_courses WHERE uid = ? ORDER BY position", (uid,)
+        ).fetchall()
+        if user.pop("_has_registrations", False) or courses:
+            user["registered_courses"] = [json.loads(course) for (course,) in courses]
+        return user
+
+    def _lookup(self, column: str, value: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        row = conn.execute(
+            f"SELECT uid, name, email, password, extra FROM users WHERE {column} = ?", (value,)
+        ).fetchone()
+        return self._row_to_user(conn, row) if row else None
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        conn = self._connect()
+        users = {}
+        for uid, name, email, password, extra in conn.execute(
+            "SELECT uid, name, email, password, extra FROM users ORDER BY rowid"
+        ):
+            user = {"uid": uid, "name": name, "email": email, "password": password}
+            user.update(json.loads(extra))
+            users[uid] = user
+        for uid, course in conn.execute(
+            "SELECT uid, course FROM registered_courses ORDER BY uid, position"
+        ):
+            users[uid].setdefault("registered_courses", []).append(json.loads(course))
+        for user in users.values():
+            if user.pop("_has_registrations", None):
+                user.setdefault("registered_courses", [])
+        return list(users.values())
+
+    def get_by_uid(self, uid: str) -> Optional[Dict[str, Any]]:
+        return self._lookup("uid", uid)
+
+    def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        return self._lookup("email", email.lower().strip())
+
+    def _insert(self, conn: sqlite3.Connection, user: Dict[str, Any]):
+        extra = {k: v for k, v in user.items() if k not in self.USER_COLUMNS}
+        if "registered_courses" in user:
+            # Keep "registered but empty" distinct from "never registered"
+            extra["_has_registrations"] = True
+        conn.execute(
+            "INSERT INTO users (uid, name, email, password, extra) VALUES (?, ?, ?, ?, ?)",
+            (user["uid"], user["name"], user["email"].lower().strip(), user["password"], json.dumps(extra)),
+        )
+        self._write_courses(conn, user["uid"], user.get("registered_courses", []))
+
+    @staticmethod
+    def _write_courses(conn: sqlite3.Connection, uid: str, registered_courses: List[Dict[str, Any]]):
+        conn.execute("DELETE FROM registered_courses WHERE uid = ?", (uid,))
+        conn.executemany(
+            "INSERT INTO registered_courses (uid, position, code, course) VALUES (?, ?, ?, ?)",
+            [(uid, i, course.get("code"), json.dumps(course)) for i, course in enumerate(registered_courses)],
+        )
+
+    def insert_user(self, user: Dict[str, Any], users: List[Dict[str, Any]] = None):
+        try:
+            with self.transaction() as conn:
+                self._insert(conn, user)
+        except sqlite3.IntegrityError as e:
+            raise ValueError("Email already exists" if "email" in str(e) else "UID already exists") from e
+
+    def insert_many(self, users: List[Dict[str, Any]], skip_existing: bool = False) -> int:
+        """Insert a batch of users in a single transaction; returns how many were inserted"""
+        inserted = 0
+        with self.transaction() as conn:
+            for user in users:
+                if skip_existing and conn.execute(
+                    "SELECT 1 FROM users WHERE uid = ? OR email = ?", (user["uid"], user["email"].lower().strip())
+                ).fetchone():
+                    continue
+                self._insert(conn, user)
+                inserted += 1
+        return inserted
+
+    def iter_registrations(self) -> Iterator[Tuple[str, str, str, Dict[str, Any]]]:
+        """Stream (uid, name, email, course) for every registered course, in user order"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            rows = conn.execute(
+                "SELECT u.uid, u.name, u.email, r.course FROM users u "
+                "JOIN registered_courses r ON r.uid = u.uid ORDER BY u.rowid, r.position"
+            )
+            for uid, name, email, course in rows:
+                yield uid, name, email, json.loads(course)
+        finally:
+            conn.close()
+
+    def set_registrations(self, uid: str, registered_courses: List[Dict[str, Any]], users: List[Dict[str, Any]] = None) -> bool:
+        """Replace a user's registered courses; returns False for unknown users"""
+        with self.transaction() as conn:
+            row = conn.execute("SELECT extra FROM users WHERE uid = ?", (uid,)).fetchone()
+            if row is None:
+                return False
+            extra = json.loads(row[0])
+            if not extra.get("_has_registrations"):
+                extra["_has_registrations"] = True
+                conn.execute("UPDATE users SET extra = ? WHERE uid = ?", (json.dumps(extra), uid))
+            self._write_courses(conn, uid, registered_courses)
+        return True
+
+    def set_password(self, uid: str, password: str, users: List[Dict[str, Any]] = None) -> bool:
+        with self.transaction() as conn:
+            updated = conn.execute("UPDATE users SET password = ? WHERE uid = ?", (password, uid)).rowcount
+        return updated > 0
+
+    def save_all(self, users: List[Dict[str, Any]]):
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM registered_courses")
+            conn.execute("DELETE FROM users")
+            for user in users:
+                self._insert(conn, user)
+
+    def is_empty(self) -> bool:
+        return self._connect().execute("SELECT 1 FROM users LIMIT 1").fetchone() is None
+
+
+def migrate_json_to_sqlite(json_path: str, db_path: str, journal_path: Optional[str] = None) -> int:
+    """One-shot migration of users.json (plus its journal, if any) into a SQLite user database"""
+    users = JsonUserBackend(json_path, lock=False).load_all()
+    if journal_path:
+        users = apply_journal(users, read_journal(journal_path))
+    backend = SqliteUserBackend(db_path)
+    backend.insert_many(users)
+    return len(users)
+
+
+def create_user_backend(kind: str, json_path: str, db_path: str, journal_path: Optional[str] = None, compact_after: int = 10000):
+    """Build the configured user storage backend ("json" or "sqlite")"""
+    if kind == "json":
+        return JsonUserBackend(json_path, journal_path, compact_after)
+    if kind == "sqlite":
+        backend = SqliteUserBackend(db_path)
+        if backend.is_empty() and os.path.exists(json_path):
+            count = migrate_json_to_sqlite(json_path, db_path, journal_path)
+            print(f"Migrated {count} users from {json_path} to {db_path}")
+        return backend
+    raise ValueError(f"Unknown user store backend: {kind}")
+
+
+class UserStore:
+    """In-memory user repository with hash indexes on uid and lowercase email.
+
+    Users are read from the backend once on first access; every write goes
+    through the store so the indexes and the backend never drift apart.
+    Lookups are plain dictionary hits. Backend writes that return a commit
+    handle (the journal) are waited on outside the store lock, so concurrent
+    writers share one group commit.
+
+    Backends marked `shared` (SQLite) are written by other processes too, so
+    a cached user could carry another worker's stale courses or password;
+    for those the store reads and writes straight through to the backend,
+    whose uid and email lookups are indexed.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._shared = getattr(backend, "shared", False)
+        self._lock = threading.RLock()
+        self._users: List[Dict[str, Any]] = []
+        self._by_uid: Dict[str, Dict[str, Any]] = {}
+        self._by_email: Dict[str, Dict[str, Any]] = {}
+        self._loaded = False
+
+    @staticmethod
+    def _email_key(email: str) -> str:
+        return email.lower().strip()
+
+    def _index(self, users: List[Dict[str, Any]]):
+        self._users = users
+        self._by_uid = {user["uid"]: user for user in users}
+        self._by_email = {self._email_key(user["email"]): user for user in users}
+
+    def _remember(self, user: Dict[str, Any]):
+        self._users.append(user)
+        self._by_uid[user["uid"]] = user
+        self._by_email[self._email_key(user["email"])] = user
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._index(self.backend.load_all())
+                    self._loaded = True
+
+    def all(self) -> List[Dict[str, Any]]:
+        """Return a snapshot of all users"""
+        if self._shared:
+            return self.backend.load_all()
+        self._ensure_loaded()
+        return list(self._users)
+
+    def get_by_uid(self, uid: str) -> Optional[Dict[str, Any]]:
+        if self._shared:
+            return self.backend.get_by_uid(uid)
+        self._ensure_loaded()
+        return self._by_uid.get(uid)
+
+    def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        if self._shared:
+            return self.backend.get_by_email(email)
+        self._ensure_loaded()
+        return self._by_email.get(self._email_key(email))
+
+    def add(self, user: Dict[str, Any]):
+        """Insert a new user and persist it"""
+        if self._shared:
+            # Unique indexes reject duplicates, including ones from other workers
+            self.backend.insert_user(user)
+            return
+        self._ensure_loaded()
+        with self._lock:
+            if user["uid"] in self._by_uid:
+                raise ValueError("UID already exists")
+            if self._email_key(user["email"]) in self._by_email:
+                raise ValueError("Email already exists")
+            self._remember(user)
+            try:
+                commit = self.backend.insert_user(user, self._users)
+            except Exception:
+                self._forget(user)
+                raise
+        if commit is not None:
+            try:
+                commit.wait()
+            except Exception:
+                with self._lock:
+                    self._forget(user)
+                raise
+        self._maybe_compact()
+
+    def _forget(self, user: Dict[str, Any]):
+        self._users.remove(user)
+        self._by_uid.pop(user["uid"], None)
+        self._by_email.pop(self._email_key(user["email"]), None)
+
+    def set_registrations(self, uid: str, registered_courses: List[Dict[str, Any]]) -> bool:
+        """Replace a user's registered courses; returns False for unknown users"""
+        if self._shared:
+            return self.backend.set_registrations(uid, registered_courses)
+        user = self.get_by_uid(uid)
+        if user is None:
+            return False
+        with self._lock:
+            previous = user.get("registered_courses")
+            user["registered_courses"] = registered_courses
+            try:
+                commit = self.backend.set_registrations(uid, registered_courses, self._users)
+            except Exception:
+                self._restore_registrations(user, registered_courses, previous)
+                raise
+        if commit is not None:
+            try:
+                commit.wait()
+            except Exception:
+                with self._lock:
+                    self._restore_registrations(user, registered_courses, previous)
+                raise
+        self._maybe_compact()
+        return True
+
+    def set_password(self, uid: str, password: str) -> bool:
+        """Replace a user's stored password (hash); returns False for unknown users"""
+        if self._shared:
+            return self.backend.set_password(uid, password)
+        user = self.get_by_uid(uid)
+        if user is None:
+            return False
+        with self._lock:
+            previous = user["password"]
+            user["password"] = password
+            try:
+                commit = self.backend.set_password(uid, password, self._users)
+            except Exception:
+                user["password"] = previous
+                raise
+        if commit is not None:
+            try:
+                commit.wait()
+            except Exception:
+                with self._lock:
+                    if user["password"] == password:
+                        user["password"] = previous
+                raise
+        self._maybe_compact()
+        return True
+
+    @staticmethod
+    def _restore_registrations(user: Dict[str, Any], failed: List[Dict[str, Any]], previous: Optional[List[Dict[str, Any]]]):
+        if user.get("registered_courses") is not failed:
+            return  # a later update already replaced it
+        if previous is None:
+            user.pop("registered_courses", None)
+        else:
+            user["registered_courses"] = previous
+
+    def _maybe_compact(self):
+        needs_compaction = getattr(self.backend, "needs_compaction", None)
+        if needs_compaction is None or not needs_compaction():
+            return
+        with self._lock:
+            if needs_compaction():
+                self.backend.save_all(self._users)
+
+    def replace_all(self, users: List[Dict[str, Any]]):
+        """Replace the whole user list and persist it"""
+        if self._shared:
+            self.backend.save_all(list(users))
+            return
+        with self._lock:
+            self._index(list(users))
+            self._loaded = True
+            self.backend.save_all(self._users)
+
+    def close(self):
+        close = getattr(self.backend, "close", None)
+        if close is not None:
+            close()
+
+
+if __name__ == "__main__":
+    # Usage: python user_store.py [users.json] [users.db]
+    json_path = sys.argv[1] if len(sys.argv) > 1 else "users.json"
+    db_path = sys.argv[2] if len(sys.argv) > 2 else "users.db"
+    print(f"Migrated {migrate_json_to_sqlite(json_path, db_path)} users from {json_path} to {db_path}")
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, Link, useNavigate } from 'react-router-dom';
-import { useAuth } from '../contexts/AuthContext';
+import { useAuth, authHeaders } from '../contexts/AuthContext';
 import FacultyModal from './FacultyModal';
 import FloatingChat from './FloatingChat';
 import Faculty from './Faculty';
@@ -50,7 +50,9 @@ function CoursesList() {
 
   const fetchSelectedCourses = async () => {
     try {
-      const response = await fetch(`${process.env.REACT_APP_API_URL}/selected-courses`);
+      const response = await fetch(`${process.env.REACT_APP_API_URL}/selected-courses${user?.uid ? `?uid=${user.uid}` : ''}`, {
+        headers: authHeaders()
+      });
       if (response.ok) {
         const data = await response.json();
         setBackendSelectedCourses(data.selected_courses);
@@ -65,7 +67,9 @@ function CoursesList() {
     if (!user?.uid) return;
     
     try {
-      const response = await fetch(`${process.env.REACT_APP_API_URL}/user-registrations/${user.uid}`);
+      const response = await fetch(`${process.env.REACT_APP_API_URL}/user-registrations/${user.uid}`, {
+        headers: authHeaders()
+      });
       if (response.ok) {
         const data = await response.json();
         const hasRegistrations = data.registered_courses && data.registered_courses.length > 0;
@@ -136,9 +140,10 @@ function CoursesList() {
       const response = await fetch(`${process.env.REACT_APP_API_URL}/select-course`, {
         method: 'POST',
         headers: {
-          'Content-Type': 'application/json'
+          'Content-Type': 'application/json',
+          ...authHeaders()
         },
-        body: JSON.stringify({ course_code: course.code })
+        body: JSON.stringify({ course_code: course.code, uid: user?.uid })
       });
       
       const data = await response.json();
@@ -163,8 +168,9 @@ function CoursesList() {
 
   const removeFromPlan = async (courseCode) => {
     try {
-      const response = await fetch(`${process.env.REACT_APP_API_URL}/remove-course/${courseCode}`, {
-        method: 'DELETE'
+      const response = await fetch(`${process.env.REACT_APP_API_URL}/remove-course/${courseCode}${user?.uid ? `?uid=${user.uid}` : ''}`, {
+        method: 'DELETE',
+        headers: authHeaders()
       });
       
       const data = await response.json();
@@ -303,7 +309,8 @@ function CoursesList() {
       const response = await fetch(`${process.env.REACT_APP_API_URL}/complete-registration`, {
         method: 'POST',
         headers: {
-          'Content-Type': 'application/json'
+          'Content-Type': 'application/json',
+          ...authHeaders()
         },
         body: JSON.stringify({
           uid: userUID,
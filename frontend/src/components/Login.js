@@ -1,6 +1,6 @@
 import React, { useState } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
-import { useAuth } from '../contexts/AuthContext';
+import { useAuth, authHeaders } from '../contexts/AuthContext';
 
 function Login() {
   const navigate = useNavigate();
@@ -62,6 +62,7 @@ function Login() {
         // Use AuthContext for login
         const userData = {
           uid: data.uid,
+          token: data.token,
           name: data.user_name || data.name,
           hasRegisteredCourses: false
         };
@@ -70,7 +71,9 @@ function Login() {
         
         // Check if user has existing course registrations
         try {
-          const registrationResponse = await fetch(`${process.env.REACT_APP_API_URL}/user-registrations/${data.uid}`);
+          const registrationResponse = await fetch(`${process.env.REACT_APP_API_URL}/user-registrations/${data.uid}`, {
+            headers: authHeaders()
+          });
           
           if (registrationResponse.ok) {
             const registrationData = await registrationResponse.json();
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
-import { useAuth } from '../contexts/AuthContext';
+import { useAuth, authHeaders } from '../contexts/AuthContext';
 
 function UserDashboard() {
   const navigate = useNavigate();
@@ -17,7 +17,9 @@ function UserDashboard() {
       }
 
       try {
-        const response = await fetch(`${process.env.REACT_APP_API_URL}/user-registrations/${user.uid}`);
+        const response = await fetch(`${process.env.REACT_APP_API_URL}/user-registrations/${user.uid}`, {
+          headers: authHeaders()
+        });
         
         if (response.ok) {
           const data = await response.json();
@@ -47,7 +49,8 @@ function UserDashboard() {
     
     try {
       const response = await fetch(`${process.env.REACT_APP_API_URL}/user-registrations/${user.uid}`, {
-        method: 'DELETE'
+        method: 'DELETE',
+        headers: authHeaders()
       });
 
       if (response.ok) {
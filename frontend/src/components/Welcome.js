@@ -1,9 +1,11 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, Link, useNavigate } from 'react-router-dom';
+import { useAuth, authHeaders } from '../contexts/AuthContext';
 
 function Welcome() {
   const { uid } = useParams();
   const navigate = useNavigate();
+  const { logout } = useAuth();
   const [welcomeData, setWelcomeData] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
@@ -11,7 +13,9 @@ function Welcome() {
   useEffect(() => {
     const fetchWelcomeData = async () => {
       try {
-        const response = await fetch(`${process.env.REACT_APP_API_URL}/welcome/${uid}`);
+        const response = await fetch(`${process.env.REACT_APP_API_URL}/welcome/${uid}`, {
+          headers: authHeaders()
+        });
         const data = await response.json();
 
         if (response.ok) {
@@ -36,7 +40,7 @@ function Welcome() {
   }, [uid]);
 
   const handleLogout = () => {
-    localStorage.removeItem('userUID');
+    logout();
     navigate('/');
   };
 
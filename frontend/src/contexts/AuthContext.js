@@ -2,6 +2,12 @@ import React, { createContext, useContext, useState, useEffect, useCallback } fr
 
 const AuthContext = createContext();
 
+// Authorization header for the session token issued by /login
+export const authHeaders = () => {
+  const token = localStorage.getItem('sessionToken');
+  return token ? { Authorization: `Bearer ${token}` } : {};
+};
+
 export const useAuth = () => {
   const context = useContext(AuthContext);
   if (!context) {
@@ -33,7 +39,9 @@ export const AuthProvider = ({ children }) => {
     }
 
     try {
-      const response = await fetch(`${process.env.REACT_APP_API_URL}/welcome/${userUID}`);
+      const response = await fetch(`${process.env.REACT_APP_API_URL}/welcome/${userUID}`, {
+        headers: authHeaders()
+      });
       
       if (response.ok) {
         const userData = await response.json();
@@ -46,8 +54,9 @@ export const AuthProvider = ({ children }) => {
         setIsLoading(false);
         return true;
       } else if (response.status === 401 || response.status === 404) {
-        // Invalid UID or user not found
+        // Invalid UID, expired session or user not found
         localStorage.removeItem('userUID');
+        localStorage.removeItem('sessionToken');
         setUser(null);
         setIsAuthenticated(false);
         setIsLoading(false);
@@ -78,12 +87,22 @@ export const AuthProvider = ({ children }) => {
 
   const login = (userData) => {
     localStorage.setItem('userUID', userData.uid);
+    if (userData.token) {
+      localStorage.setItem('sessionToken', userData.token);
+    }
     setUser(userData);
     setIsAuthenticated(true);
   };
 
   const logout = () => {
+    if (localStorage.getItem('sessionToken')) {
+      fetch(`${process.env.REACT_APP_API_URL}/logout`, {
+        method: 'POST',
+        headers: authHeaders()
+      }).catch((error) => console.error('Logout request failed:', error));
+    }
     localStorage.removeItem('userUID');
+    localStorage.removeItem('sessionToken');
     setUser(null);
     setIsAuthenticated(false);
   };